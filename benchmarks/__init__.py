@@ -0,0 +1,55 @@
+"""
+Offline benchmarks for studilee.
+
+Every benchmark is a standalone module that can be run with
+``python -m benchmarks.<name>`` from the project root. Benchmarks never
+touch the configured database: they create a throwaway test database
+(the same way ``manage.py test`` does), seed it and destroy it afterwards.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studilee.settings')
+
+
+def setup():
+    django.setup()
+
+
+@contextmanager
+def test_database(verbosity: int = 0):
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def measure():
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    result = {}
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        yield result
+        result['seconds'] = time.perf_counter() - start
+    result['queries'] = len(queries)
+
+
+def print_table(headers: list[str], rows: list[list]):
+    widths = [max(len(str(value)) for value in column)
+              for column in zip(headers, *rows)]
+    for row in [headers, *rows]:
+        print('  '.join(str(value).rjust(width)
+                        for value, width in zip(row, widths)))
@@ -0,0 +1,64 @@
+"""
+Throughput and peak memory of importing a JSONL bundle of articles, for
+a growing number of articles. Peak memory should stay flat as the bundle
+grows, since records are parsed one line at a time and written in batches.
+
+    python -m benchmarks.article_import --articles 100 1000 5000 --sections 10
+"""
+import argparse
+import json
+import tracemalloc
+
+from benchmarks import print_table, setup, test_database
+
+
+def generate_lines(count: int, sections: int, category: str):
+    for i in range(count):
+        yield json.dumps({
+            'title': f'Imported article number {i}',
+            'category': category,
+            'tags': [f'import-tag-{i % 20}', f'import-tag-{i % 7}'],
+            'sections': [{'title': f'Section number {number}', 'number': number,
+                          'content': f'Content of section {number} about topic{i}. ' * 20}
+                         for number in range(1, sections + 1)],
+        }).encode() + b'\n'
+
+
+def run(article_counts: list[int], sections: int, batch_size: int):
+    from django.test.utils import override_settings
+
+    from core.models import Category
+    from private.importing import import_articles
+    from users.models import CustomUser
+
+    category = Category.objects.create(title='Benchmark category')
+    rows = []
+    for count in article_counts:
+        author = CustomUser.objects.create_user(username=f'importer_{count}',
+                                                email=f'importer_{count}@example.com',
+                                                password='34somepassword34')
+        # With DEBUG on, every executed query would be kept in memory.
+        with override_settings(DEBUG=False):
+            tracemalloc.start()
+            report = import_articles(author, generate_lines(count, sections, category.title),
+                                     'jsonl', batch_size=batch_size)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        rows.append([count, report.rows, f'{report.seconds:.2f}',
+                     f'{report.rows_per_second:.0f}', f'{peak / 1024 / 1024:.1f}'])
+    print_table(['articles', 'rows', 's', 'rows/s', 'peak MiB'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--articles', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--sections', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.articles, args.sections, args.batch_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+The author's article list (sorted and filtered), search and a status
+change, with articles read from the database and from the cached article
+index (ARTICLE_INDEX_CACHE_ALIAS), warm, at a growing number of articles
+per author.
+
+    python -m benchmarks.article_index --articles 100 1000 --repeat 20
+"""
+import argparse
+import statistics
+
+from benchmarks import measure, print_table, setup, test_database
+
+
+REQUESTS = [
+    ('list', 'private:article-list', {}),
+    ('list by sections', 'private:article-list', {'ordering': '-sections_number'}),
+    ('ready articles', 'private:article-list', {'status': 'ready', 'ordering': 'published'}),
+    ('search', 'private:search-articles', {'query': 'topic7'}),
+]
+
+
+def time_request(client, method: str, url: str, data: dict, repeat: int) -> tuple[float, int]:
+    timings, queries = [], 0
+    for _ in range(repeat):
+        with measure() as result:
+            response = getattr(client, method)(url, data=data)
+        assert response.status_code in (200, 302), response.status_code
+        timings.append(result['seconds'] * 1000)
+        queries = result['queries']
+    return statistics.median(timings), queries
+
+
+def run(article_counts: list[int], repeat: int):
+    from django.core.cache import caches
+    from django.test import Client
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    from benchmarks.routes import Fixture
+
+    rows = []
+    seeded = 0
+    fixture = None
+    for article_count in sorted(article_counts):
+        if fixture is None:
+            fixture = Fixture(users=1, articles=article_count, sections=2, tags=3)
+        else:
+            fixture.create_articles(fixture.author, article_count - seeded)
+        seeded = article_count
+        client = Client()
+        client.force_login(fixture.author)
+        status_url = reverse('private:set-article-status-through-list',
+                             kwargs={'id': fixture.status_article.id})
+        for name, url_name, data in REQUESTS:
+            row = [article_count, name]
+            for alias in (None, 'article_index'):
+                with override_settings(ARTICLE_INDEX_CACHE_ALIAS=alias):
+                    caches['article_index'].clear()
+                    # Loads the index.
+                    client.get(reverse('private:article-list'))
+                    timing, queries = time_request(client, 'get', reverse(url_name), data, repeat)
+                row += [f'{timing:.1f}', queries]
+            rows.append(row)
+        row = [article_count, 'status change']
+        for alias in (None, 'article_index'):
+            with override_settings(ARTICLE_INDEX_CACHE_ALIAS=alias):
+                client.get(reverse('private:article-list'))
+                timing, queries = time_request(client, 'post', status_url, {}, repeat)
+            row += [f'{timing:.1f}', queries]
+        rows.append(row)
+    print_table(['articles', 'request', 'database: p50 ms', 'queries',
+                 'index: p50 ms', 'queries'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--articles', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.articles, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
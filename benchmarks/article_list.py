@@ -0,0 +1,98 @@
+"""
+Cost of the first and of a deep page of the author's article list, for
+every ordering, at a growing number of articles per author.
+
+    python -m benchmarks.article_list --articles 10000 100000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import print_table, setup, test_database
+
+
+BATCH_SIZE = 5000
+
+
+def seed(author, category, count: int, offset: int):
+    from core.models import Article, Section
+
+    for start in range(offset, offset + count, BATCH_SIZE):
+        stop = min(start + BATCH_SIZE, offset + count)
+        articles = Article.objects.bulk_create([
+            Article(title=f'Article number {i}', author=author, category=category)
+            for i in range(start, stop)
+        ])
+        Section.objects.bulk_create([
+            Section(article=article, title=f'Section number {number}',
+                    number=number, content='', slug=f'section-number-{number}')
+            for i, article in enumerate(articles)
+            for number in range(1, i % 3 + 1)
+        ])
+        Article.objects.refresh_sections_count(article.id for article in articles)
+
+
+def time_page(client, url: str, data: dict, repeat: int) -> tuple[float, object]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url, data=data)
+        timings.append((time.perf_counter() - start) * 1000)
+    assert response.status_code == 200, response.status_code
+    return statistics.median(timings), response
+
+
+def get_deep_cursor(paginator_class, queryset, ordering: str, position: int) -> str:
+    paginator = paginator_class(queryset, ordering=ordering, per_page=1)
+    obj = queryset.order_by(*paginator.get_ordering())[position]
+    return paginator.encode_cursor(obj)
+
+
+def run(article_counts: list[int], repeat: int):
+    from django.test import Client, RequestFactory
+    from django.urls import reverse
+
+    from core.models import Category
+    from private.pagination import KeysetPaginator
+    from private.views import ArticleListView
+    from users.models import CustomUser
+
+    author = CustomUser.objects.create_user(username='benchmark_author',
+                                            email='benchmark_author@example.com')
+    category = Category.objects.create(title='Benchmarks')
+    client = Client()
+    client.force_login(author)
+    url = reverse('private:article-list')
+    request = RequestFactory().get(url)
+    request.user = author
+    view = ArticleListView()
+    view.setup(request)
+    rows = []
+    seeded = 0
+    for article_count in sorted(article_counts):
+        seed(author, category, article_count - seeded, seeded)
+        seeded = article_count
+        queryset = view.get_queryset()
+        for ordering in view.allowed_orderings:
+            first, _ = time_page(client, url, {'ordering': ordering}, repeat)
+            cursor = get_deep_cursor(KeysetPaginator, queryset, ordering,
+                                     article_count - view.paginate_by - 1)
+            deep, _ = time_page(client, url, {'ordering': ordering,
+                                              'after': cursor}, repeat)
+            rows.append([article_count, ordering, f'{first:.2f}', f'{deep:.2f}'])
+    print_table(['articles', 'ordering', 'first page ms', 'last page ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--articles', type=int, nargs='+',
+                        default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.articles, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
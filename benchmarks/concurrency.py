@@ -0,0 +1,190 @@
+"""
+Throughput of the read views (article list, article and section detail,
+search and the public category list) under concurrency, served by the ASGI
+handler with every request a task on one event loop, as uvicorn serves
+them, and by the WSGI handler with a pool of threads, as gunicorn's gthread
+workers do. Requests are passed to the handlers in process, without HTTP.
+
+    python -m benchmarks.concurrency --requests 500 --concurrency 1 8 32 --latency 2
+
+--latency adds that many milliseconds to every query, the round trip to a
+database across the network, which SQLite does not have. Under ASGI every
+request queries on a thread of its own and opens its own connection, run
+it with DB_POOL_SIZE against MySQL (see core.db.pool).
+"""
+import argparse
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+from benchmarks import print_table, setup, test_database
+
+
+URL_NAMES = [
+    'private:article-list',
+    'private:article-detail',
+    'private:section-detail',
+    'private:search-articles',
+    'public:articles-by-category',
+]
+
+
+@dataclass
+class Request:
+    path: str
+    query_string: str
+    cookie: str
+
+
+def get_requests(fixture, count: int) -> list[Request]:
+    from django.conf import settings
+    from django.test import Client
+    from django.urls import reverse
+
+    from benchmarks.routes import ROUTES
+
+    client = Client()
+    client.force_login(fixture.author)
+    cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+    requests = []
+    for name in URL_NAMES:
+        route = ROUTES[name]
+        data = route.data(fixture) if callable(route.data) else route.data
+        requests.append(Request(path=reverse(name, kwargs=route.kwargs(fixture)),
+                                query_string=urlencode(data),
+                                cookie=cookie if route.login else ''))
+    return [requests[i % len(requests)] for i in range(count)]
+
+
+def add_query_latency(seconds: float):
+    from django.db.backends.signals import connection_created
+
+    def delay(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    def add_delay(sender, connection, **kwargs):
+        # First, execute_wrapper() blocks (see core.middleware) remove the
+        # last wrapper when they end.
+        if delay not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, delay)
+
+    connection_created.connect(add_delay, weak=False)
+
+
+def run_wsgi(requests: list[Request], concurrency: int) -> tuple[list[float], int]:
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def call(request: Request) -> tuple[float, str]:
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': request.path,
+            'QUERY_STRING': request.query_string,
+            'SERVER_NAME': 'testserver',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'testserver',
+            'HTTP_COOKIE': request.cookie,
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': io.StringIO(),
+        }
+        statuses = []
+        start = time.perf_counter()
+        body = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        b''.join(body)
+        # Sends request_finished, which closes or keeps the connection.
+        body.close()
+        return (time.perf_counter() - start) * 1000, statuses[0]
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, requests))
+    errors = sum(1 for _, status in results if not status.startswith('200'))
+    return [timing for timing, _ in results], errors
+
+
+def run_asgi(requests: list[Request], concurrency: int) -> tuple[list[float], int]:
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+
+    async def call(request: Request, slots: asyncio.Semaphore) -> tuple[float, int]:
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': request.path,
+            'raw_path': request.path.encode(),
+            'query_string': request.query_string.encode(),
+            'root_path': '',
+            'headers': [(b'host', b'testserver'), (b'cookie', request.cookie.encode())],
+            'client': ('127.0.0.1', 50000),
+            'server': ('testserver', 80),
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        async with slots:
+            start = time.perf_counter()
+            await handler(scope, receive, send)
+            return (time.perf_counter() - start) * 1000, messages[0]['status']
+
+    async def run_all():
+        # One slot per open client connection.
+        slots = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(*(call(request, slots) for request in requests))
+
+    results = asyncio.run(run_all())
+    errors = sum(1 for _, status in results if status != 200)
+    return [timing for timing, _ in results], errors
+
+
+def run(request_count: int, concurrency_levels: list[int], latency: float):
+    from benchmarks.routes import Fixture, percentile
+
+    fixture = Fixture(users=3, articles=100, sections=5, tags=3)
+    requests = get_requests(fixture, request_count)
+    if latency:
+        add_query_latency(latency / 1000)
+    rows = []
+    for concurrency in concurrency_levels:
+        for name, serve in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+            # Warms up caches, templates and connections.
+            serve(requests[:len(URL_NAMES)], concurrency)
+            start = time.perf_counter()
+            timings, errors = serve(requests, concurrency)
+            seconds = time.perf_counter() - start
+            rows.append([name, concurrency, f'{request_count / seconds:.0f}',
+                         f'{statistics.median(timings):.1f}', f'{percentile(timings, 99):.1f}',
+                         errors])
+    print_table(['handler', 'concurrency', 'requests/s', 'p50 ms', 'p99 ms', 'errors'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--latency', type=float, default=0,
+                        help='Milliseconds added to every query.')
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.requests, args.concurrency, args.latency)
+
+
+if __name__ == '__main__':
+    main()
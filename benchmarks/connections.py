@@ -0,0 +1,111 @@
+"""
+Connect overhead per request: concurrent authenticated GET requests with
+a new connection per request (CONN_MAX_AGE = 0), with persistent
+connections and with the connection pool of core.db.pool. Reports the
+connections opened, the time spent opening them and, for the pool, the
+checkouts that had to wait.
+
+    python -m benchmarks.connections --requests 500 --threads 8 --pool-size 4
+
+Run it against MySQL: SQLite test databases live in memory and keep their
+connection, and only the MySQL backend of this project pools connections.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import print_table, setup, test_database
+
+
+def get_modes(pool_size: int) -> dict[str, dict]:
+    return {
+        'per request': {'CONN_MAX_AGE': 0, 'POOL': {}},
+        'persistent': {'CONN_MAX_AGE': 60, 'POOL': {}},
+        'pool': {'CONN_MAX_AGE': 0, 'POOL': {'SIZE': pool_size, 'TIMEOUT': 30}},
+    }
+
+
+def run_mode(user, url: str, requests: int, threads: int) -> tuple[list[float], dict]:
+    from django.db import close_old_connections, connections
+    from django.test import Client
+
+    totals = {'connects': 0, 'connect_seconds': 0.0}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, 'client'):
+            local.client = Client()
+            local.client.force_login(user)
+        metrics = getattr(connections['default'], 'connection_metrics', None)
+        if metrics is not None:
+            metrics.reset()
+        start = time.perf_counter()
+        local.client.get(url)
+        # What the WSGI handler does when a response is finished.
+        close_old_connections()
+        elapsed = (time.perf_counter() - start) * 1000
+        if metrics is not None:
+            with lock:
+                totals['connects'] += metrics.connects
+                totals['connect_seconds'] += metrics.connect_seconds
+        return elapsed
+
+    def run_thread(count: int) -> list[float]:
+        try:
+            return [get() for _ in range(count)]
+        finally:
+            connections.close_all()
+
+    per_thread = [requests // threads + (1 if i < requests % threads else 0)
+                  for i in range(threads)]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        timings = [timing for result in executor.map(run_thread, per_thread)
+                   for timing in result]
+    return timings, totals
+
+
+def run(requests: int, threads: int, pool_size: int):
+    from django.db import connection, connections
+    from django.urls import reverse
+
+    from benchmarks.routes import Fixture
+    from core.db.pool import pools
+
+    if not hasattr(connection, 'connection_metrics'):
+        print(f'{connection.vendor} backend does not record connections, '
+              f'run with the core.db.backends.mysql engine.')
+    fixture = Fixture(users=1, articles=20, sections=3, tags=3)
+    url = reverse('private:article-list')
+    rows = []
+    for name, options in get_modes(pool_size).items():
+        connections.close_all()
+        pools.pop('default', None)
+        connection.settings_dict.update(options)
+        start = time.perf_counter()
+        timings, totals = run_mode(fixture.author, url, requests, threads)
+        seconds = time.perf_counter() - start
+        pool = pools.get('default')
+        stats = pool.get_stats() if pool else None
+        rows.append([name, f'{requests / seconds:.0f}', f'{statistics.median(timings):.2f}',
+                     totals['connects'], f'{totals["connect_seconds"] * 1000:.1f}',
+                     stats.connects if stats else '-', stats.waits if stats else '-'])
+    print_table(['mode', 'requests/s', 'p50 ms', 'connections', 'connect ms',
+                 'pool: opened', 'pool: waits'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--pool-size', type=int, default=2)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.requests, args.threads, args.pool_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Latency of logging in with a username for every password hasher, with the
+password already hashed by it and with an outdated hash, which the login
+rehashes in the background (or on the request thread, with --sync).
+
+    python -m benchmarks.login --logins 20
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import print_table, setup, test_database
+
+
+HASHERS = ['pbkdf2', 'scrypt', 'argon2']
+
+
+def measure_logins(client, logins: int) -> float:
+    from django.urls import reverse
+
+    timings = []
+    for _ in range(logins):
+        client.logout()
+        start = time.perf_counter()
+        client.post(reverse('users:login-username'),
+                    data={'username': 'bench_user', 'password': '34somepassword34'})
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(logins: int, sync: bool):
+    from django.conf import settings
+    from django.contrib.auth.hashers import get_hasher
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    from users.hashers import get_executor
+    from users.models import CustomUser
+
+    user = CustomUser.objects.create_user(username='bench_user', email='bench_user@gmail.com',
+                                          password='34somepassword34')
+    pbkdf2 = get_hasher('pbkdf2_sha256')
+    rows = []
+    for name in HASHERS:
+        hashers = [settings.PASSWORD_HASHERS_BY_NAME[name]] + [
+            path for other, path in settings.PASSWORD_HASHERS_BY_NAME.items() if other != name]
+        with override_settings(PASSWORD_HASHERS=hashers, PASSWORD_REHASH_ASYNC=not sync):
+            user.set_password('34somepassword34')
+            user.save()
+            current = measure_logins(Client(), logins)
+            outdated = []
+            for _ in range(logins):
+                # A hash made before the cost was raised.
+                CustomUser.objects.filter(pk=user.pk).update(
+                    password=pbkdf2.encode('34somepassword34', pbkdf2.salt(), iterations=1000))
+                outdated.append(measure_logins(Client(), 1))
+                # Waits for the rehash, so it is not measured by the next login.
+                get_executor().submit(lambda: None).result()
+        rows.append([name, f'{current:.1f}', f'{statistics.median(outdated):.1f}'])
+    print_table(['hasher', 'p50 ms', 'outdated hash: p50 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=10)
+    parser.add_argument('--sync', action='store_true',
+                        help='Rehash outdated passwords on the request thread.')
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.logins, args.sync)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Load test of the registration wizard: concurrent sign-ups going through
+all four steps, for every wizard storage and session engine combination.
+Reports sign-ups per second and session table queries per sign-up.
+
+    python -m benchmarks.registration --signups 300 --concurrency 50
+
+SQLite serialises writers, run it against MySQL (or another server
+database) for meaningful concurrency numbers.
+"""
+import argparse
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import print_table, setup, test_database
+
+
+CONFIGURATIONS = [
+    ('formtools.wizard.storage.session.SessionStorage', 'django.contrib.sessions.backends.db'),
+    ('users.wizard.CompactSessionStorage', 'django.contrib.sessions.backends.db'),
+    ('users.wizard.CompactSessionStorage', 'django.contrib.sessions.backends.cached_db'),
+    ('users.wizard.CompactCookieStorage', 'django.contrib.sessions.backends.db'),
+]
+
+
+def get_steps(number: int) -> list[dict]:
+    username = f'load_user_{number}'
+    return [
+        {'registration_wizard-current_step': 'First Step',
+         'First Step-username': username,
+         'First Step-email': f'{username}@example.com'},
+        {'registration_wizard-current_step': 'Second Step',
+         'Second Step-first_name': 'John',
+         'Second Step-last_name': 'Doe'},
+        {'registration_wizard-current_step': 'Third Step',
+         'Third Step-position': 'Computer Science Student'},
+        {'registration_wizard-current_step': 'Fourth Step',
+         'Fourth Step-password1': '34somepassword34',
+         'Fourth Step-password2': '34somepassword34'},
+    ]
+
+
+class SessionQueryCounter:
+    # Counts queries on the session table across all threads.
+
+    def __init__(self):
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        if 'django_session' in sql:
+            with self.lock:
+                self.count += 1
+        return execute(sql, params, many, context)
+
+
+def sign_up(number: int, counter: SessionQueryCounter) -> bool:
+    from django.db import DatabaseError, connection
+    from django.test import Client
+    from django.urls import reverse
+
+    client = Client()
+    url = reverse('users:register')
+    try:
+        with connection.execute_wrapper(counter):
+            client.get(url)
+            for data in get_steps(number):
+                response = client.post(url, data=data)
+        return response.status_code == 302
+    except DatabaseError:
+        return False
+    finally:
+        connection.close()
+
+
+def run(signups: int, concurrency: int):
+    from django.test.utils import override_settings
+
+    numbers = itertools.count()
+    rows = []
+    for storage, engine in CONFIGURATIONS:
+        counter = SessionQueryCounter()
+        with override_settings(REGISTRATION_WIZARD_STORAGE=storage, SESSION_ENGINE=engine):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(lambda number: sign_up(number, counter),
+                                            [next(numbers) for _ in range(signups)]))
+            seconds = time.perf_counter() - start
+        completed = sum(results)
+        rows.append([storage.rsplit('.', 1)[1], engine.rsplit('.', 1)[1], completed,
+                     len(results) - completed,
+                     f'{completed / seconds:.1f}',
+                     f'{counter.count / max(completed, 1):.1f}'])
+    print_table(['wizard storage', 'session engine', 'sign-ups', 'failed', 'sign-ups/s',
+                 'session queries/sign-up'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--signups', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.signups, args.concurrency)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Latency, queries and memory per request of every URL name of the
+private, public and users apps, against synthetic data.
+
+    python -m benchmarks.routes --articles 200 --sections 10 --tags 5
+    python -m benchmarks.routes --compare benchmarks/baseline.json
+
+Results are written to a JSON file (benchmarks/baseline.json by default),
+which later runs can be compared against with --compare. With
+--fail-on-regression the command exits with status 1 when a route runs
+more queries than in the baseline, its p50 grows by more than
+--threshold or it has no baseline yet.
+"""
+import argparse
+import datetime
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Optional
+
+from benchmarks import print_table, setup, test_database
+
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / 'baseline.json'
+APPS = ['private', 'public', 'users']
+
+
+class Fixture:
+    # Synthetic data: one author with many articles that is logged in
+    # during the benchmark, and a few other users with their own articles.
+
+    def __init__(self, users: int, articles: int, sections: int, tags: int):
+        from django.contrib.auth.hashers import make_password
+
+        from core.models import Category, Tag
+        from users.models import CustomUser
+
+        self.sections = sections
+        password = make_password('34somepassword34')
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'benchmark_user_{i}',
+                       email=f'benchmark_user_{i}@example.com',
+                       password=password)
+            for i in range(users)
+        ])
+        self.users = list(CustomUser.objects.order_by('id'))
+        self.author = self.users[0]
+        self.categories = Category.objects.bulk_create([
+            Category(title=f'Benchmark category {i}') for i in range(5)
+        ])
+        self.tags = Tag.objects.resolve([f'benchmark-tag-{i}' for i in range(tags * 4)])
+        self.tags_per_article = tags
+        for user in self.users:
+            self.create_articles(user, articles if user == self.author else max(articles // 10, 1))
+        self.article = self.create_articles(self.author, 1)[0]
+        self.status_article = self.create_articles(self.author, 1)[0]
+        self.category = self.categories[0]
+        self.ready_article = self.create_articles(self.users[-1], 1, is_ready=True)[0]
+
+    def create_articles(self, author, count: int, is_ready: bool = False) -> list:
+        from core.models import Article, Section
+        from core.search import index_articles
+
+        articles = Article.objects.bulk_create([
+            Article(title=f'Article number {i} about topic{i % 50}', author=author,
+                    category=self.categories[i % len(self.categories)],
+                    is_ready=is_ready)
+            for i in range(count)
+        ])
+        sections = [
+            Section(article=article, title=f'Section number {number}', number=number,
+                    content=f'Content of section {number} about topic{number}. ' * 20,
+                    slug=f'section-number-{number}')
+            for article in articles for number in range(1, self.sections + 1)
+        ]
+        for section in sections:
+            section.render_content()
+        Section.objects.bulk_create(sections)
+        Article.tags.through.objects.bulk_create([
+            Article.tags.through(article_id=article.id, tag_id=tag.id)
+            for i, article in enumerate(articles)
+            for tag in self.tags[i % len(self.tags):][:self.tags_per_article]
+        ])
+        Article.objects.refresh_sections_count(article.id for article in articles)
+        index_articles(Article.objects.filter(id__in=[article.id for article in articles]).
+                       select_related('category'))
+        return articles
+
+    def create_section(self):
+        from core.models import Section
+
+        number = Section.objects.filter(article=self.article).count() + 1
+        return Section.objects.create(article=self.article, number=number,
+                                      title=f'Disposable section {number}',
+                                      content='Content')
+
+
+@dataclass
+class Route:
+    kwargs: Callable[[Fixture], dict] = lambda fixture: {}
+    method: str = 'get'
+    # Request data, or a callable building it before every request.
+    data: dict | Callable[[Fixture], dict] = field(default_factory=dict)
+    login: bool = True
+    # Called before every request, outside of the measurement, for routes
+    # that change the data they need (e.g. deletions).
+    prepare: Optional[Callable[[Fixture], dict]] = None
+
+
+def article_kwargs(fixture: Fixture) -> dict:
+    return {'id': fixture.article.id}
+
+
+def section_kwargs(fixture: Fixture) -> dict:
+    return {'id': fixture.article.id, 'slug': 'section-number-1'}
+
+
+def status_kwargs(fixture: Fixture) -> dict:
+    return {'id': fixture.status_article.id}
+
+
+def reversed_sections(fixture: Fixture) -> dict:
+    from core.models import Section
+
+    slugs = Section.objects.filter(article=fixture.article).\
+        order_by('-number').values_list('slug', flat=True)
+    return {'order': list(slugs)}
+
+
+def delete_article(fixture: Fixture) -> dict:
+    return {'id': fixture.create_articles(fixture.author, 1)[0].id}
+
+
+def delete_section(fixture: Fixture) -> dict:
+    return {'id': fixture.article.id, 'slug': fixture.create_section().slug}
+
+
+ROUTES = {
+    'users:register': Route(login=False),
+    'users:login-username': Route(login=False),
+    'users:login-email': Route(login=False),
+    'users:login': Route(login=False),
+    'users:logout': Route(prepare=lambda fixture: {}),
+    'users:become-user': Route(login=False),
+    'users:change-user': Route(),
+    'users:availability': Route(login=False, data={'username': 'benchmark_user_0',
+                                                   'email': 'free@example.com'}),
+    'private:private-page': Route(),
+    'private:post-article': Route(),
+    'private:article-detail': Route(kwargs=article_kwargs),
+    'private:update-article-through-list': Route(kwargs=article_kwargs),
+    'private:update-article-through-detail': Route(kwargs=article_kwargs),
+    'private:delete-article': Route(method='post', prepare=delete_article),
+    'private:article-list': Route(),
+    'private:post-section': Route(kwargs=article_kwargs),
+    'private:section-detail': Route(kwargs=section_kwargs),
+    'private:guide': Route(),
+    'private:update-section-article-detail': Route(kwargs=section_kwargs),
+    'private:update-section-section-detail': Route(kwargs=section_kwargs),
+    'private:delete-section': Route(method='post', prepare=delete_section),
+    'private:set-article-status-through-detail': Route(method='post', kwargs=status_kwargs),
+    'private:set-article-status-through-list': Route(method='post', kwargs=status_kwargs),
+    'private:search-articles': Route(data={'query': 'topic7'}),
+    'private:article-readiness': Route(kwargs=article_kwargs),
+    'private:reorder-sections': Route(method='post', kwargs=article_kwargs,
+                                      data=reversed_sections),
+    'private:import-articles': Route(),
+    'private:export-articles': Route(),
+    'public:articles-by-category': Route(login=False,
+                                         kwargs=lambda fixture: {'id': fixture.category.id}),
+    'public:article-reader': Route(login=False,
+                                   kwargs=lambda fixture: {'id': fixture.ready_article.id}),
+    'public:section-reader': Route(login=False,
+                                   kwargs=lambda fixture: {'id': fixture.ready_article.id,
+                                                           'slug': 'section-number-1'}),
+}
+
+
+def get_url_names() -> list[str]:
+    from importlib import import_module
+
+    url_names = []
+    for app in APPS:
+        urls = import_module(f'{app}.urls')
+        url_names += [f'{urls.app_name}:{pattern.name}' for pattern in urls.urlpatterns]
+    return url_names
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def measure_route(fixture: Fixture, name: str, route: Route, repeat: int) -> dict:
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+
+    client = Client()
+    timings, queries, peaks, statuses = [], [], [], set()
+    for iteration in range(repeat):
+        kwargs = route.prepare(fixture) if route.prepare else route.kwargs(fixture)
+        if route.login:
+            client.force_login(fixture.author)
+        url = reverse(name, kwargs=kwargs)
+        data = route.data(fixture) if callable(route.data) else route.data
+        request = getattr(client, route.method)
+        # Memory is measured on the last iteration only, tracing slows
+        # requests down.
+        trace_memory = iteration == repeat - 1
+        if trace_memory:
+            tracemalloc.start()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = request(url, data=data)
+            if response.streaming:
+                # The body of streamed responses is produced while it is read.
+                for _ in response.streaming_content:
+                    pass
+            timings.append((time.perf_counter() - start) * 1000)
+        if trace_memory:
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        queries.append(len(captured))
+        statuses.add(response.status_code)
+    return {
+        'method': route.method.upper(),
+        'status': sorted(statuses),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'queries': max(queries),
+        'peak_memory_kb': round(max(peaks), 1),
+    }
+
+
+def run(args) -> dict:
+    from django.conf import settings
+    from django.db import connection
+    import django
+
+    url_names = get_url_names()
+    missing = [name for name in url_names if name not in ROUTES]
+    if missing:
+        raise SystemExit(f'No benchmark route defined for: {", ".join(missing)}')
+    fixture = Fixture(users=args.users, articles=args.articles,
+                      sections=args.sections, tags=args.tags)
+    results = {}
+    for name in url_names:
+        if args.routes and name not in args.routes:
+            continue
+        results[name] = measure_route(fixture, name, ROUTES[name], args.repeat)
+    return {
+        'meta': {
+            'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'debug': settings.DEBUG,
+            'seed': {'users': args.users, 'articles': args.articles,
+                     'sections': args.sections, 'tags': args.tags,
+                     'repeat': args.repeat},
+        },
+        'routes': results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    rows, regressions = [], []
+    for name, result in results['routes'].items():
+        previous = baseline['routes'].get(name)
+        if previous is None:
+            # Routes added since the baseline was written can't be checked,
+            # they fail like regressions until it is regenerated.
+            regressions.append(name)
+            rows.append([name, '-', result['p50_ms'], '-', result['queries'], 'no baseline'])
+            continue
+        ratio = result['p50_ms'] / previous['p50_ms'] if previous['p50_ms'] else 1
+        flags = []
+        if result['queries'] > previous['queries']:
+            flags.append('queries')
+        if ratio > 1 + threshold:
+            flags.append('latency')
+        if flags:
+            regressions.append(name)
+        rows.append([name, previous['p50_ms'], result['p50_ms'],
+                     previous['queries'], result['queries'], ', '.join(flags)])
+    print_table(['route', 'base p50 ms', 'p50 ms', 'base queries', 'queries',
+                 'regression'], rows)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=5)
+    parser.add_argument('--articles', type=int, default=100,
+                        help='Articles of the logged in author.')
+    parser.add_argument('--sections', type=int, default=5)
+    parser.add_argument('--tags', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--routes', nargs='*', help='Only benchmark these URL names.')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument('--compare', type=Path,
+                        help='Baseline file to compare against, no results are written.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Allowed relative p50 growth when comparing.')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        results = run(args)
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        regressions = compare(results, baseline, args.threshold)
+        missing = [name for name in results['routes'] if name not in baseline['routes']]
+        if missing:
+            print(f'No baseline for: {", ".join(missing)}, regenerate {args.compare}.',
+                  file=sys.stderr)
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+        return
+    print_table(['route', 'method', 'status', 'p50 ms', 'p99 ms', 'queries', 'peak KiB'],
+                [[name, result['method'], result['status'], result['p50_ms'],
+                  result['p99_ms'], result['queries'], result['peak_memory_kb']]
+                 for name, result in results['routes'].items()])
+    args.output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
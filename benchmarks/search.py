@@ -0,0 +1,62 @@
+"""
+Latency of searching an author's articles for a growing number of articles.
+
+    python -m benchmarks.search --articles 100 1000 5000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import print_table, setup, test_database
+
+
+def seed(author, category, count: int, offset: int):
+    from core.models import Article
+    from core.search import index_articles
+
+    articles = Article.objects.bulk_create([
+        Article(title=f'Article number {offset + i} about topic{(offset + i) % 50}',
+                author=author, category=category)
+        for i in range(count)
+    ])
+    for article in articles:
+        article.category = category
+    index_articles(articles)
+
+
+def run(article_counts: list[int], repeat: int):
+    from core.models import Category
+    from core.search import search_articles
+    from users.models import CustomUser
+
+    author = CustomUser.objects.create_user(username='benchmark_author',
+                                            email='benchmark_author@example.com')
+    category = Category.objects.create(title='Benchmarks')
+    rows = []
+    seeded = 0
+    for article_count in sorted(article_counts):
+        seed(author, category, article_count - seeded, seeded)
+        seeded = article_count
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            found = search_articles(author, 'topic7')
+            timings.append((time.perf_counter() - start) * 1000)
+        rows.append([article_count, len(found),
+                     f'{statistics.median(timings):.2f}'])
+    print_table(['articles', 'found', 'p50 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--articles', type=int, nargs='+',
+                        default=[100, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.articles, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""
+Query count and time of resolving tags when an article is published
+or updated, for a growing number of tags.
+
+    python -m benchmarks.tag_resolution --tags 1 10 20 40 100
+"""
+import argparse
+
+from benchmarks import measure, print_table, setup, test_database
+
+
+def run(tag_counts: list[int]):
+    from core.models import Tag
+
+    rows = []
+    for tag_count in tag_counts:
+        names = [f'tag-{tag_count}-{i}' for i in range(tag_count)]
+        with measure() as created:
+            Tag.objects.resolve(names)
+        with measure() as existing:
+            Tag.objects.resolve(names)
+        rows.append([tag_count,
+                     created['queries'], f"{created['seconds'] * 1000:.2f}",
+                     existing['queries'], f"{existing['seconds'] * 1000:.2f}"])
+    print_table(['tags', 'new: queries', 'new: ms',
+                 'existing: queries', 'existing: ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tags', type=int, nargs='+',
+                        default=[1, 10, 20, 40, 100])
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.tags)
+
+
+if __name__ == '__main__':
+    main()
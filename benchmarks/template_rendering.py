@@ -0,0 +1,100 @@
+"""
+Render time of the author's article list with every article on one page
+(500 by default), for both template profiles and with template fragment
+caching off, cold (every card rendered and stored) and warm.
+
+    python -m benchmarks.template_rendering --articles 500 --repeat 20
+"""
+import argparse
+import copy
+import statistics
+import time
+
+from benchmarks import print_table, setup, test_database
+
+
+def get_templates(profile: str) -> list[dict]:
+    from django.conf import settings
+
+    templates = copy.deepcopy(settings.TEMPLATES)
+    loaders = ['django.template.loaders.filesystem.Loader',
+               'django.template.loaders.app_directories.Loader']
+    if profile == 'production':
+        loaders = [('django.template.loaders.cached.Loader', loaders)]
+    templates[0]['OPTIONS']['loaders'] = loaders
+    return templates
+
+
+def get_caches(fragments: bool) -> dict:
+    from django.conf import settings
+
+    caches = copy.deepcopy(settings.CACHES)
+    caches['template_fragments'] = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-template-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    } if fragments else {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    return caches
+
+
+def render_list(request, articles: list, repeat: int, clear: bool) -> float:
+    from django.core.cache import caches
+    from django.template.loader import render_to_string
+
+    timings = []
+    for _ in range(repeat):
+        if clear:
+            caches['template_fragments'].clear()
+        start = time.perf_counter()
+        render_to_string('private/article_list.html', {'articles': articles,
+                                                       'total_count': len(articles)},
+                         request=request)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def run(article_count: int, repeat: int):
+    from django.test import RequestFactory
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    from benchmarks.routes import Fixture
+    from core.models import Article
+    from private.cache import IndexedArticle
+
+    fixture = Fixture(users=1, articles=article_count, sections=3, tags=3)
+    articles = [IndexedArticle.from_article(article) for article in
+                Article.objects.
+                filter(author=fixture.author).
+                select_related('category').
+                prefetch_related('tags').
+                order_by('-id')[:article_count]]
+    request = RequestFactory().get(reverse('private:article-list'))
+    request.user = fixture.author
+    rows = []
+    for profile in ('development', 'production'):
+        with override_settings(TEMPLATES=get_templates(profile)):
+            with override_settings(CACHES=get_caches(fragments=False)):
+                # Compiles the templates once for the cached loader.
+                render_list(request, articles, 1, clear=False)
+                off = render_list(request, articles, repeat, clear=False)
+            with override_settings(CACHES=get_caches(fragments=True)):
+                cold = render_list(request, articles, repeat, clear=True)
+                warm = render_list(request, articles, repeat, clear=False)
+        rows.append([profile, len(articles), f'{off:.1f}', f'{cold:.1f}', f'{warm:.1f}'])
+    print_table(['profile', 'articles', 'no fragments: p50 ms',
+                 'cold fragments: p50 ms', 'warm fragments: p50 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--articles', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.articles, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
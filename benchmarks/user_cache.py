@@ -0,0 +1,70 @@
+"""
+Queries and latency of authenticated GET requests with and without the
+user cache (USER_CACHE_ALIAS). With the cache, requests of a logged in
+user should run one query fewer.
+
+    python -m benchmarks.user_cache --repeat 50
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks import print_table, setup, test_database
+
+
+def measure_requests(client, urls: list[str], repeat: int) -> dict:
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    results = {}
+    for url in urls:
+        # The first request fills the cache.
+        client.get(url)
+        timings, queries = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+        results[url] = (max(queries), statistics.median(timings))
+    return results
+
+
+def run(repeat: int):
+    from django.core.cache import caches
+    from django.test import Client
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    from benchmarks.routes import ROUTES, Fixture
+
+    fixture = Fixture(users=2, articles=20, sections=5, tags=3)
+    urls = {name: reverse(name, kwargs=route.kwargs(fixture))
+            for name, route in ROUTES.items()
+            if route.method == 'get' and route.login and route.prepare is None}
+    results = {}
+    for alias in (None, 'default'):
+        caches['default'].clear()
+        with override_settings(USER_CACHE_ALIAS=alias):
+            client = Client()
+            client.force_login(fixture.author)
+            results[alias] = measure_requests(client, list(urls.values()), repeat)
+    rows = []
+    for name, url in urls.items():
+        (queries, p50), (cached_queries, cached_p50) = results[None][url], results['default'][url]
+        rows.append([name, queries, cached_queries, f'{p50:.2f}', f'{cached_p50:.2f}'])
+    print_table(['route', 'queries', 'cached: queries', 'p50 ms', 'cached: p50 ms'], rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    setup()
+    with test_database():
+        run(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import AccessMixin
+from django.contrib.auth.views import redirect_to_login
+from django.http import HttpRequest
+
+
+async def aload_user(request: HttpRequest):
+    # request.user is loaded from the session (and the database) the first
+    # time it is used, which async views can only do on a thread. Once
+    # loaded, views and templates use it without queries.
+    await sync_to_async(lambda: request.user.is_authenticated)()
+
+
+def async_login_required(view):
+    # login_required for async function views.
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs):
+        await aload_user(request)
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    # LoginRequiredMixin for views whose handlers are async.
+
+    async def dispatch(self, request: HttpRequest, *args, **kwargs):
+        await aload_user(request)
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,219 @@
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from django.db import OperationalError
+
+
+@dataclass
+class PoolStats:
+    size: int
+    in_use: int = 0
+    idle: int = 0
+    checkouts: int = 0
+    # Checkouts that found every connection in use and had to wait.
+    waits: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+    connects: int = 0
+    # Connections closed because they failed the health check or got too old.
+    discarded: int = 0
+
+    @property
+    def saturation(self) -> float:
+        return self.in_use / self.size if self.size else 0.0
+
+
+@dataclass
+class PooledConnection:
+    connection: Any
+    created: float
+
+
+class ConnectionPool:
+    # At most size connections per database and process, shared by all
+    # threads. A connection is checked out when a thread connects and
+    # checked in when Django closes it, at the end of the request with
+    # CONN_MAX_AGE = 0, so a request pays the connect only when the pool
+    # has no idle connection. Checkouts wait up to timeout seconds for a
+    # connection when all of them are in use.
+
+    def __init__(self, size: int, timeout: float, max_age: Optional[float] = None,
+                 health_checks: bool = True):
+        self.size = size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_checks = health_checks
+        self.idle: deque[PooledConnection] = deque()
+        self.checked_out: dict[int, PooledConnection] = {}
+        self.condition = threading.Condition()
+        self.stats = PoolStats(size=size)
+
+    def is_expired(self, pooled: PooledConnection) -> bool:
+        return self.max_age is not None and \
+            time.monotonic() - pooled.created > self.max_age
+
+    def checkout(self, connect: Callable[[], Any],
+                 is_usable: Callable[[Any], bool],
+                 close: Callable[[Any], None]) -> tuple[Any, float]:
+        # Returns a connection and the seconds spent waiting for it, zero
+        # when a connection was available right away.
+        start = time.monotonic()
+        with self.condition:
+            waited = False
+            while not self.idle and self.stats.in_use >= self.size:
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise OperationalError(
+                        f'No database connection available within {self.timeout} seconds, '
+                        f'all {self.size} connections of the pool are in use.')
+                waited = True
+                self.condition.wait(remaining)
+            wait = time.monotonic() - start if waited else 0.0
+            self.stats.in_use += 1
+            self.stats.checkouts += 1
+            if waited:
+                self.stats.waits += 1
+                self.stats.wait_seconds += wait
+                self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, wait)
+            pooled = self.idle.pop() if self.idle else None
+            self.stats.idle = len(self.idle)
+        # Connecting and health checks run outside of the lock.
+        try:
+            if pooled is not None and (self.is_expired(pooled) or
+                                       self.health_checks and not is_usable(pooled.connection)):
+                self.discard(pooled.connection, close)
+                pooled = None
+            if pooled is None:
+                pooled = PooledConnection(connect(), time.monotonic())
+                with self.condition:
+                    self.stats.connects += 1
+        except BaseException:
+            self.release()
+            raise
+        with self.condition:
+            self.checked_out[id(pooled.connection)] = pooled
+        return pooled.connection, wait
+
+    def checkin(self, connection, close: Callable[[Any], None], reusable: bool = True):
+        with self.condition:
+            pooled = self.checked_out.pop(id(connection), None)
+        if pooled is None:
+            close(connection)
+            return
+        if not reusable or self.is_expired(pooled):
+            self.discard(connection, close)
+            self.release()
+            return
+        with self.condition:
+            self.idle.append(pooled)
+            self.stats.in_use -= 1
+            self.stats.idle = len(self.idle)
+            self.condition.notify()
+
+    def release(self):
+        with self.condition:
+            self.stats.in_use -= 1
+            self.condition.notify()
+
+    def discard(self, connection, close: Callable[[Any], None]):
+        with self.condition:
+            self.stats.discarded += 1
+        try:
+            close(connection)
+        except Exception:
+            pass
+
+    def get_stats(self) -> PoolStats:
+        with self.condition:
+            return PoolStats(**vars(self.stats))
+
+
+pools: dict[str, ConnectionPool] = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, settings_dict: dict) -> Optional[ConnectionPool]:
+    # settings_dict['POOL'] = {'SIZE': ..., 'TIMEOUT': ..., 'MAX_AGE': ...},
+    # without a SIZE connections are not pooled.
+    options = settings_dict.get('POOL') or {}
+    if not options.get('SIZE'):
+        return None
+    with pools_lock:
+        if alias not in pools:
+            pools[alias] = ConnectionPool(size=options['SIZE'],
+                                          timeout=options.get('TIMEOUT', 5.0),
+                                          max_age=options.get('MAX_AGE'),
+                                          health_checks=settings_dict.get('CONN_HEALTH_CHECKS', True))
+        return pools[alias]
+
+
+def get_pool_stats() -> dict[str, PoolStats]:
+    with pools_lock:
+        return {alias: pool.get_stats() for alias, pool in pools.items()}
+
+
+class ConnectionMetrics:
+    # Connections opened (or checked out of the pool) by the current
+    # request, reset by core.middleware.ConnectionMetricsMiddleware.
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.connects = 0
+        self.connect_seconds = 0.0
+        self.wait_seconds = 0.0
+
+
+class PooledDatabaseWrapperMixin:
+    # Mixed into the DatabaseWrapper of a backend. Takes connections from
+    # the pool of the alias when settings_dict has a POOL, and records the
+    # time spent connecting either way.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connection_metrics = ConnectionMetrics()
+
+    def close_raw_connection(self, connection):
+        connection.close()
+
+    def is_raw_connection_usable(self, connection) -> bool:
+        try:
+            connection.ping()
+        except Exception:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        start = time.monotonic()
+        pool = get_pool(self.alias, self.settings_dict)
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+            wait = 0.0
+        else:
+            connection, wait = pool.checkout(
+                lambda: super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params),
+                self.is_raw_connection_usable, self.close_raw_connection)
+        self.connection_metrics.connects += 1
+        self.connection_metrics.wait_seconds += wait
+        self.connection_metrics.connect_seconds += time.monotonic() - start - wait
+        return connection
+
+    def _close(self):
+        pool = get_pool(self.alias, self.settings_dict)
+        if pool is None or self.connection is None:
+            return super()._close()
+        # A connection closed in a transaction, or one whose autocommit was
+        # left off, is rolled back before another thread gets it.
+        reusable = True
+        if self.in_atomic_block or not self.autocommit:
+            try:
+                self.connection.rollback()
+            except Exception:
+                reusable = False
+        pool.checkin(self.connection, self.close_raw_connection, reusable=reusable)
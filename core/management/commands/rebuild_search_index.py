@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Article
+from core.search import index_articles
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the search index of all articles (or articles of the given authors).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--author', action='append', dest='authors', default=[],
+                            help='Username of the author whose articles are indexed. '
+                                 'Can be passed several times.')
+
+    def handle(self, *args, **options):
+        articles = Article.objects.select_related('category')
+        if options['authors']:
+            articles = articles.filter(author__username__in=options['authors'])
+        count = index_articles(articles.iterator(chunk_size=500))
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} articles.'))
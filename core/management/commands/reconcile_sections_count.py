@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+
+from core.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Finds articles whose stored number of sections drifted from the actual one and fixes them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report drifted articles.')
+
+    def handle(self, *args, **options):
+        drifted_ids = list(Article.objects.
+                           annotate(actual_sections_count=Count('sections')).
+                           exclude(sections_count=F('actual_sections_count')).
+                           values_list('id', flat=True))
+        for article_id in drifted_ids:
+            self.stdout.write(f'Drifted: {article_id}')
+        if options['dry_run']:
+            self.stdout.write(f'{len(drifted_ids)} drifted articles found.')
+            return
+        if drifted_ids:
+            Article.objects.refresh_sections_count(drifted_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Fixed {len(drifted_ids)} drifted articles.'))
@@ -0,0 +1,62 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.models import Section
+from core.rendering import get_content_hash, render
+from core.signals import sections_rendered
+
+
+class Command(BaseCommand):
+    help = 'Renders the content of sections whose HTML is missing or was made by an older renderer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                            help='Number of worker processes, 1 renders in this process.')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of sections rendered and written at once.')
+        parser.add_argument('--all', action='store_true',
+                            help='Render every section, even up to date ones.')
+
+    def handle(self, *args, **options):
+        # Sections are read and written by this process a batch at a time,
+        # workers only get the content and return the rendering, so they
+        # never touch the database.
+        sections = Section.objects.\
+            only('id', 'article_id', 'content', 'content_hash').\
+            order_by('id')
+        executor = ProcessPoolExecutor(options['processes']) if options['processes'] > 1 else None
+        checked = rendered = 0
+        last_id = 0
+        try:
+            while True:
+                batch = list(sections.filter(id__gt=last_id)[:options['batch_size']])
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                checked += len(batch)
+                rendered += self.render_batch(
+                    [section for section in batch
+                     if options['all'] or section.content_hash != get_content_hash(section.content)],
+                    executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} of {checked} sections.'))
+
+    def render_batch(self, batch: list[Section], executor) -> int:
+        if not batch:
+            return 0
+        contents = [section.content for section in batch]
+        if executor is None:
+            results = map(render, contents)
+        else:
+            results = executor.map(render, contents, chunksize=max(len(batch) // 32, 1))
+        for section, result in zip(batch, results):
+            section.content_hash, section.content_html, section.reading_time = result
+        Section.objects.bulk_update(batch, ['content_hash', 'content_html', 'reading_time'])
+        sections_rendered.send(sender=Section,
+                               article_ids={section.article_id for section in batch})
+        return len(batch)
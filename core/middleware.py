@@ -0,0 +1,132 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from core.db.pool import get_pool
+from core.routers import PIN_COOKIE_NAME
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    # Counts the queries of every request and the time spent in them, logs
+    # them and reports them in the Server-Timing header. GET requests to URL
+    # names listed in settings.QUERY_BUDGETS that run more queries than
+    # allowed are logged as warnings, or raise QueryBudgetExceeded when
+    # settings.QUERY_BUDGET_STRICT is on (development and tests). Under ASGI
+    # process_request and process_response run on the thread the queries of
+    # the request run on, so queries of async views are counted too.
+
+    def process_request(self, request: HttpRequest):
+        counter = QueryCounter()
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        request._query_budget = (counter, stack, time.perf_counter())
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        counter, stack, start = request._query_budget
+        stack.close()
+        duration = time.perf_counter() - start
+
+        response.query_count = counter.count
+        timings = [f'db;dur={counter.duration * 1000:.1f};desc="{counter.count} queries"',
+                   f'total;dur={duration * 1000:.1f}']
+        if response.has_header('Server-Timing'):
+            timings.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(timings)
+
+        url_name = request.resolver_match.view_name if request.resolver_match else None
+        logger.info('%s %s (%s): %d queries in %.1f ms',
+                    request.method, request.path, url_name,
+                    counter.count, counter.duration * 1000)
+        budget = None
+        if request.method in ('GET', 'HEAD'):
+            budget = getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+        if budget is not None and counter.count > budget:
+            message = f'{url_name} ran {counter.count} queries, ' \
+                      f'its budget is {budget}.'
+            if getattr(settings, 'QUERY_BUDGET_STRICT', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
+
+
+class PinPrimaryMiddleware(MiddlewareMixin):
+    # After a request that may have written, reads of the client go to the
+    # primary for settings.REPLICA_PIN_SECONDS, so it sees its own writes
+    # (for example on the page a POST redirects to) despite replication lag.
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and \
+                getattr(settings, 'DATABASE_REPLICAS', []):
+            response.set_cookie(PIN_COOKIE_NAME, '1',
+                                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 10),
+                                httponly=True, samesite='Lax')
+        return response
+
+
+class ConnectionMetricsMiddleware(MiddlewareMixin):
+    # Reports the time the request spent opening database connections and
+    # waiting for a pooled one in the Server-Timing header, for backends
+    # built on core.db.pool. Requests that waited for a connection of a pool
+    # saturated beyond settings.DB_POOL_SATURATION_WARNING log a warning.
+
+    def get_wrappers(self) -> list:
+        return [connections[alias] for alias in connections
+                if hasattr(connections[alias], 'connection_metrics')]
+
+    def process_request(self, request: HttpRequest):
+        for wrapper in self.get_wrappers():
+            wrapper.connection_metrics.reset()
+
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        wrappers = self.get_wrappers()
+        if not wrappers:
+            return response
+
+        connects = sum(wrapper.connection_metrics.connects for wrapper in wrappers)
+        connect_seconds = sum(wrapper.connection_metrics.connect_seconds for wrapper in wrappers)
+        timings = [f'connect;dur={connect_seconds * 1000:.1f};desc="{connects} connections"']
+        for wrapper in wrappers:
+            pool = get_pool(wrapper.alias, wrapper.settings_dict)
+            if pool is None:
+                continue
+            stats = pool.get_stats()
+            timings.append(f'pool-wait;dur={wrapper.connection_metrics.wait_seconds * 1000:.1f};'
+                           f'desc="{wrapper.alias} {stats.in_use}/{stats.size} in use"')
+            if wrapper.connection_metrics.wait_seconds and \
+                    stats.saturation >= getattr(settings, 'DB_POOL_SATURATION_WARNING', 0.9):
+                logger.warning('Connection pool of %s is saturated: %d of %d connections in use, '
+                               '%d checkouts waited (%.1f ms at most), %d timed out.',
+                               wrapper.alias, stats.in_use, stats.size, stats.waits,
+                               stats.max_wait_seconds * 1000, stats.timeouts)
+        if response.has_header('Server-Timing'):
+            timings.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(timings)
+        return response
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:50
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def count_sections(apps, schema_editor):
+    Article = apps.get_model('core', 'Article')
+    Section = apps.get_model('core', 'Section')
+    sections_count = Section.objects.\
+        filter(article=models.OuterRef('pk')).\
+        order_by().values('article').\
+        annotate(count=models.Count('pk')).values('count')
+    Article.objects.update(sections_count=Coalesce(
+        models.Subquery(sections_count), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_searchtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='sections_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_sections, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', 'sections_count'], name='core_article_author_sections'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+def deduplicate_section_slugs(apps, schema_editor):
+    # Different titles of one article may be slugified to the same slug,
+    # such sections get their id appended so that (article, slug) can be
+    # made unique.
+    Section = apps.get_model('core', 'Section')
+    duplicates = Section.objects.\
+        values('article', 'slug').\
+        annotate(count=models.Count('id'), first_id=models.Min('id')).\
+        filter(count__gt=1)
+    for duplicate in duplicates:
+        sections = Section.objects.\
+            filter(article=duplicate['article'], slug=duplicate['slug']).\
+            exclude(id=duplicate['first_id'])
+        for section in sections:
+            section.slug = f'{section.slug}-{section.id}'
+            section.save(update_fields=['slug'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_article_sections_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_section_slugs, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='section',
+            unique_together={('article', 'title'), ('article', 'number'), ('article', 'slug')},
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', '-published'], name='core_article_author_published'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['author', 'is_ready'], name='core_article_author_ready'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['category', 'is_ready', '-published'], name='core_article_category_ready'),
+        ),
+    ]
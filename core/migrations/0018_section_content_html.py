@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+from core.rendering import render
+
+
+def render_sections(apps, schema_editor):
+    Section = apps.get_model('core', 'Section')
+    batch = []
+    for section in Section.objects.only('id', 'content').iterator(chunk_size=500):
+        section.content_hash, section.content_html, section.reading_time = render(section.content)
+        batch.append(section)
+        if len(batch) == 500:
+            Section.objects.bulk_update(batch, ['content_hash', 'content_html', 'reading_time'])
+            batch = []
+    Section.objects.bulk_update(batch, ['content_hash', 'content_html', 'reading_time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_article_section_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='section',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_sections, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:56
+
+from django.db import migrations
+
+
+def set_token_collation(collation=None):
+    # utf8mb4_bin only exists on MySQL, the field itself stays portable and
+    # other databases keep their default, already byte by byte, comparison.
+    # Without a collation the column goes back to the table's default one.
+    def alter_token_column(apps, schema_editor):
+        if schema_editor.connection.vendor != 'mysql':
+            return
+        SearchToken = apps.get_model('core', 'SearchToken')
+        column = 'varchar(64) NOT NULL'
+        if collation:
+            column += f' COLLATE {collation}'
+        schema_editor.execute('ALTER TABLE {} MODIFY {} {}'.format(
+            schema_editor.quote_name(SearchToken._meta.db_table),
+            schema_editor.quote_name('token'), column))
+    return alter_token_column
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_section_content_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_token_collation('utf8mb4_bin'),
+                             set_token_collation()),
+    ]
@@ -1,9 +1,11 @@
 from typing import Iterable, Optional
 import uuid
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.core.validators import MinLengthValidator, MinValueValidator
 from django.template.defaultfilters import slugify
 
+from core.rendering import get_content_hash, render
 from users.models import CustomUser
 
 
@@ -19,15 +21,62 @@ class Category(models.Model):
         return self.title
 
 
+class TagManager(models.Manager):
+
+    def normalize_name(self, name: str) -> str:
+        return '-'.join(name.strip().split(' ')).lower()
+
+    def resolve(self, names: Iterable[str]) -> list['Tag']:
+        # Resolves tag names to Tag objects with a constant number of
+        # queries, no matter how many names are passed: one lookup for
+        # existing tags, one insert for missing ones and one re-fetch.
+        # Conflicting inserts from concurrent requests are ignored thanks
+        # to the unique constraint on name, so the re-fetch sees them too.
+        normalized_names = list(dict.fromkeys(
+            self.normalize_name(name) for name in names))
+        if not normalized_names:
+            return []
+        tags_by_name = {tag.name: tag for tag in
+                        self.filter(name__in=normalized_names)}
+        missing_names = [name for name in normalized_names
+                         if name not in tags_by_name]
+        if missing_names:
+            self.bulk_create([Tag(name=name) for name in missing_names],
+                             ignore_conflicts=True)
+            tags_by_name = {tag.name: tag for tag in
+                            self.filter(name__in=normalized_names)}
+        return [tags_by_name[name] for name in normalized_names
+                if name in tags_by_name]
+
+
 class Tag(models.Model):
     name = models.CharField(max_length=255,
                             unique=True,
                             validators=[MinLengthValidator(2)])
 
+    objects = TagManager()
+
     def __str__(self):
         return self.name
 
 
+class ArticleManager(models.Manager):
+
+    def refresh_sections_count(self, article_ids: Optional[Iterable] = None) -> int:
+        # sections_count is maintained by Section signals, paths that bypass
+        # them (bulk_create, queryset delete of other models, raw SQL) have to
+        # call this for the articles they touched.
+        sections_count = Section.objects.\
+            filter(article=models.OuterRef('pk')).\
+            order_by().values('article').\
+            annotate(count=models.Count('pk')).values('count')
+        articles = self.all()
+        if article_ids is not None:
+            articles = articles.filter(pk__in=list(article_ids))
+        return articles.update(sections_count=Coalesce(
+            models.Subquery(sections_count), 0))
+
+
 class Article(models.Model):
     id = models.UUIDField(
         primary_key=True, default=uuid.uuid4,
@@ -43,10 +92,88 @@ class Article(models.Model):
     updated = models.DateTimeField(auto_now=True)
     is_ready = models.BooleanField(default=False)
     tags = models.ManyToManyField('core.Tag')
+    sections_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ArticleManager()
 
     def __str__(self):
         return str(self.id) + ' ' + self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        article = super().from_db(db, field_names, values)
+        article._saved_indexed_values = article.get_indexed_values()
+        return article
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        self._saved_indexed_values = self.get_indexed_values()
+
+    def get_indexed_values(self) -> tuple:
+        # The fields of the article itself that core.search indexes, tags
+        # are indexed when they change. Deferred fields count as unknown.
+        return (self.__dict__.get('title'), self.__dict__.get('category_id'))
+
+    def has_indexed_changes(self) -> bool:
+        return getattr(self, '_saved_indexed_values', None) != self.get_indexed_values()
+
+    def save(self, *args, **kwargs):
+        # sections_count is only written with F() by the Section signals (and
+        # by refresh_sections_count), saving an article must not write the
+        # possibly outdated count it was loaded with back over it.
+        if not self._state.adding and not args and kwargs.get('update_fields') is None:
+            deferred_fields = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'sections_count'
+                and field.attname not in deferred_fields]
+        super().save(*args, **kwargs)
+        self._saved_indexed_values = self.get_indexed_values()
+
+    def get_publish_violations(self) -> list[str]:
+        # Checks whether the sections are numbered 1, 2, ..., n with one
+        # aggregate query, in constant memory whatever the numbers are.
+        # Returns every violation at once, an empty list means the article
+        # can be set to "Ready".
+        numbers = Section.objects.filter(article=self).aggregate(
+            count=models.Count('id'),
+            distinct_count=models.Count('number', distinct=True),
+            min_number=models.Min('number'),
+            max_number=models.Max('number'))
+        if not numbers['count']:
+            return ['Create at least one section before setting status to "Ready".']
+        violations = []
+        if numbers['min_number'] != 1:
+            violations.append(
+                'Make sure that there is a section with number 1 among sections of this article.')
+        if numbers['distinct_count'] != numbers['count'] or \
+                numbers['max_number'] - numbers['min_number'] + 1 != numbers['count']:
+            violations.append(
+                'Make sure numbers of your sections are consecutive integers.')
+        return violations
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'sections_count'],
+                         name='core_article_author_sections'),
+            models.Index(fields=['author', '-published'],
+                         name='core_article_author_published'),
+            models.Index(fields=['author', 'is_ready'],
+                         name='core_article_author_ready'),
+            models.Index(fields=['category', 'is_ready', '-published'],
+                         name='core_article_category_ready'),
+        ]
+
+
+class SectionManager(models.Manager):
+    # Fields needed to list sections. content is left out, it is by far
+    # the largest column and lists never show it.
+    outline_fields = ('id', 'article', 'number', 'title', 'slug', 'reading_time',
+                      'published', 'updated')
+
+    def outline(self) -> models.QuerySet:
+        return self.only(*self.outline_fields).order_by('number')
+
 
 class Section(models.Model):
     title = models.CharField(max_length=255,
@@ -55,6 +182,10 @@ class Section(models.Model):
     number = models.SmallIntegerField(
         validators=[MinValueValidator(1)], default=1, null=False)
     content = models.TextField()
+    # Rendered from content, content_hash tells whether it is up to date.
+    content_html = models.TextField(blank=True, default='', editable=False)
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
     slug = models.CharField(max_length=300,
                             null=False)
     article = models.ForeignKey(
@@ -63,9 +194,38 @@ class Section(models.Model):
     published = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
+    objects = SectionManager()
+
+    def render_content(self) -> bool:
+        # Returns whether the content had to be rendered.
+        if self.content_hash == get_content_hash(self.content):
+            return False
+        self.content_hash, self.content_html, self.reading_time = render(self.content)
+        return True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        section = super().from_db(db, field_names, values)
+        # The title the stored slug was made from, see save().
+        section._saved_title = section.__dict__.get('title')
+        return section
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None or 'title' in fields:
+            self._saved_title = self.title
+
+    def rebuilds_slug(self) -> bool:
+        # The slug is kept while the title stays the same, slugs made unique
+        # by migration 0017 would otherwise clash again.
+        return self._state.adding or self.title != getattr(self, '_saved_title', None)
+
     def save(self, *args, **kwargs):
-        self.slug = slugify(self.title)
+        if self.rebuilds_slug():
+            self.slug = slugify(self.title)
+        self.render_content()
         super(Section, self).save(*args, **kwargs)
+        self._saved_title = self.title
 
     def __str__(self):
         return self.title
@@ -73,5 +233,34 @@ class Section(models.Model):
     class Meta:
         unique_together = (
             ('article', 'number'),
-            ('article', 'title')
+            ('article', 'title'),
+            ('article', 'slug')
+        )
+
+
+class SearchToken(models.Model):
+    # Inverted index used by core.search: one row per distinct token of an
+    # article with its weight. author is denormalized from the article so
+    # that lookups are a range scan over (author, token) regardless of how
+    # many articles the author owns. token is compared byte by byte,
+    # migration 0019 gives it a binary collation on MySQL, whose default
+    # collation would take "cafe" and "café" for one token and keep prefix
+    # lookups (LIKE BINARY) from using the index.
+    author = models.ForeignKey('users.CustomUser', on_delete=models.CASCADE,
+                               related_name='+')
+    article = models.ForeignKey('core.Article', on_delete=models.CASCADE,
+                                related_name='search_tokens')
+    token = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.token
+
+    class Meta:
+        unique_together = (
+            ('article', 'token'),
         )
+        indexes = [
+            models.Index(fields=['author', 'token'],
+                         name='core_search_author_token_idx')
+        ]
@@ -0,0 +1,50 @@
+import hashlib
+import math
+
+import markdown
+import nh3
+
+
+# Part of the content hash, bump it whenever the output of render_markdown
+# changes, so that render_sections re-renders every section.
+RENDERER_VERSION = '1'
+WORDS_PER_MINUTE = 200
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables', 'sane_lists', 'toc']
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'dl', 'dt',
+    'em', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol',
+    'p', 'pre', 's', 'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th',
+    'thead', 'tr', 'ul',
+}
+# Heading ids are the anchors added by the toc extension.
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'abbr': {'title'},
+    'img': {'src', 'alt', 'title'},
+    'th': {'align'},
+    'td': {'align'},
+    **{f'h{level}': {'id'} for level in range(1, 7)},
+}
+ALLOWED_URL_SCHEMES = {'http', 'https', 'mailto'}
+
+
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(f'{RENDERER_VERSION}\n{content}'.encode()).hexdigest()
+
+
+def render_markdown(content: str) -> str:
+    html = markdown.markdown(content, extensions=MARKDOWN_EXTENSIONS)
+    return nh3.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES,
+                     url_schemes=ALLOWED_URL_SCHEMES)
+
+
+def get_reading_time(content: str) -> int:
+    # In minutes, rounded up.
+    return math.ceil(len(content.split()) / WORDS_PER_MINUTE)
+
+
+def render(content: str) -> tuple[str, str, int]:
+    # Returns the content hash, the HTML and the reading time. Works on
+    # plain strings only, so it can run in worker processes.
+    return get_content_hash(content), render_markdown(content), get_reading_time(content)
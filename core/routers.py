@@ -0,0 +1,97 @@
+import random
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest
+
+
+# Set by core.middleware.PinPrimaryMiddleware after requests that may have
+# written, while it is present the client reads from the primary.
+PIN_COOKIE_NAME = 'pin_primary'
+# Apps whose reads always go to the primary. A session has to be read back
+# right after it was written, for example after a login.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+# Alias of the replica reads of the current request go to, None while they
+# go to the primary. A context variable, so it works for async views too.
+replica_alias: ContextVar[Optional[str]] = ContextVar('replica_alias', default=None)
+
+
+class ReplicaRouter:
+    # Reads go to the replica chosen by replica_reads, or to the primary
+    # ('default') outside of views that opted in. Writes always go to the
+    # primary, also for objects that were read from a replica.
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        databases = {'default', *getattr(settings, 'DATABASE_REPLICAS', [])}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+def get_replica_alias(request: HttpRequest) -> Optional[str]:
+    replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+    if not replicas or not getattr(settings, 'REPLICA_READS', True) or \
+            request.method not in ('GET', 'HEAD') or PIN_COOKIE_NAME in request.COOKIES:
+        return None
+    return random.choice(replicas)
+
+
+def render_response(response):
+    if hasattr(response, 'render') and not response.is_rendered:
+        response.render()
+    return response
+
+
+def replica_reads(view):
+    # Opts a read-only view in to replica reads. Template responses are
+    # rendered before returning, so that queries of the template go to the
+    # same replica. Async views render on a thread, which sees the replica
+    # of the request.
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request: HttpRequest, *args, **kwargs):
+            alias = get_replica_alias(request)
+            if alias is None:
+                return await view(request, *args, **kwargs)
+            token = replica_alias.set(alias)
+            try:
+                response = await view(request, *args, **kwargs)
+                return await sync_to_async(render_response)(response)
+            finally:
+                replica_alias.reset(token)
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        alias = get_replica_alias(request)
+        if alias is None:
+            return view(request, *args, **kwargs)
+        token = replica_alias.set(alias)
+        try:
+            return render_response(view(request, *args, **kwargs))
+        finally:
+            replica_alias.reset(token)
+
+    return wrapper
+
+
+class ReplicaReadsMixin:
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return replica_reads(super().as_view(**initkwargs))
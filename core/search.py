@@ -0,0 +1,137 @@
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from django.db.models import Case, IntegerField, Max, Q, Sum, When
+from django.db.models.query import QuerySet
+
+from core.models import Article, SearchToken, Section
+from users.models import CustomUser
+
+
+TOKEN_PATTERN = re.compile(r'\w+')
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = SearchToken._meta.get_field('token').max_length
+
+FIELD_WEIGHTS = {
+    'title': 8,
+    'tags': 4,
+    'category': 2,
+    'content': 1,
+}
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if len(token) < MIN_TOKEN_LENGTH:
+            continue
+        tokens.append(token[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def count_token_weights(title: str, category_title: str,
+                        tag_names: Iterable[str], contents: Iterable[str]) -> Counter:
+    weights = Counter()
+
+    def add(text: str, field: str):
+        for token in tokenize(text):
+            weights[token] += FIELD_WEIGHTS[field]
+
+    add(title, 'title')
+    add(category_title, 'category')
+    for tag_name in tag_names:
+        add(tag_name, 'tags')
+    for content in contents:
+        add(content, 'content')
+    return weights
+
+
+def get_article_token_weights(article: Article) -> Counter:
+    contents = Section.objects.filter(article=article).\
+        values_list('content', flat=True).iterator()
+    return count_token_weights(article.title, article.category.title,
+                               article.tags.values_list('name', flat=True),
+                               contents)
+
+
+def index_article(article: Article):
+    weights = get_article_token_weights(article)
+    SearchToken.objects.filter(article=article).delete()
+    SearchToken.objects.bulk_create([
+        SearchToken(author_id=article.author_id, article=article,
+                    token=token, weight=weight)
+        for token, weight in weights.items()
+    ])
+
+
+def index_articles(articles: Iterable[Article]) -> int:
+    count = 0
+    for article in articles:
+        index_article(article)
+        count += 1
+    return count
+
+
+def get_ranks(author: CustomUser, query_tokens: list[str]) -> QuerySet:
+    # Every token of the query has to prefix-match a token of an article,
+    # articles are ranked by the summed weight of the matching tokens.
+    token_filter = Q()
+    matched_tokens = []
+    for token in query_tokens:
+        token_filter |= Q(token__startswith=token)
+        matched_tokens.append(Max(Case(When(token__startswith=token, then=1),
+                                       default=0,
+                                       output_field=IntegerField())))
+    return SearchToken.objects.\
+        filter(author=author).filter(token_filter).\
+        values('article').\
+        annotate(rank=Sum('weight'),
+                 matched=sum(matched_tokens[1:], matched_tokens[0])).\
+        filter(matched=len(query_tokens))
+
+
+def get_ranked_articles(author: CustomUser, rank_by_article: dict) -> QuerySet[Article]:
+    return Article.objects.\
+        filter(id__in=rank_by_article.keys(), author=author).\
+        select_related('category').\
+        order_by('-published')
+
+
+def sort_by_rank(articles: Iterable[Article], rank_by_article: dict) -> list[Article]:
+    return sorted(articles, key=lambda article: rank_by_article[article.id],
+                  reverse=True)
+
+
+def search_articles(author: CustomUser, query: str) -> list[Article]:
+    query_tokens = list(dict.fromkeys(tokenize(query)))
+    if not query_tokens:
+        return []
+    rank_by_article = {row['article']: row['rank']
+                       for row in get_ranks(author, query_tokens)}
+    if not rank_by_article:
+        return []
+    return sort_by_rank(get_ranked_articles(author, rank_by_article), rank_by_article)
+
+
+async def asearch_articles(author: CustomUser, query: str,
+                           articles_by_id: Optional[dict] = None) -> list:
+    # Found articles are taken from articles_by_id (every article of the
+    # author by id, like private.cache's article index) when given, instead
+    # of being queried.
+    query_tokens = list(dict.fromkeys(tokenize(query)))
+    if not query_tokens:
+        return []
+    rank_by_article = {row['article']: row['rank']
+                       async for row in get_ranks(author, query_tokens)}
+    if not rank_by_article:
+        return []
+    if articles_by_id is None:
+        articles = [article async for article in get_ranked_articles(author, rank_by_article)]
+    else:
+        # In the order of get_ranked_articles, newest first.
+        articles = sorted((articles_by_id[article_id] for article_id in rank_by_article
+                           if article_id in articles_by_id),
+                          key=lambda article: (article.published is not None, article.published),
+                          reverse=True)
+    return sort_by_rank(articles, rank_by_article)
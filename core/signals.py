@@ -0,0 +1,81 @@
+from django.db.models import Case, F, When
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from core.models import Article, Category, Section
+from core.search import index_article
+
+
+# Sent by render_sections with the ids of articles whose sections got new
+# HTML without being saved one by one.
+sections_rendered = Signal()
+
+
+@receiver(post_save, sender=Article)
+def index_saved_article(sender, instance: Article, created=False, raw=False, **kwargs):
+    # Saves that leave the title and the category as they were, like status
+    # changes, don't change the tokens of the article.
+    if raw or not (created or instance.has_indexed_changes()):
+        return
+    index_article(instance)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def index_article_with_changed_tags(sender, instance, action, reverse, **kwargs):
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    index_article(instance)
+
+
+def is_deleted_with_article(origin) -> bool:
+    # Sections are also deleted when their article (or its author) is
+    # deleted, the article doesn't need to be kept up to date in that case.
+    return not (isinstance(origin, Section) or
+                getattr(origin, 'model', None) is Section)
+
+
+@receiver(post_save, sender=Section)
+def update_article_of_saved_section(sender, instance: Section, created=False, raw=False, **kwargs):
+    # Article.updated also changes with the sections of the article, cached
+    # template fragments of the article are keyed on it.
+    if raw:
+        return
+    changes = {'updated': timezone.now()}
+    if created:
+        changes['sections_count'] = F('sections_count') + 1
+    Article.objects.filter(pk=instance.article_id).update(**changes)
+
+
+@receiver(post_delete, sender=Section)
+def update_article_of_deleted_section(sender, instance: Section, origin=None, **kwargs):
+    if is_deleted_with_article(origin):
+        return
+    # Never below zero, even if the counter drifted.
+    Article.objects.filter(pk=instance.article_id).update(
+        sections_count=Case(When(sections_count__gt=0, then=F('sections_count') - 1),
+                            default=0),
+        updated=timezone.now())
+
+
+@receiver(post_save, sender=Section)
+def index_article_of_saved_section(sender, instance: Section, raw=False, **kwargs):
+    if raw:
+        return
+    index_article(instance.article)
+
+
+@receiver(post_delete, sender=Section)
+def index_article_of_deleted_section(sender, instance: Section, origin=None, **kwargs):
+    if is_deleted_with_article(origin):
+        return
+    index_article(instance.article)
+
+
+@receiver(post_save, sender=Category)
+def index_articles_of_saved_category(sender, instance: Category, created=False,
+                                     raw=False, **kwargs):
+    if raw or created:
+        return
+    for article in instance.articles.select_related('category').iterator():
+        index_article(article)
@@ -0,0 +1,92 @@
+import re
+from contextlib import contextmanager
+from typing import Iterable
+
+from django.db import connection, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+# SCAN [TABLE] <table> without USING [COVERING] INDEX. The name is matched
+# whole, a shorter prefix of it (or TABLE) would pass the lookahead.
+SQLITE_SCAN_PATTERN = re.compile(
+    r'^SCAN (?:TABLE )?(?!TABLE )(\w+)\b(?! USING (?:COVERING )?INDEX)')
+
+
+class QueryRecorder:
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def get_sqlite_full_scans(details: Iterable[str]) -> list[str]:
+    # Tables scanned without an index, from the detail column of an
+    # EXPLAIN QUERY PLAN.
+    return [match.group(1) for match in
+            map(SQLITE_SCAN_PATTERN.match, details) if match]
+
+
+def get_full_scans(sql: str, params) -> list[str]:
+    # Returns the tables the database reads in full to execute the query.
+    # Only SQLite and MySQL plans are understood.
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return get_sqlite_full_scans(row[-1] for row in cursor.fetchall())
+        if connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return [row['table'] for row in rows if row['type'] == 'ALL']
+    raise NotImplementedError(
+        f'Query plans of {connection.vendor} are not supported.')
+
+
+class ExplainQueriesMixin:
+    # TestCase mixin that runs EXPLAIN for every SELECT executed inside the
+    # assertNoFullScans() block and fails if any of them reads a whole table,
+    # apart from allowed_tables (e.g. categories, which forms list in full).
+
+    @contextmanager
+    def assertNoFullScans(self, allowed_tables: Iterable[str] = ()):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            yield recorder
+        failures = []
+        for sql, params in recorder.queries:
+            tables = [table for table in get_full_scans(sql, params)
+                      if table not in allowed_tables]
+            if tables:
+                failures.append(f'{", ".join(tables)}: {sql}')
+        if failures:
+            self.fail('Queries reading whole tables:\n' + '\n'.join(failures))
+
+
+# A test mirror of the primary added by TestRunner, a second connection to
+# the primary's test database that tests of replica reads use as replica.
+# It only sees committed data.
+REPLICA_MIRROR_ALIAS = 'replica_test'
+
+
+class TestRunner(DiscoverRunner):
+    # Views read from the primary in tests, even with DATABASE_REPLICAS set:
+    # the test databases of replicas are separate and empty. Tests of
+    # replica reads switch REPLICA_READS back on.
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.replica_reads_off = override_settings(REPLICA_READS=False)
+        self.replica_reads_off.enable()
+        primary = connections['default'].settings_dict
+        connections.settings[REPLICA_MIRROR_ALIAS] = {
+            **primary, 'TEST': {**primary['TEST'], 'MIRROR': 'default'}}
+
+    def teardown_test_environment(self, **kwargs):
+        del connections.settings[REPLICA_MIRROR_ALIAS]
+        self.replica_reads_off.disable()
+        super().teardown_test_environment(**kwargs)
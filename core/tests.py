@@ -1,3 +1,501 @@
-from django.test import TestCase
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.db.backends.sqlite3 import base as sqlite_base
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.db.pool import ConnectionPool, PooledDatabaseWrapperMixin, pools
+from core.middleware import QueryBudgetExceeded
+from core.models import Article, Category, SearchToken, Section, Tag
+from core.rendering import get_content_hash, render
+from core.routers import PIN_COOKIE_NAME, ReplicaRouter, replica_alias
+from core.search import search_articles, tokenize
+from core.testing import REPLICA_MIRROR_ALIAS, get_sqlite_full_scans
+from users.models import CustomUser
+
+
+class TagResolveTest(TestCase):
+
+    def test_resolve_normalizes_and_deduplicates_names(self):
+        tags = Tag.objects.resolve(['Python', ' python ', 'Web Development'])
+        self.assertEqual([tag.name for tag in tags],
+                         ['python', 'web-development'])
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_resolve_reuses_existing_tags(self):
+        existing_tag = Tag.objects.create(name='django')
+        tags = Tag.objects.resolve(['django', 'orm'])
+        self.assertEqual(tags[0], existing_tag)
+        self.assertEqual(Tag.objects.count(), 2)
+
+    def test_resolve_empty_names_does_not_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(Tag.objects.resolve([]), [])
+
+    def test_query_count_does_not_grow_with_number_of_tags(self):
+        query_counts = []
+        for tag_count in (1, 10, 40):
+            names = [f'tag-{tag_count}-{i}' for i in range(tag_count)]
+            with CaptureQueriesContext(connection) as queries:
+                tags = Tag.objects.resolve(names)
+            self.assertEqual(len(tags), tag_count)
+            query_counts.append(len(queries))
+        self.assertEqual(len(set(query_counts)), 1)
+        with self.assertNumQueries(1):
+            Tag.objects.resolve([f'tag-40-{i}' for i in range(40)])
+
+
+class SearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.other_user = CustomUser.objects.create_user(
+            username='other_user',
+            email='other_user@gmail.com',
+            password='34somepassword34')
+        cls.chemistry = Category.objects.create(title='Chemistry')
+        cls.biology = Category.objects.create(title='Biology')
+
+    def create_article(self, title, category, author=None, tags=()):
+        article = Article.objects.create(title=title, category=category,
+                                         author=author or self.user)
+        article.tags.set(Tag.objects.resolve(tags))
+        return article
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Ionic compounds' role, a web-development!"),
+                         ['ionic', 'compounds', 'role', 'web', 'development'])
+
+    def test_search_by_title_category_tags_and_content(self):
+        by_title = self.create_article('Ionic compounds', self.biology)
+        by_category = self.create_article('Acids and bases', self.chemistry)
+        by_tag = self.create_article('Photosynthesis', self.biology,
+                                     tags=['chemistry-basics'])
+        by_content = self.create_article('Cells overview', self.biology)
+        Section.objects.create(article=by_content, title='Introduction',
+                               number=1, content='Basic chemistry of a cell.')
+        self.create_article('Unrelated article', self.biology)
+        found = search_articles(self.user, 'chem')
+        self.assertEqual(set(found), {by_category, by_tag, by_content})
+        self.assertEqual(search_articles(self.user, 'ionic'), [by_title])
+
+    def test_results_are_ranked_and_all_query_tokens_must_match(self):
+        in_content = self.create_article('Cells overview', self.biology)
+        Section.objects.create(article=in_content, title='Introduction',
+                               number=1, content='Cell membranes.')
+        in_title = self.create_article('Cell membranes', self.biology)
+        self.assertEqual(search_articles(self.user, 'cell membrane'),
+                         [in_title, in_content])
+        self.assertEqual(search_articles(self.user, 'cell nucleus'), [])
+
+    def test_tokens_differing_in_accents_are_distinct(self):
+        article = self.create_article('Café or cafe, Straße or strasse', self.chemistry)
+        self.assertEqual(
+            sorted(SearchToken.objects.filter(article=article).values_list('token', flat=True)),
+            sorted(['café', 'cafe', 'or', 'straße', 'strasse', 'chemistry']))
+        self.assertEqual(search_articles(self.user, 'café'), [article])
+
+    def test_article_is_reindexed_only_when_indexed_fields_change(self):
+        article = self.create_article('Ionic compounds', self.chemistry)
+        Section.objects.create(article=article, title='Introduction',
+                               number=1, content='Electrons.')
+        article = Article.objects.get(pk=article.pk)
+        with mock.patch('core.signals.index_article') as index_article:
+            article.is_ready = True
+            article.save()
+            index_article.assert_not_called()
+            article.title = 'Ionic bonds'
+            article.save()
+            index_article.assert_called_once_with(article)
+            article.save()
+            index_article.assert_called_once()
+        article.category = self.biology
+        article.save()
+        self.assertEqual(search_articles(self.user, 'biology bonds'), [article])
+
+    def test_search_returns_only_articles_of_author(self):
+        self.create_article('Ionic compounds', self.chemistry,
+                            author=self.other_user)
+        self.assertEqual(search_articles(self.user, 'ionic'), [])
+
+    def test_index_follows_changes(self):
+        article = self.create_article('Ionic compounds', self.chemistry)
+        section = Section.objects.create(article=article, title='Introduction',
+                                         number=1, content='Electrons.')
+        self.assertEqual(search_articles(self.user, 'electrons'), [article])
+        section.delete()
+        self.assertEqual(search_articles(self.user, 'electrons'), [])
+        article.tags.set(Tag.objects.resolve(['salts']))
+        self.assertEqual(search_articles(self.user, 'salts'), [article])
+        self.chemistry.title = 'Inorganic chemistry'
+        self.chemistry.save()
+        self.assertEqual(search_articles(self.user, 'inorganic'), [article])
+        article.delete()
+        self.assertFalse(SearchToken.objects.exists())
+
+
+class SectionsCountTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.category = Category.objects.create(title='Chemistry')
+
+    def setUp(self) -> None:
+        self.article = Article.objects.create(title='Ionic compounds',
+                                              category=self.category,
+                                              author=self.user)
+
+    def create_section(self, number):
+        return Section.objects.create(article=self.article, number=number,
+                                      title=f'Section number {number}',
+                                      content='Content')
+
+    def test_count_follows_section_changes(self):
+        first_section = self.create_section(1)
+        second_section = self.create_section(2)
+        first_section.content = 'Updated content'
+        first_section.save()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.sections_count, 2)
+        second_section.delete()
+        Section.objects.filter(pk=first_section.pk).delete()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.sections_count, 0)
+
+    def test_saving_article_keeps_count(self):
+        article = Article.objects.get(pk=self.article.pk)
+        for number in (1, 2, 3):
+            self.create_section(number)
+        article.title = 'Ionic bonds'
+        article.save()
+        self.client.force_login(self.user)
+        self.client.post(reverse('private:set-article-status-through-detail',
+                                 kwargs={'id': article.id}))
+        article.refresh_from_db()
+        self.assertEqual(article.title, 'Ionic bonds')
+        self.assertTrue(article.is_ready)
+        self.assertEqual(article.sections_count, 3)
+
+    def test_refresh_after_bulk_create(self):
+        Section.objects.bulk_create([
+            Section(article=self.article, number=number, title=f'Section number {number}',
+                    content='Content', slug=f'section-number-{number}')
+            for number in range(1, 4)
+        ])
+        Article.objects.refresh_sections_count([self.article.id])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.sections_count, 3)
+
+    def test_reconcile_command_fixes_drift(self):
+        self.create_section(1)
+        Article.objects.filter(pk=self.article.pk).update(sections_count=7)
+        out = StringIO()
+        call_command('reconcile_sections_count', '--dry-run', stdout=out)
+        self.assertIn('1 drifted articles found.', out.getvalue())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.sections_count, 7)
+        call_command('reconcile_sections_count', stdout=StringIO())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.sections_count, 1)
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test_queries_are_reported_in_server_timing(self):
+        response = self.client.get(reverse('private:private-page'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.query_count, 2)
+        self.assertIn('desc="2 queries"', response['Server-Timing'])
+
+    @override_settings(QUERY_BUDGETS={'private:private-page': 1},
+                       QUERY_BUDGET_STRICT=True)
+    def test_exceeded_budget_raises_in_strict_mode(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded,
+                                      'private:private-page ran 2 queries, its budget is 1.'):
+            self.client.get(reverse('private:private-page'))
+
+    @override_settings(QUERY_BUDGETS={'private:private-page': 1},
+                       QUERY_BUDGET_STRICT=False)
+    def test_exceeded_budget_is_logged_otherwise(self):
+        with self.assertLogs('core.middleware', level='WARNING') as logs:
+            response = self.client.get(reverse('private:private-page'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('its budget is 1', logs.output[0])
+
+
+class QueryPlanTest(SimpleTestCase):
+
+    def test_only_scans_without_index_are_full_scans(self):
+        self.assertEqual(get_sqlite_full_scans([
+            'SCAN core_article',
+            'SCAN TABLE core_category',
+            'SCAN core_section USING INDEX core_section_article_id_number_uniq',
+            'SCAN TABLE core_tag USING COVERING INDEX sqlite_autoindex_core_tag_1',
+            'SCAN core_searchtoken USING COVERING INDEX core_search_author_token_idx',
+            'SEARCH core_article USING INDEX core_article_author_ready (author_id=?)',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]), ['core_article', 'core_category'])
+
+
+class SectionRenderingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+
+    def create_section(self, content: str, number: int = 1) -> Section:
+        return Section.objects.create(article=self.article, number=number,
+                                      title=f'Section number {number}', content=content)
+
+    def test_content_is_rendered_to_sanitised_html_with_anchors(self):
+        section = self.create_section('## Ionic bonds\n\n'
+                                      'Ions *attract* each other. <script>alert(1)</script>\n\n'
+                                      '[Link](javascript:alert(1)) [Docs](https://example.com)')
+        self.assertIn('<h2 id="ionic-bonds">Ionic bonds</h2>', section.content_html)
+        self.assertIn('<em>attract</em>', section.content_html)
+        self.assertNotIn('script', section.content_html)
+        self.assertNotIn('javascript', section.content_html)
+        self.assertIn('href="https://example.com"', section.content_html)
+        self.assertEqual(section.content_hash, get_content_hash(section.content))
+
+    def test_reading_time_is_rounded_up(self):
+        self.assertEqual(self.create_section('word ' * 200).reading_time, 1)
+        self.assertEqual(self.create_section('word ' * 201, number=2).reading_time, 2)
+
+    def test_content_is_rendered_only_when_it_changes(self):
+        section = self.create_section('First content')
+        with mock.patch('core.models.render', wraps=render) as mocked_render:
+            section.title = 'Section with new title'
+            section.save()
+            mocked_render.assert_not_called()
+            section.content = 'Second content'
+            section.save()
+            mocked_render.assert_called_once_with('Second content')
+        self.assertEqual(section.content_html, '<p>Second content</p>')
+
+    def test_command_renders_stale_sections_only(self):
+        self.create_section('First content')
+        Section.objects.bulk_create([
+            Section(article=self.article, number=number, title=f'Section number {number}',
+                    slug=f'section-number-{number}', content=f'Content {number}')
+            for number in (2, 3)
+        ])
+        out = StringIO()
+        call_command('render_sections', processes=2, batch_size=2, stdout=out)
+        self.assertIn('Rendered 2 of 3 sections.', out.getvalue())
+        self.assertEqual(list(Section.objects.order_by('number').values_list('content_html', flat=True)),
+                         ['<p>First content</p>', '<p>Content 2</p>', '<p>Content 3</p>'])
+        with mock.patch('core.rendering.RENDERER_VERSION', 'upgraded'):
+            out = StringIO()
+            call_command('render_sections', processes=1, stdout=out)
+        self.assertIn('Rendered 3 of 3 sections.', out.getvalue())
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRouterTest(TestCase):
+
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        token = replica_alias.set('replica_1')
+        self.addCleanup(replica_alias.reset, token)
+
+    def test_reads_go_to_replica_of_request(self):
+        self.assertEqual(self.router.db_for_read(Article), 'replica_1')
+        replica_alias.set(None)
+        self.assertEqual(self.router.db_for_read(Article), 'default')
+
+    def test_sessions_are_read_from_primary(self):
+        from django.contrib.sessions.models import Session
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    def test_writes_go_to_primary(self):
+        article = Article(title='Ionic compounds')
+        article._state.db = 'replica_1'
+        self.assertEqual(self.router.db_for_write(Article, instance=article), 'default')
+
+
+@override_settings(REPLICA_READS=True, DATABASE_REPLICAS=[REPLICA_MIRROR_ALIAS])
+class ReplicaReadsTest(TransactionTestCase):
+    # The replica mirrors the primary, which makes it see committed data
+    # only, hence a TransactionTestCase. Reads are told apart by the
+    # connection that ran them.
+    databases = {'default', REPLICA_MIRROR_ALIAS}
+
+    def setUp(self) -> None:
+        self.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        self.category = Category.objects.create(title='Chemistry')
+        self.article = Article.objects.create(title='Replicated article',
+                                              category=self.category, author=self.user)
+        self.client.force_login(self.user)
+        self.url = reverse('private:article-list')
+
+    def get(self, url: str):
+        with CaptureQueriesContext(connections[REPLICA_MIRROR_ALIAS]) as replica_queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(replica_queries)
+
+    def test_opted_in_view_reads_from_replica(self):
+        response, replica_queries = self.get(self.url)
+        self.assertGreater(replica_queries, 0)
+        self.assertContains(response, 'Replicated article')
+
+    def test_client_reads_its_own_writes_after_post(self):
+        response = self.client.post(reverse('private:post-article'),
+                                    data={'title': 'Written article',
+                                          'category': self.category.id,
+                                          'tags_string': ''})
+        self.assertIn(PIN_COOKIE_NAME, response.cookies)
+        response, replica_queries = self.get(self.url)
+        self.assertEqual(replica_queries, 0)
+        self.assertContains(response, 'Written article')
+
+    def test_other_views_read_from_primary(self):
+        _, replica_queries = self.get(reverse('private:update-article-through-list',
+                                              kwargs={'id': self.article.id}))
+        self.assertEqual(replica_queries, 0)
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.usable = True
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(TestCase):
+
+    def setUp(self) -> None:
+        self.pool = ConnectionPool(size=2, timeout=0.05)
+
+    def checkout(self) -> FakeConnection:
+        connection, _ = self.pool.checkout(FakeConnection,
+                                           is_usable=lambda connection: connection.usable,
+                                           close=FakeConnection.close)
+        return connection
+
+    def checkin(self, connection: FakeConnection, reusable: bool = True):
+        self.pool.checkin(connection, close=FakeConnection.close, reusable=reusable)
+
+    def test_checked_in_connection_is_reused(self):
+        connection = self.checkout()
+        self.checkin(connection)
+        self.assertIs(self.checkout(), connection)
+        stats = self.pool.get_stats()
+        self.assertEqual((stats.connects, stats.checkouts, stats.in_use), (1, 2, 1))
+
+    def test_checkout_waits_for_checkin_when_pool_is_saturated(self):
+        first, second = self.checkout(), self.checkout()
+        self.assertEqual(self.pool.get_stats().saturation, 1.0)
+        timer = threading.Timer(0.01, self.checkin, args=[first])
+        timer.start()
+        self.assertIs(self.checkout(), first)
+        timer.join()
+        stats = self.pool.get_stats()
+        self.assertEqual(stats.waits, 1)
+        self.assertGreater(stats.max_wait_seconds, 0)
+        self.checkin(second)
+
+    def test_checkout_times_out(self):
+        self.checkout()
+        self.checkout()
+        with self.assertRaises(OperationalError):
+            self.checkout()
+        self.assertEqual(self.pool.get_stats().timeouts, 1)
+
+    def test_connection_failing_health_check_is_replaced(self):
+        connection = self.checkout()
+        self.checkin(connection)
+        connection.usable = False
+        self.assertIsNot(self.checkout(), connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.get_stats().discarded, 1)
+
+    def test_connection_that_is_not_reusable_is_closed(self):
+        connection = self.checkout()
+        self.checkin(connection, reusable=False)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.get_stats().in_use, 0)
+
+
+class PooledSQLiteWrapper(PooledDatabaseWrapperMixin, sqlite_base.DatabaseWrapper):
+
+    def is_raw_connection_usable(self, connection) -> bool:
+        connection.execute('SELECT 1')
+        return True
+
+
+class PooledDatabaseWrapperTest(TestCase):
+
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(pools.pop, 'pooled', None)
+        settings_dict = {**connection.settings_dict, 'NAME': f'{directory.name}/pooled.sqlite3',
+                         'CONN_MAX_AGE': 0, 'POOL': {'SIZE': 1}}
+        self.wrapper = PooledSQLiteWrapper(settings_dict, alias='pooled')
+        self.addCleanup(self.close_pool)
+
+    def close_pool(self):
+        pool = pools.get('pooled')
+        for pooled in pool.idle if pool else []:
+            pooled.connection.close()
+
+    def test_closed_connection_goes_back_to_pool(self):
+        self.wrapper.ensure_connection()
+        raw_connection = self.wrapper.connection
+        self.wrapper.close()
+        self.assertIsNone(self.wrapper.connection)
+        self.wrapper.ensure_connection()
+        self.assertIs(self.wrapper.connection, raw_connection)
+        self.assertEqual(self.wrapper.connection_metrics.connects, 2)
+        self.wrapper.close()
+        stats = pools['pooled'].get_stats()
+        self.assertEqual((stats.connects, stats.checkouts, stats.idle), (1, 2, 1))
+
+    def test_connection_closed_in_transaction_is_rolled_back(self):
+        self.wrapper.ensure_connection()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE pooled (id integer)')
+        self.wrapper.set_autocommit(False)
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('INSERT INTO pooled VALUES (1)')
+        self.wrapper.close()
+        self.wrapper.ensure_connection()
+        with self.wrapper.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM pooled')
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.wrapper.close()
@@ -0,0 +1,130 @@
+import datetime
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.query import QuerySet
+
+from core.models import Article
+
+
+# Cached instead of the index of an author with more than
+# ARTICLE_INDEX_MAX_ARTICLES articles, whose list is read from the database.
+NOT_INDEXED = 'not-indexed'
+
+
+@dataclass
+class IndexedArticle:
+    # What the article list shows of an article. The list shows these for
+    # articles read from the database as well.
+    id: uuid.UUID
+    title: str
+    category_title: str
+    tag_names: list[str]
+    is_ready: bool
+    sections_count: int
+    published: Optional[datetime.datetime]
+    updated: datetime.datetime
+
+    @classmethod
+    def from_article(cls, article: Article,
+                     tag_names: Optional[list[str]] = None) -> 'IndexedArticle':
+        if tag_names is None:
+            tag_names = [tag.name for tag in article.tags.all()]
+        return cls(id=article.id,
+                   title=article.title,
+                   category_title=article.category.title,
+                   tag_names=tag_names,
+                   is_ready=article.is_ready,
+                   sections_count=article.sections_count,
+                   published=article.published,
+                   updated=article.updated)
+
+
+def get_article_index_cache():
+    # The cache of article indexes, None unless ARTICLE_INDEX_CACHE_ALIAS
+    # names one of CACHES.
+    alias = getattr(settings, 'ARTICLE_INDEX_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def get_new_version() -> int:
+    # Versions start from the time, a version evicted from the cache comes
+    # back greater than any it had before, never as one whose index might
+    # still be cached.
+    return time.time_ns()
+
+
+def get_article_index_version_key(author_id) -> str:
+    return f'private:article-index:{author_id}:version'
+
+
+async def aget_article_index_key(index_cache, author_id) -> str:
+    # Indexes are never updated in place, writes bump the version of the
+    # author's index instead (see invalidate_article_indexes).
+    version_key = get_article_index_version_key(author_id)
+    version = await index_cache.aget(version_key)
+    if version is None:
+        version = get_new_version()
+        if not await index_cache.aadd(version_key, version, timeout=None):
+            version = await index_cache.aget(version_key, version)
+    return f'private:article-index:{author_id}:v{version}'
+
+
+def get_indexed_articles(author_id) -> QuerySet[Article]:
+    return Article.objects.\
+        filter(author_id=author_id).\
+        select_related('category').\
+        prefetch_related('tags')
+
+
+async def aget_article_index(author_id, load: bool = True) -> Optional[dict[uuid.UUID, IndexedArticle]]:
+    # Every article of the author by id, loaded when it is not cached unless
+    # load is off. None when the index is off, not loaded or the author has
+    # too many articles.
+    index_cache = get_article_index_cache()
+    if index_cache is None:
+        return None
+    # The version is read before the articles, an index loaded while a
+    # write commits is stored under the version that write replaces.
+    key = await aget_article_index_key(index_cache, author_id)
+    index = await index_cache.aget(key)
+    if index is None:
+        if not load:
+            return None
+        articles = get_indexed_articles(author_id)
+        max_articles = settings.ARTICLE_INDEX_MAX_ARTICLES
+        if await articles.values('id')[max_articles:max_articles + 1].aexists():
+            index = NOT_INDEXED
+        else:
+            index = {article.id: IndexedArticle.from_article(article)
+                     async for article in articles}
+        await index_cache.aset(key, index, settings.ARTICLE_INDEX_TIMEOUT)
+    return index if index != NOT_INDEXED else None
+
+
+def bump_article_index_versions(author_ids: Iterable):
+    index_cache = get_article_index_cache()
+    if index_cache is None:
+        return
+    for author_id in set(author_ids):
+        version_key = get_article_index_version_key(author_id)
+        try:
+            index_cache.incr(version_key)
+        except ValueError:
+            index_cache.set(version_key, get_new_version(), timeout=None)
+
+
+def invalidate_article_indexes(author_ids: Iterable):
+    # Makes the next read load the indexes of the authors again, once the
+    # current transaction commits, so that neither a rolled back write nor
+    # a read racing the commit leaves a stale index behind. Cached indexes
+    # of older versions expire on their own.
+    if get_article_index_cache() is None:
+        return
+    author_ids = list(author_ids)
+    transaction.on_commit(lambda: bump_article_index_versions(author_ids))
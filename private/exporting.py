@@ -0,0 +1,149 @@
+import json
+import zipfile
+from typing import Iterable, Iterator
+
+from django.db.models import Prefetch, Q
+from django.db.models.query import QuerySet
+from django.template.defaultfilters import slugify
+
+from core.models import Article, Section, Tag
+from users.models import CustomUser
+
+
+# Rows fetched from the database at a time, for articles and for sections.
+DEFAULT_CHUNK_SIZE = 200
+FORMATS = {
+    'jsonl': ('application/x-ndjson', 'articles.jsonl'),
+    'zip': ('application/zip', 'articles.zip'),
+}
+
+
+def iterate_in_batches(queryset: QuerySet, fields: tuple[str, ...], batch_size: int) -> Iterator:
+    # Rows of queryset ordered by fields, which have to be unique together,
+    # read batch_size at a time. Every batch is a query of its own resuming
+    # after the last row of the previous one, like render_sections does.
+    # iterator() would not do, mysqlclient buffers its whole result on the
+    # client.
+    last_values = None
+    while True:
+        batch = queryset.order_by(*fields)
+        if last_values is not None:
+            after = Q()
+            for position, field in enumerate(fields):
+                after |= Q(**dict(zip(fields[:position], last_values)),
+                           **{f'{field}__gt': last_values[position]})
+            batch = batch.filter(after)
+        rows = list(batch[:batch_size])
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_values = [getattr(rows[-1], field) for field in fields]
+
+
+def get_articles_with_sections(author: CustomUser, chunk_size: int = DEFAULT_CHUNK_SIZE) \
+        -> Iterator[tuple[Article, Iterator[Section]]]:
+    # Articles and sections are read in the same order a batch of
+    # chunk_size at a time and merged while streaming. Only a batch of each
+    # is held in memory, whether the author has many articles or articles
+    # have many sections, and the number of queries grows with the number
+    # of batches.
+    articles = Article.objects.\
+        filter(author=author).\
+        select_related('category').\
+        prefetch_related(Prefetch('tags', queryset=Tag.objects.only('name')))
+    sections = Section.objects.\
+        filter(article__author=author).\
+        only('article_id', 'title', 'number', 'content')
+    articles = iterate_in_batches(articles, ('id',), chunk_size)
+    sections = iterate_in_batches(sections, ('article_id', 'number'), chunk_size)
+    pending = [next(sections, None)]
+
+    def get_sections(article: Article) -> Iterator[Section]:
+        # Both queries order by the UUID, the same way its hex form sorts.
+        # Sections of articles created after the articles were read are
+        # skipped instead of stopping the merge.
+        while pending[0] is not None and pending[0].article_id.hex < article.id.hex:
+            pending[0] = next(sections, None)
+        while pending[0] is not None and pending[0].article_id == article.id:
+            yield pending[0]
+            pending[0] = next(sections, None)
+
+    for article in articles:
+        article_sections = get_sections(article)
+        yield article, article_sections
+        # Sections the caller did not consume still belong to this article.
+        for _ in article_sections:
+            pass
+
+
+def get_tag_names(article: Article) -> list[str]:
+    return [tag.name for tag in article.tags.all()]
+
+
+def export_jsonl(articles: Iterable[tuple[Article, Iterable[Section]]]) -> Iterator[bytes]:
+    # Writes the format read by private.importing, a line per article. The
+    # line is produced section by section instead of with one json.dumps.
+    for article, sections in articles:
+        head = json.dumps({'title': article.title,
+                           'category': article.category.title,
+                           'tags': get_tag_names(article)})
+        yield f'{head[:-1]}, "sections": ['.encode()
+        separator = ''
+        for section in sections:
+            yield (separator + json.dumps({'title': section.title,
+                                           'number': section.number,
+                                           'content': section.content})).encode()
+            separator = ', '
+        yield b']}\n'
+
+
+class StreamBuffer:
+    # Write-only file object for ZipFile, whose content is taken out after
+    # every write to the archive, so it never holds more than one piece.
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> list[bytes]:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+def get_markdown_filename(article: Article) -> str:
+    return f'{slugify(article.title) or "article"}-{article.id}.md'
+
+
+def export_zip(articles: Iterable[tuple[Article, Iterable[Section]]]) -> Iterator[bytes]:
+    # A Markdown file per article in the format read by private.importing.
+    # ZipFile writes to an unseekable stream with data descriptors, so the
+    # archive can be sent while it is written.
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for article, sections in articles:
+            with archive.open(get_markdown_filename(article), mode='w') as file:
+                file.write(f'# {article.title}\n'
+                           f'Category: {article.category.title}\n'
+                           f'Tags: {", ".join(get_tag_names(article))}\n'.encode())
+                for section in sections:
+                    file.write(f'\n## {section.title}\n{section.content}\n'.encode())
+                    yield from buffer.pop()
+            yield from buffer.pop()
+    yield from buffer.pop()
+
+
+EXPORTERS = {
+    'jsonl': export_jsonl,
+    'zip': export_zip,
+}
+
+
+def export_articles(author: CustomUser, format: str,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    return EXPORTERS[format](get_articles_with_sections(author, chunk_size=chunk_size))
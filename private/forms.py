@@ -1,6 +1,7 @@
 from typing import Any, Dict, Mapping, Optional, Type, Union
 from django import forms
 from django.core.files.base import File
+from django.core.validators import FileExtensionValidator
 from django.db.models.base import Model
 from django.forms.utils import ErrorList
 
@@ -36,3 +37,9 @@ class CreateUpdateSectionForm(forms.ModelForm):
             'title': forms.TextInput(attrs={'placeholder': 'Enter title of the section'}),
             'content': forms.Textarea(attrs={'placeholder': 'Enter content of the section'})
         }
+
+
+class ImportArticlesForm(forms.Form):
+    file = forms.FileField(help_text='A .jsonl file with one article per line or a .md file '
+                                     'where "# " starts an article and "## " starts a section.',
+                           validators=[FileExtensionValidator(['jsonl', 'md'])])
@@ -0,0 +1,327 @@
+import json
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional, Union
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.template.defaultfilters import slugify
+
+from core.models import Article, Category, SearchToken, Section, Tag
+from core.search import count_token_weights
+from private.cache import invalidate_article_indexes
+from private.forms import CreateUpdateArticleForm, CreateUpdateSectionForm
+from private.mixins import TagsStringMixin
+from users.models import CustomUser
+
+
+# Articles and sections are written once this many rows are pending, so
+# memory stays bounded however large the imported file is.
+DEFAULT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+FORMATS = {
+    '.jsonl': 'jsonl',
+    '.md': 'markdown',
+}
+
+
+@dataclass
+class InvalidRecord:
+    line: int
+    message: str
+
+    def __str__(self):
+        return f'Line {self.line}: {self.message}'
+
+
+@dataclass
+class ImportReport:
+    articles: int = 0
+    sections: int = 0
+    invalid: int = 0
+    errors: list[InvalidRecord] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.articles + self.sections
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def add_error(self, error: InvalidRecord):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(error)
+
+
+def get_format(filename: str) -> Optional[str]:
+    for extension, format in FORMATS.items():
+        if filename.lower().endswith(extension):
+            return format
+    return None
+
+
+def decode_lines(lines: Iterable[bytes]) -> Iterator[tuple[int, Union[str, InvalidRecord]]]:
+    for number, line in enumerate(lines, start=1):
+        try:
+            yield number, line.decode('utf-8').rstrip('\r\n')
+        except UnicodeDecodeError:
+            yield number, InvalidRecord(number, 'Line is not valid UTF-8.')
+
+
+def parse_jsonl(lines: Iterable[bytes]) -> Iterator[Union[dict, InvalidRecord]]:
+    # One article per line:
+    # {"title": ..., "category": ..., "tags": [...],
+    #  "sections": [{"title": ..., "number": ..., "content": ...}, ...]}
+    for number, line in decode_lines(lines):
+        if isinstance(line, InvalidRecord):
+            yield line
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield InvalidRecord(number, f'Invalid JSON: {e.msg}.')
+            continue
+        if not isinstance(record, dict):
+            yield InvalidRecord(number, 'Record has to be a JSON object.')
+            continue
+        record['line'] = number
+        yield record
+
+
+MARKDOWN_ARTICLE = re.compile(r'^#\s+(.+?)\s*$')
+MARKDOWN_SECTION = re.compile(r'^##\s+(.+?)\s*$')
+MARKDOWN_META = re.compile(r'^(category|tags):\s*(.*?)\s*$', re.IGNORECASE)
+
+
+def parse_markdown(lines: Iterable[bytes]) -> Iterator[Union[dict, InvalidRecord]]:
+    # "# Title" starts an article, followed by "Category: ..." and
+    # "Tags: ..." lines, "## Title" starts a section whose content runs
+    # until the next heading. Sections are numbered in order.
+    record = None
+    content = None
+
+    def close_section():
+        if content is not None:
+            record['sections'][-1]['content'] = '\n'.join(content).strip()
+
+    for number, line in decode_lines(lines):
+        if isinstance(line, InvalidRecord):
+            yield line
+            continue
+        article_match = MARKDOWN_ARTICLE.match(line)
+        section_match = MARKDOWN_SECTION.match(line)
+        if article_match:
+            if record is not None:
+                close_section()
+                yield record
+            record = {'line': number, 'title': article_match.group(1),
+                      'category': '', 'tags': '', 'sections': []}
+            content = None
+        elif record is None:
+            if line.strip():
+                yield InvalidRecord(number, 'Text outside of an article.')
+        elif section_match:
+            close_section()
+            record['sections'].append({'title': section_match.group(1),
+                                       'number': len(record['sections']) + 1})
+            content = []
+        elif content is not None:
+            content.append(line)
+        elif MARKDOWN_META.match(line):
+            key, value = MARKDOWN_META.match(line).groups()
+            record[key.lower()] = value
+        elif line.strip():
+            yield InvalidRecord(number, 'Text between the article title and its first section.')
+    if record is not None:
+        close_section()
+        yield record
+
+
+PARSERS = {
+    'jsonl': parse_jsonl,
+    'markdown': parse_markdown,
+}
+
+
+class CategoryTitleField(forms.Field):
+    # Finds the category by its title among categories loaded once per
+    # import, instead of a query per record.
+    default_error_messages = {
+        'invalid_choice': 'Select a valid choice. That choice is not one of the available choices.',
+    }
+
+    def __init__(self, categories: dict[str, Category], **kwargs):
+        self.categories = categories
+        super().__init__(**kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.categories[value]
+        except KeyError:
+            raise ValidationError(self.error_messages['invalid_choice'],
+                                  code='invalid_choice')
+
+
+class ImportArticleForm(CreateUpdateArticleForm):
+
+    def __init__(self, *args, categories: dict[str, Category], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['category'] = CategoryTitleField(categories=categories)
+
+    def _get_validation_exclusions(self):
+        # The category comes from the loaded categories already, model
+        # validation would check that it exists with a query per record.
+        exclusions = super()._get_validation_exclusions()
+        exclusions.add('category')
+        return exclusions
+
+
+def get_form_errors(form: forms.Form, prefix: str = '') -> str:
+    return ' '.join(f'{prefix}{name}: {" ".join(errors)}'
+                    for name, errors in form.errors.items())
+
+
+class ArticleImporter(TagsStringMixin):
+    # Validates every record with the same rules as PostArticleView and
+    # PostSectionView and writes valid ones with bulk_create, a batch at a
+    # time. Signals are not sent by bulk_create, so section counters and
+    # the search index of imported articles are written here as well.
+
+    def __init__(self, author: CustomUser, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.author = author
+        self.batch_size = batch_size
+        self.categories = {category.title: category
+                           for category in Category.objects.all()}
+        self.report = ImportReport()
+        self.articles: list[Article] = []
+        self.sections: list[Section] = []
+        self.tag_names: dict[object, list[str]] = {}
+
+    def run(self, records: Iterable[Union[dict, InvalidRecord]]) -> ImportReport:
+        start = time.perf_counter()
+        for record in records:
+            if isinstance(record, InvalidRecord):
+                self.report.add_error(record)
+                continue
+            try:
+                self.add(record)
+            except ValidationError as e:
+                self.report.add_error(InvalidRecord(record['line'], ' '.join(e.messages)))
+                continue
+            if len(self.articles) + len(self.sections) >= self.batch_size:
+                self.flush()
+        self.flush()
+        self.report.seconds = time.perf_counter() - start
+        return self.report
+
+    def get_tags_string(self, tags) -> str:
+        if isinstance(tags, list):
+            return ', '.join(str(tag) for tag in tags)
+        return str(tags or '')
+
+    def build_article(self, record: dict) -> Article:
+        form = ImportArticleForm(data={'title': record.get('title', ''),
+                                       'category': record.get('category', ''),
+                                       'tags_string': self.get_tags_string(record.get('tags'))},
+                                 categories=self.categories)
+        if not form.is_valid():
+            raise ValidationError(get_form_errors(form))
+        article = form.save(commit=False)
+        article.author = self.author
+        self.tag_names[article.id] = list(dict.fromkeys(
+            Tag.objects.normalize_name(name)
+            for name in self.parse_tags(form.cleaned_data['tags_string'])))
+        return article
+
+    def build_sections(self, article: Article, records: list) -> list[Section]:
+        if not isinstance(records, list):
+            raise ValidationError('sections: Has to be a list.')
+        sections = []
+        numbers, titles, slugs = set(), set(), set()
+        for position, record in enumerate(records, start=1):
+            if not isinstance(record, dict):
+                raise ValidationError(f'section {position}: Has to be an object.')
+            form = CreateUpdateSectionForm(data={'title': record.get('title', ''),
+                                                 'number': record.get('number', position),
+                                                 'content': record.get('content', '')})
+            if not form.is_valid():
+                raise ValidationError(get_form_errors(form, prefix=f'section {position} '))
+            section = form.save(commit=False)
+            section.article = article
+            # bulk_create does not call Section.save.
+            section.slug = slugify(section.title)
+            section.render_content()
+            if section.number in numbers:
+                raise ValidationError(
+                    f'section {position}: Article already has section with number {section.number}.')
+            if section.title in titles:
+                raise ValidationError(
+                    f'section {position}: Article already has section with this title.')
+            if section.slug in slugs:
+                raise ValidationError(
+                    f'section {position}: Article already has section with a similar title.')
+            numbers.add(section.number)
+            titles.add(section.title)
+            slugs.add(section.slug)
+            sections.append(section)
+        return sections
+
+    def add(self, record: dict):
+        article = self.build_article(record)
+        try:
+            sections = self.build_sections(article, record.get('sections', []))
+        except ValidationError:
+            del self.tag_names[article.id]
+            raise
+        article.sections_count = len(sections)
+        self.articles.append(article)
+        self.sections.extend(sections)
+
+    def flush(self):
+        if not self.articles:
+            return
+        tags_by_name = {tag.name: tag for tag in Tag.objects.resolve(
+            name for names in self.tag_names.values() for name in names)}
+        contents = {}
+        for section in self.sections:
+            contents.setdefault(section.article_id, []).append(section.content)
+        with transaction.atomic():
+            Article.objects.bulk_create(self.articles)
+            Section.objects.bulk_create(self.sections)
+            Article.tags.through.objects.bulk_create([
+                Article.tags.through(article_id=article.id,
+                                     tag_id=tags_by_name[name].id)
+                for article in self.articles
+                for name in self.tag_names[article.id]
+                if name in tags_by_name
+            ])
+            SearchToken.objects.bulk_create([
+                SearchToken(author_id=self.author.id, article=article,
+                            token=token, weight=weight)
+                for article in self.articles
+                for token, weight in count_token_weights(
+                    article.title, article.category.title,
+                    self.tag_names[article.id],
+                    contents.get(article.id, [])).items()
+            ])
+        # bulk_create sends no signals, the article index of the author is
+        # rebuilt when it is read next.
+        invalidate_article_indexes([self.author.id])
+        self.report.articles += len(self.articles)
+        self.report.sections += len(self.sections)
+        self.articles, self.sections, self.tag_names = [], [], {}
+
+
+def import_articles(author: CustomUser, lines: Iterable[bytes], format: str,
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> ImportReport:
+    importer = ArticleImporter(author, batch_size=batch_size)
+    return importer.run(PARSERS[format](lines))
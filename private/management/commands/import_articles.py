@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from private.importing import DEFAULT_BATCH_SIZE, PARSERS, get_format, import_articles
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = 'Imports articles with their sections and tags from a JSONL or Markdown bundle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to a .jsonl or .md file.')
+        parser.add_argument('--author', required=True,
+                            help='Username of the author of imported articles.')
+        parser.add_argument('--format', choices=sorted(PARSERS),
+                            help='Format of the file, guessed from its extension by default.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                            help='Number of rows written at once.')
+
+    def handle(self, *args, **options):
+        try:
+            author = CustomUser.objects.get(username=options['author'])
+        except CustomUser.DoesNotExist:
+            raise CommandError(f'User "{options["author"]}" does not exist.')
+        format = options['format'] or get_format(options['path'])
+        if format is None:
+            raise CommandError('Cannot guess the format of the file, pass --format.')
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_articles(author, file, format,
+                                         batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+        for error in report.errors:
+            self.stderr.write(str(error))
+        if report.invalid > len(report.errors):
+            self.stderr.write(f'... and {report.invalid - len(report.errors)} more invalid records.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.articles} articles and {report.sections} sections '
+            f'({report.invalid} invalid records skipped) in {report.seconds:.2f}s, '
+            f'{report.rows_per_second:.0f} rows/s.'))
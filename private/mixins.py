@@ -0,0 +1,140 @@
+from typing import Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.db.models.query import QuerySet
+from django.forms import Form
+from django.http import Http404
+from django.template.defaultfilters import slugify
+
+from core.models import Article, Section, Tag
+
+
+class OwnedArticleMixin:
+    # Looks up the article (and the section, for views of a section) named
+    # in the URL in a single query that is filtered by the current user, so
+    # articles of other users are simply not found. Results are memoized
+    # for the rest of the request, aget_article and aget_section are the
+    # versions for async views.
+    article_id_kwarg = 'id'
+    section_slug_kwarg = 'slug'
+
+    def get_owned_articles(self) -> QuerySet[Article]:
+        return Article.objects.\
+            filter(author=self.request.user).\
+            select_related('category')
+
+    def get_owned_sections(self) -> QuerySet[Section]:
+        return Section.objects.\
+            filter(article__author=self.request.user).\
+            select_related('article__category')
+
+    def filter_owned_article(self) -> QuerySet[Article]:
+        try:
+            return self.get_owned_articles().\
+                filter(id=self.kwargs[self.article_id_kwarg])
+        except ValidationError:
+            raise Http404
+
+    def filter_owned_section(self) -> QuerySet[Section]:
+        try:
+            return self.get_owned_sections().\
+                filter(article_id=self.kwargs[self.article_id_kwarg],
+                       slug=self.kwargs[self.section_slug_kwarg])
+        except ValidationError:
+            raise Http404
+
+    def set_article(self, article: Optional[Article]) -> Article:
+        if article is None:
+            raise Http404
+        self._article = article
+        return article
+
+    def set_section(self, section: Optional[Section]) -> Section:
+        if section is None:
+            raise Http404
+        self._section = section
+        self._article = section.article
+        return section
+
+    def get_article(self) -> Article:
+        if not hasattr(self, '_article'):
+            self.set_article(self.filter_owned_article().first())
+        return self._article
+
+    def get_section(self) -> Section:
+        if not hasattr(self, '_section'):
+            self.set_section(self.filter_owned_section().first())
+        return self._section
+
+    async def aget_article(self) -> Article:
+        if not hasattr(self, '_article'):
+            self.set_article(await self.filter_owned_article().afirst())
+        return self._article
+
+    async def aget_section(self) -> Section:
+        if not hasattr(self, '_section'):
+            self.set_section(await self.filter_owned_section().afirst())
+        return self._section
+
+
+class TagsStringMixin:
+
+    def parse_tags(self, tags_str: str) -> list[str]:
+        result = []
+        splitted_tags_str = tags_str.split(',')
+        for tag in splitted_tags_str:
+            if not tag:
+                continue
+            elif tag.isspace():
+                continue
+            else:
+                result.append(tag.strip())
+
+        return result
+
+    def get_tags_objects(self, tags_str: str) -> list[Tag]:
+        tags_str_list = self.parse_tags(tags_str=tags_str)
+        return Tag.objects.resolve(tags_str_list)
+
+
+class UniqueSectionMixin:
+    # Checks the number and the title of a submitted section against the
+    # other sections of the article. Only conflicting sections are fetched,
+    # without their content.
+
+    def add_errors_if_section_is_not_unique(self, form: Form, article: Article,
+                                            section: Optional[Section] = None):
+        form.is_valid()
+        number = form.cleaned_data.get('number')
+        title = form.cleaned_data.get('title')
+        conditions = Q()
+        if number is not None:
+            conditions |= Q(number=number)
+        # An edited section keeps its slug unless the title changes.
+        check_slug = bool(title) and (section is None or section.rebuilds_slug())
+        if title:
+            conditions |= Q(title=title)
+        if check_slug:
+            conditions |= Q(slug=slugify(title))
+        if not conditions:
+            return
+        conflicts = Section.objects.filter(article=article).filter(conditions)
+        if section is not None:
+            conflicts = conflicts.exclude(pk=section.pk)
+        numbers, titles, slugs = set(), set(), set()
+        for conflict in conflicts.values_list('number', 'title', 'slug'):
+            numbers.add(conflict[0])
+            titles.add(conflict[1])
+            slugs.add(conflict[2])
+        if number in numbers:
+            form.add_error(
+                'number', f'Article already has section with number {number}.')
+        if title in titles:
+            form.add_error(
+                'title', 'Article already has section with this title.'
+            )
+        elif check_slug and slugify(title) in slugs:
+            form.add_error(
+                'title', 'Article already has section with a similar title.'
+            )
@@ -0,0 +1,177 @@
+import base64
+import binascii
+import datetime
+import json
+import uuid
+from typing import Any, Iterable, Optional
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from django.db.models.query import QuerySet
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class KeysetPage:
+
+    def __init__(self, object_list: list, has_next: bool, has_previous: bool,
+                 next_cursor: Optional[str], previous_cursor: Optional[str]):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    # Paginates a queryset by remembering the ordering value and id of the
+    # last (or first) object of a page instead of using OFFSET, so that every
+    # page costs the same as the first one and pages stay stable while
+    # objects are added or deleted. id is used as the tiebreaker and has to
+    # be unique.
+    tiebreaker = 'id'
+
+    def __init__(self, queryset: QuerySet, ordering: str, per_page: int):
+        self.queryset = queryset
+        self.descending = ordering.startswith('-')
+        self.field = ordering.lstrip('-')
+        self.per_page = per_page
+
+    def get_ordering(self, reverse: bool = False) -> list[str]:
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        if self.field == self.tiebreaker:
+            return [prefix + self.field]
+        return [prefix + self.field, prefix + self.tiebreaker]
+
+    def get_value(self, obj: Any, field: str) -> Any:
+        return getattr(obj, field)
+
+    def encode_cursor(self, obj: Any) -> str:
+        values = []
+        for field in (self.field, self.tiebreaker):
+            value = self.get_value(obj, field)
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat()
+            elif isinstance(value, uuid.UUID):
+                value = str(value)
+            values.append(value)
+        serialized = json.dumps(values).encode()
+        return base64.urlsafe_b64encode(serialized).decode().rstrip('=')
+
+    def decode_cursor(self, cursor: str) -> list:
+        try:
+            padded_cursor = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded_cursor.encode()))
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != 2:
+            raise InvalidCursor(cursor)
+        return [self.to_python(value, field) for value, field in
+                zip(values, (self.field, self.tiebreaker))]
+
+    def to_python(self, value: Any, field: str) -> Any:
+        try:
+            model_field = self.queryset.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            # Annotations, like the number of sections, are counts.
+            if isinstance(value, int) and not isinstance(value, bool):
+                return value
+            raise InvalidCursor(value)
+        try:
+            return model_field.to_python(value)
+        except ValidationError:
+            raise InvalidCursor(value)
+
+    def is_nullable(self) -> bool:
+        try:
+            return self.queryset.model._meta.get_field(self.field).null
+        except FieldDoesNotExist:
+            return False
+
+    def get_seek_filter(self, cursor: str, reverse: bool = False) -> Q:
+        # NULL (published of old articles) sorts before every other value,
+        # as it does on MySQL and SQLite and in get_sort_key.
+        value, tiebreaker_value = self.decode_cursor(cursor)
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        if self.field == self.tiebreaker:
+            return Q(**{f'{self.field}__{lookup}': value})
+        if value is None:
+            ties = Q(**{f'{self.field}__isnull': True,
+                        f'{self.tiebreaker}__{lookup}': tiebreaker_value})
+            if lookup == 'lt':
+                return ties
+            return ties | Q(**{f'{self.field}__isnull': False})
+        seek_filter = Q(**{f'{self.field}__{lookup}': value}) | \
+            Q(**{self.field: value, f'{self.tiebreaker}__{lookup}': tiebreaker_value})
+        if lookup == 'lt' and self.is_nullable():
+            seek_filter |= Q(**{f'{self.field}__isnull': True})
+        return seek_filter
+
+    def get_page_queryset(self, after: Optional[str] = None,
+                          before: Optional[str] = None) -> QuerySet:
+        reverse = bool(before) and not after
+        queryset = self.queryset.order_by(*self.get_ordering(reverse=reverse))
+        if after:
+            queryset = queryset.filter(self.get_seek_filter(after))
+        elif before:
+            queryset = queryset.filter(self.get_seek_filter(before, reverse=True))
+        return queryset[:self.per_page + 1]
+
+    def make_page(self, objects: list, after: Optional[str] = None,
+                  before: Optional[str] = None) -> KeysetPage:
+        reverse = bool(before) and not after
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if reverse:
+            objects.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(after)
+        return KeysetPage(
+            object_list=objects,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_cursor=self.encode_cursor(objects[-1]) if has_next and objects else None,
+            previous_cursor=self.encode_cursor(objects[0]) if has_previous and objects else None,
+        )
+
+    def get_page(self, after: Optional[str] = None,
+                 before: Optional[str] = None) -> KeysetPage:
+        objects = list(self.get_page_queryset(after, before))
+        return self.make_page(objects, after, before)
+
+    async def aget_page(self, after: Optional[str] = None,
+                        before: Optional[str] = None) -> KeysetPage:
+        objects = [obj async for obj in self.get_page_queryset(after, before)]
+        return self.make_page(objects, after, before)
+
+    def get_sort_key(self, obj: Any) -> tuple:
+        # Sorts None (published of old articles) first, as databases do.
+        value = self.get_value(obj, self.field)
+        return (value is not None, value, self.get_value(obj, self.tiebreaker))
+
+    def get_list_page(self, objects: Iterable, after: Optional[str] = None,
+                      before: Optional[str] = None) -> KeysetPage:
+        # Pages objects that are all in memory, e.g. from a cache, in the
+        # order and with the cursors of pages of the queryset.
+        reverse = bool(before) and not after
+        descending = self.descending != reverse
+        objects = sorted(objects, key=self.get_sort_key, reverse=descending)
+        cursor = after or before
+        if cursor:
+            value, tiebreaker_value = self.decode_cursor(cursor)
+            key = (value is not None, value, tiebreaker_value)
+            if descending:
+                objects = [obj for obj in objects if self.get_sort_key(obj) < key]
+            else:
+                objects = [obj for obj in objects if self.get_sort_key(obj) > key]
+        return self.make_page(objects[:self.per_page + 1], after, before)
@@ -0,0 +1,50 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Article, Category, Section
+from core.signals import is_deleted_with_article
+from private.cache import invalidate_article_indexes
+
+
+# Changes of articles drop the cached article index of their author (see
+# private.cache) once they are committed, it is loaded again when it is
+# read next.
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_index_of_article(sender, instance: Article, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_article_indexes([instance.author_id])
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def invalidate_index_of_article_with_changed_tags(sender, instance, action, reverse, **kwargs):
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    invalidate_article_indexes([instance.author_id])
+
+
+@receiver(post_save, sender=Section)
+def invalidate_index_of_saved_section(sender, instance: Section, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_article_indexes([instance.article.author_id])
+
+
+@receiver(post_delete, sender=Section)
+def invalidate_index_of_deleted_section(sender, instance: Section, origin=None, **kwargs):
+    if is_deleted_with_article(origin):
+        return
+    invalidate_article_indexes([instance.article.author_id])
+
+
+@receiver(post_save, sender=Category)
+def invalidate_indexes_of_saved_category(sender, instance: Category, created=False,
+                                         raw=False, **kwargs):
+    # Category titles are shown in the indexes of every author with an
+    # article in the category.
+    if raw or created:
+        return
+    invalidate_article_indexes(instance.articles.values_list('author_id', flat=True).distinct())
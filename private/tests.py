@@ -1,3 +1,1007 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import zipfile
+from urllib.parse import quote
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.urls import reverse
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Article, Category, SearchToken, Section, Tag
+from core.search import search_articles
+from core.testing import ExplainQueriesMixin
+from private.exporting import export_articles
+from private.importing import import_articles
+from private.views import ArticleListView, ReorderSectionsView
+from users.models import CustomUser
+
+
+class PostArticleViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.category = Category.objects.create(title='Chemistry')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test_tags_are_created_and_assigned(self):
+        Tag.objects.create(name='ionic-compounds')
+        response = self.client.post(reverse('private:post-article'),
+                                    data={'title': 'Ionic compounds in nutrition',
+                                          'category': self.category.id,
+                                          'tags_string': 'Ionic Compounds, nutrition, ,nutrition'})
+        article = Article.objects.get()
+        self.assertRedirects(response, reverse('private:article-detail',
+                                               kwargs={'id': article.id}))
+        self.assertEqual(sorted(tag.name for tag in article.tags.all()),
+                         ['ionic-compounds', 'nutrition'])
+        self.assertEqual(Tag.objects.count(), 2)
+
+
+class SearchForArticlesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+        cls.article.tags.set(Tag.objects.resolve(['salts', 'sodium-chloride']))
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test_every_matching_tag_is_found(self):
+        for query in ('salts', 'sodium'):
+            response = self.client.get(reverse('private:search-articles'),
+                                       data={'query': query})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.context['articles']), [self.article])
+
+    def test_empty_query_redirects_to_article_list(self):
+        response = self.client.get(reverse('private:search-articles'))
+        self.assertRedirects(response, reverse('private:article-list'))
+
+
+class ArticleListViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.articles = Article.objects.bulk_create([
+            Article(title=f'Article number {i}', category=category, author=cls.user)
+            for i in range(45)
+        ])
+        for i, article in enumerate(cls.articles):
+            Section.objects.bulk_create([
+                Section(article=article, title=f'Section number {number}',
+                        number=number, content='Content', slug=f'section-number-{number}')
+                for number in range(1, i % 4 + 1)
+            ])
+        Article.objects.refresh_sections_count()
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def collect_pages(self, ordering: str):
+        pages = []
+        data = {'ordering': ordering}
+        while True:
+            response = self.client.get(reverse('private:article-list'), data=data)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context['total_count'], 45)
+            pages.append(list(response.context['articles']))
+            page = response.context['page_obj']
+            if not page.has_next:
+                return pages
+            data = {'ordering': ordering, 'after': page.next_cursor}
+
+    def test_pages_cover_all_articles_in_order_for_every_ordering(self):
+        for ordering in ArticleListView.allowed_orderings:
+            pages = self.collect_pages(ordering)
+            self.assertEqual([len(page) for page in pages], [20, 20, 5])
+            articles = [article for page in pages for article in page]
+            self.assertEqual(len({article.id for article in articles}), 45)
+            field = ordering.lstrip('-')
+            field = ArticleListView.ordering_fields.get(field, field)
+            values = [getattr(article, field) for article in articles]
+            self.assertEqual(values, sorted(values, reverse=ordering.startswith('-')))
+
+    def test_previous_page(self):
+        first_page = self.client.get(reverse('private:article-list'),
+                                     data={'ordering': 'published'}).context['page_obj']
+        second_page = self.client.get(reverse('private:article-list'),
+                                      data={'ordering': 'published',
+                                            'after': first_page.next_cursor}).context['page_obj']
+        response = self.client.get(reverse('private:article-list'),
+                                   data={'ordering': 'published',
+                                         'before': second_page.previous_cursor})
+        self.assertEqual(list(response.context['articles']), list(first_page))
+        self.assertFalse(response.context['page_obj'].has_previous)
+
+    def test_pages_cover_articles_without_publication_date(self):
+        Article.objects.filter(pk__in=[article.pk for article in self.articles[10:35]]).\
+            update(published=None)
+        url = reverse('private:article-list')
+        # Read from the database and from the article index.
+        for alias in (None, 'article_index'):
+            for ordering in ('published', '-published'):
+                caches['article_index'].clear()
+                with override_settings(ARTICLE_INDEX_CACHE_ALIAS=alias):
+                    pages = self.collect_pages(ordering)
+                    self.assertEqual([len(page) for page in pages], [20, 20, 5])
+                    articles = [article for page in pages for article in page]
+                    self.assertEqual(len({article.id for article in articles}), 45)
+                    without_date = [article.published is None for article in articles]
+                    self.assertEqual(without_date,
+                                     sorted(without_date, reverse=ordering == 'published'))
+                    data = {'ordering': ordering}
+                    for page in pages[:-1]:
+                        next_cursor = self.client.get(url, data=data).\
+                            context['page_obj'].next_cursor
+                        data = {'ordering': ordering, 'after': next_cursor}
+                        previous_cursor = self.client.get(url, data=data).\
+                            context['page_obj'].previous_cursor
+                        response = self.client.get(url, data={'ordering': ordering,
+                                                              'before': previous_cursor})
+                        self.assertEqual([article.id for article in response.context['articles']],
+                                         [article.id for article in page])
+
+    def test_invalid_ordering_and_cursor(self):
+        response = self.client.get(reverse('private:article-list'),
+                                   data={'ordering': 'title'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('private:article-list'),
+                                   data={'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PrivateViewsQueryPlanTest(ExplainQueriesMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=cls.category,
+                                             author=cls.user)
+        cls.article.tags.set(Tag.objects.resolve(['salts']))
+        cls.section = Section.objects.create(article=cls.article, number=1,
+                                             title='Introduction',
+                                             content='Electrons.')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test_get_views_use_indexes(self):
+        article_kwargs = {'id': self.article.id}
+        section_kwargs = {'id': self.article.id, 'slug': self.section.slug}
+        requests = [
+            (reverse('private:private-page'), {}),
+            (reverse('private:article-detail', kwargs=article_kwargs), {}),
+            (reverse('private:section-detail', kwargs=section_kwargs), {}),
+            (reverse('private:search-articles'), {'query': 'ionic'}),
+        ] + [(reverse('private:article-list'), {'ordering': ordering})
+             for ordering in [''] + ArticleListView.allowed_orderings]
+        for url, data in requests:
+            with self.subTest(url=url, data=data):
+                with self.assertNoFullScans():
+                    response = self.client.get(url, data=data)
+                self.assertEqual(response.status_code, 200)
+
+    def test_form_views_use_indexes(self):
+        article_kwargs = {'id': self.article.id}
+        section_kwargs = {'id': self.article.id, 'slug': self.section.slug}
+        urls = [
+            reverse('private:post-article'),
+            reverse('private:update-article-through-detail', kwargs=article_kwargs),
+            reverse('private:post-section', kwargs=article_kwargs),
+            reverse('private:update-section-article-detail', kwargs=section_kwargs),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                # Category select lists every category.
+                with self.assertNoFullScans(allowed_tables=['core_category']):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_views_stay_within_query_budgets(self):
+        # Pages are filled with more objects than the other tests use, to
+        # catch queries issued per object.
+        for number in range(2, 6):
+            Section.objects.create(article=self.article, number=number,
+                                   title=f'Section number {number}', content='Content')
+            article = Article.objects.create(title=f'Article number {number}',
+                                             category=self.category, author=self.user)
+            article.tags.set(Tag.objects.resolve([f'tag-{number}', 'salts']))
+        article_kwargs = {'id': self.article.id}
+        section_kwargs = {'id': self.article.id, 'slug': self.section.slug}
+        requests = [
+            ('private:private-page', {}, {}),
+            ('private:post-article', {}, {}),
+            ('private:article-detail', article_kwargs, {}),
+            ('private:update-article-through-list', article_kwargs, {}),
+            ('private:update-article-through-detail', article_kwargs, {}),
+            ('private:article-list', {}, {}),
+            ('private:post-section', article_kwargs, {}),
+            ('private:section-detail', section_kwargs, {}),
+            ('private:update-section-article-detail', section_kwargs, {}),
+            ('private:update-section-section-detail', section_kwargs, {}),
+            ('private:search-articles', {}, {'query': 'number'}),
+        ]
+        for url_name, kwargs, data in requests:
+            with self.subTest(url_name=url_name):
+                response = self.client.get(reverse(url_name, kwargs=kwargs), data=data)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(response.query_count,
+                                     settings.QUERY_BUDGETS[url_name])
+
+    def test_set_status_uses_indexes(self):
+        with self.assertNoFullScans():
+            response = self.client.post(reverse('private:set-article-status-through-detail',
+                                                kwargs={'id': self.article.id}))
+        self.assertEqual(response.status_code, 302)
+        self.article.refresh_from_db()
+        self.assertTrue(self.article.is_ready)
+
+
+class SectionSlugTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+        Section.objects.create(article=cls.article, number=1,
+                               title='Introduction!', content='Content')
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def test_title_with_same_slug_is_rejected(self):
+        response = self.client.post(reverse('private:post-section',
+                                            kwargs={'id': self.article.id}),
+                                    data={'title': 'Introduction?',
+                                          'number': 2,
+                                          'content': 'Content'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Article already has section with a similar title.')
+        self.assertEqual(self.article.sections.count(), 1)
+
+    def test_deduplicated_slug_is_kept_on_edit(self):
+        # As left by migration 0017 for titles with the same slug.
+        section = Section.objects.create(article=self.article, number=2,
+                                         title='Other title', content='Content')
+        Section.objects.filter(pk=section.pk).update(title='Introduction?',
+                                                     slug=f'introduction-{section.pk}')
+        response = self.client.post(reverse('private:update-section-article-detail',
+                                            kwargs={'id': self.article.id,
+                                                    'slug': f'introduction-{section.pk}'}),
+                                    data={'title': 'Introduction?',
+                                          'number': 2,
+                                          'content': 'New content'})
+        self.assertEqual(response.status_code, 302)
+        section.refresh_from_db()
+        self.assertEqual(section.content, 'New content')
+        self.assertEqual(section.slug, f'introduction-{section.pk}')
+        section.save()
+        section = Section.objects.get(pk=section.pk)
+        section.number = 3
+        section.save()
+        self.assertEqual(Section.objects.get(pk=section.pk).slug, f'introduction-{section.pk}')
+
+
+class OwnedArticleLookupTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.other_user = CustomUser.objects.create_user(
+            username='other_user',
+            email='other_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+        cls.section = Section.objects.create(article=cls.article, number=1,
+                                             title='Introduction', content='Content')
+
+    def test_articles_of_other_users_are_not_found(self):
+        self.client.force_login(self.other_user)
+        article_kwargs = {'id': self.article.id}
+        section_kwargs = {'id': self.article.id, 'slug': self.section.slug}
+        requests = [
+            ('get', 'private:article-detail', article_kwargs),
+            ('get', 'private:update-article-through-detail', article_kwargs),
+            ('post', 'private:delete-article', article_kwargs),
+            ('get', 'private:post-section', article_kwargs),
+            ('get', 'private:section-detail', section_kwargs),
+            ('get', 'private:update-section-section-detail', section_kwargs),
+            ('post', 'private:delete-section', section_kwargs),
+            ('post', 'private:set-article-status-through-list', article_kwargs),
+        ]
+        for method, url_name, kwargs in requests:
+            with self.subTest(url_name=url_name):
+                response = getattr(self.client, method)(reverse(url_name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 404)
+        self.assertTrue(Article.objects.filter(pk=self.article.pk).exists())
+        self.assertTrue(Section.objects.filter(pk=self.section.pk).exists())
+
+    def test_unknown_and_malformed_ids_are_not_found(self):
+        self.client.force_login(self.user)
+        for kwargs in ({'id': 'aaaa-bbbb'}, {'id': self.article.id, 'slug': 'unknown'}):
+            url_name = 'private:section-detail' if 'slug' in kwargs else 'private:article-detail'
+            with self.subTest(kwargs=kwargs):
+                response = self.client.get(reverse(url_name, kwargs=kwargs))
+                self.assertEqual(response.status_code, 404)
+
+    def test_section_and_article_are_fetched_in_one_query(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('private:section-detail',
+                                           kwargs={'id': self.article.id,
+                                                   'slug': self.section.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['article'], self.article)
+        # Session and user, then the section with its article.
+        self.assertEqual(response.query_count, 3)
+
+
+class SetArticleStatusTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def create_sections(self, *numbers):
+        for number in numbers:
+            Section.objects.create(article=self.article, number=number,
+                                   title=f'Section number {number}', content='Content')
+
+    def get_readiness(self):
+        response = self.client.get(reverse('private:article-readiness',
+                                           kwargs={'id': self.article.id}))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_readiness_reports_every_violation(self):
+        self.assertEqual(self.get_readiness()['violations'],
+                         ['Create at least one section before setting status to "Ready".'])
+        self.create_sections(2, 4, 30000)
+        readiness = self.get_readiness()
+        self.assertFalse(readiness['can_be_ready'])
+        self.assertEqual(readiness['violations'], [
+            'Make sure that there is a section with number 1 among sections of this article.',
+            'Make sure numbers of your sections are consecutive integers.',
+        ])
+
+    def test_readiness_uses_one_query(self):
+        self.create_sections(1, 2, 3)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.article.get_publish_violations(), [])
+        self.assertTrue(self.get_readiness()['can_be_ready'])
+
+    def test_status_is_not_changed_while_there_are_violations(self):
+        self.create_sections(2, 3)
+        response = self.client.post(reverse('private:set-article-status-through-detail',
+                                            kwargs={'id': self.article.id}))
+        self.assertRedirects(response, reverse('private:article-detail',
+                                               kwargs={'id': self.article.id}))
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual(messages, [
+            'Make sure that there is a section with number 1 among sections of this article.'])
+        self.article.refresh_from_db()
+        self.assertFalse(self.article.is_ready)
+
+    def test_status_is_toggled(self):
+        self.create_sections(1, 2)
+        url = reverse('private:set-article-status-through-list', kwargs={'id': self.article.id})
+        self.assertRedirects(self.client.post(url), reverse('private:article-list'))
+        self.article.refresh_from_db()
+        self.assertTrue(self.article.is_ready)
+        self.client.post(url)
+        self.article.refresh_from_db()
+        self.assertFalse(self.article.is_ready)
+
+
+class ReorderSectionsViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+        for number in range(1, 51):
+            Section.objects.create(article=cls.article, number=number,
+                                   title=f'Section number {number}', content='Content')
+        cls.url = reverse('private:reorder-sections', kwargs={'id': cls.article.id})
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def get_slugs(self):
+        return list(self.article.sections.order_by('number').values_list('slug', flat=True))
+
+    def test_sections_are_renumbered_in_new_order(self):
+        new_order = list(reversed(self.get_slugs()))
+        response = self.client.post(self.url, data={'order': new_order})
+        self.assertRedirects(response, reverse('private:article-detail',
+                                               kwargs={'id': self.article.id}))
+        self.assertEqual(self.get_slugs(), new_order)
+        self.assertEqual(self.article.get_publish_violations(), [])
+
+    def test_number_of_statements_does_not_depend_on_number_of_sections(self):
+        view = ReorderSectionsView()
+        new_order = list(reversed(self.get_slugs()))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(view.reorder(self.article, new_order))
+        statements = [query['sql'] for query in queries
+                      if not query['sql'].upper().startswith(('SAVEPOINT', 'RELEASE'))]
+        # Lock, negate, renumber and the new version of the article.
+        self.assertEqual(len(statements), 4)
+
+    def test_incomplete_order_is_rejected(self):
+        slugs = self.get_slugs()
+        for order in (slugs[1:], slugs[:-1] + [slugs[0]], slugs + ['unknown']):
+            with self.subTest(order=order[-2:]):
+                response = self.client.post(self.url, data={'order': order})
+                self.assertEqual(response.status_code, 302)
+                self.assertEqual(self.get_slugs(), slugs)
+
+    def test_sections_of_ready_article_are_not_reordered(self):
+        Article.objects.filter(pk=self.article.pk).update(is_ready=True)
+        slugs = self.get_slugs()
+        self.client.post(self.url, data={'order': list(reversed(slugs))})
+        self.assertEqual(self.get_slugs(), slugs)
+
+
+class ImportArticlesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        Category.objects.create(title='Chemistry')
+
+    def get_jsonl(self, count: int, sections: int = 3) -> list[bytes]:
+        return [json.dumps({
+            'title': f'Imported article {i}',
+            'category': 'Chemistry',
+            'tags': ['Ionic compounds', 'chemistry'],
+            'sections': [{'title': f'Section number {number}', 'number': number,
+                          'content': f'Content about topic{i}'}
+                         for number in range(1, sections + 1)],
+        }).encode() + b'\n' for i in range(count)]
+
+    def test_jsonl_articles_are_imported_with_sections_and_tags(self):
+        report = import_articles(self.user, self.get_jsonl(3), 'jsonl', batch_size=5)
+        self.assertEqual((report.articles, report.sections, report.invalid), (3, 9, 0))
+        article = Article.objects.get(title='Imported article 1')
+        self.assertEqual(article.author, self.user)
+        self.assertEqual(article.sections_count, 3)
+        self.assertEqual(list(article.sections.order_by('number').values_list('slug', flat=True)),
+                         ['section-number-1', 'section-number-2', 'section-number-3'])
+        self.assertEqual(sorted(article.tags.values_list('name', flat=True)),
+                         ['chemistry', 'ionic-compounds'])
+        self.assertEqual(article.get_publish_violations(), [])
+        self.assertEqual([found.title for found in search_articles(self.user, 'topic1')],
+                         ['Imported article 1'])
+
+    def test_number_of_lookups_does_not_depend_on_number_of_articles(self):
+        # Inserts are split by the backend according to its limit of query
+        # parameters, every other query runs once per batch.
+        def get_lookups(queries):
+            return [query['sql'] for query in queries
+                    if not query['sql'].startswith('INSERT')]
+
+        Tag.objects.resolve(['Ionic compounds', 'chemistry'])
+        with CaptureQueriesContext(connection) as few:
+            import_articles(self.user, self.get_jsonl(2), 'jsonl')
+        with CaptureQueriesContext(connection) as many:
+            import_articles(self.user, self.get_jsonl(40)[2:], 'jsonl')
+        self.assertEqual(len(get_lookups(few)), len(get_lookups(many)))
+
+    def test_invalid_records_are_skipped(self):
+        lines = self.get_jsonl(1) + [
+            b'{not json\n',
+            json.dumps({'title': 'Bad', 'category': 'Chemistry'}).encode(),
+            json.dumps({'title': 'Unknown category', 'category': 'Physics'}).encode(),
+            json.dumps({'title': 'Duplicated numbers', 'category': 'Chemistry',
+                        'sections': [{'title': 'First section', 'number': 1, 'content': 'A'},
+                                     {'title': 'Second section', 'number': 1, 'content': 'B'}]}).encode(),
+        ]
+        report = import_articles(self.user, lines, 'jsonl')
+        self.assertEqual((report.articles, report.invalid), (1, 4))
+        self.assertEqual([error.line for error in report.errors], [2, 3, 4, 5])
+        self.assertIn('Article already has section with number 1.', report.errors[3].message)
+        self.assertEqual(Article.objects.count(), 1)
+
+    def test_markdown_bundle_is_imported(self):
+        bundle = (b'# Ionic compounds\n'
+                  b'Category: Chemistry\n'
+                  b'Tags: ions, salts\n'
+                  b'\n'
+                  b'## What are ions\n'
+                  b'Ions are charged.\n'
+                  b'\n'
+                  b'## What are salts\n'
+                  b'Salts are ionic.\n'
+                  b'# Covalent bonds\n'
+                  b'Category: Chemistry\n'
+                  b'## Sharing electrons\n'
+                  b'Atoms share electrons.\n')
+        report = import_articles(self.user, bundle.splitlines(keepends=True), 'markdown')
+        self.assertEqual((report.articles, report.sections, report.invalid), (2, 3, 0))
+        article = Article.objects.get(title='Ionic compounds')
+        self.assertEqual(list(article.sections.order_by('number').values_list('title', 'content')),
+                         [('What are ions', 'Ions are charged.'),
+                          ('What are salts', 'Salts are ionic.')])
+        self.assertEqual(sorted(article.tags.values_list('name', flat=True)), ['ions', 'salts'])
+
+    def test_command_imports_file(self):
+        with tempfile.NamedTemporaryFile(suffix='.jsonl') as file:
+            file.writelines(self.get_jsonl(2))
+            file.flush()
+            out = io.StringIO()
+            call_command('import_articles', file.name, author='new_user', stdout=out)
+        self.assertIn('Imported 2 articles and 6 sections', out.getvalue())
+        self.assertIn('rows/s', out.getvalue())
+
+    def test_upload_imports_file(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('articles.jsonl', b''.join(self.get_jsonl(2)))
+        response = self.client.post(reverse('private:import-articles'), data={'file': upload})
+        self.assertRedirects(response, reverse('private:article-list'))
+        self.assertEqual(Article.objects.filter(author=self.user).count(), 2)
+        messages = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertIn('You imported 2 articles with 6 sections.', messages)
+
+    def test_upload_of_unsupported_file_is_rejected(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('articles.csv', b'title,category\n')
+        response = self.client.post(reverse('private:import-articles'), data={'file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].errors)
+        self.assertFalse(Article.objects.exists())
+
+
+class ExportArticlesViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.other_user = CustomUser.objects.create_user(
+            username='other_user',
+            email='other_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        tags = Tag.objects.resolve(['ions', 'salts'])
+        for i in range(5):
+            article = Article.objects.create(title=f'Exported article {i}',
+                                             category=category, author=cls.user)
+            article.tags.set(tags)
+            for number in range(1, i + 1):
+                Section.objects.create(article=article, number=number,
+                                       title=f'Section number {number}',
+                                       content=f'Content "{number}"\nof article {i}')
+        Article.objects.create(title='Not exported article', category=category,
+                               author=cls.other_user)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def get_content(self, format: str) -> bytes:
+        response = self.client.get(reverse('private:export-articles'), data={'format': format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_jsonl_export_can_be_imported_again(self):
+        content = self.get_content('jsonl')
+        lines = content.splitlines(keepends=True)
+        self.assertEqual(len(lines), 5)
+        record = json.loads(lines[0])
+        self.assertEqual(set(record), {'title', 'category', 'tags', 'sections'})
+        Article.objects.filter(author=self.user).delete()
+        report = import_articles(self.user, lines, 'jsonl')
+        self.assertEqual((report.articles, report.sections, report.invalid), (5, 10, 0))
+        article = Article.objects.get(author=self.user, title='Exported article 3')
+        self.assertEqual(list(article.sections.order_by('number').values_list('content', flat=True)),
+                         [f'Content "{number}"\nof article 3' for number in range(1, 4)])
+        self.assertEqual(sorted(article.tags.values_list('name', flat=True)), ['ions', 'salts'])
+
+    def test_zip_export_contains_markdown_file_per_article(self):
+        content = self.get_content('zip')
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            names = archive.namelist()
+            article = Article.objects.get(title='Exported article 2')
+            markdown = archive.read(f'exported-article-2-{article.id}.md')
+        self.assertEqual(len(names), 5)
+        report = import_articles(self.other_user, markdown.splitlines(keepends=True), 'markdown')
+        self.assertEqual((report.articles, report.sections, report.invalid), (1, 2, 0))
+
+    def test_number_of_queries_does_not_depend_on_number_of_rows(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_content('jsonl')
+        few = len(queries)
+        category = Category.objects.get()
+        for i in range(20):
+            article = Article.objects.create(title=f'Another article {i}',
+                                             category=category, author=self.user)
+            Section.objects.create(article=article, number=1,
+                                   title='Section number 1', content='Content')
+        with CaptureQueriesContext(connection) as queries:
+            self.get_content('jsonl')
+        self.assertEqual(len(queries), few)
+
+    def test_small_batches_export_every_section(self):
+        content = b''.join(export_articles(self.user, 'jsonl', chunk_size=2))
+        numbers = {}
+        for line in content.splitlines():
+            record = json.loads(line)
+            numbers[record['title']] = [section['number'] for section in record['sections']]
+        self.assertEqual(numbers, {f'Exported article {i}': list(range(1, i + 1))
+                                   for i in range(5)})
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('private:export-articles'), data={'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SectionContentDeferredTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user)
+        for number in range(1, 13):
+            Section.objects.create(article=cls.article, number=number,
+                                   title=f'Section number {number}',
+                                   content='Very long content ' * 100)
+
+    def setUp(self) -> None:
+        self.client.force_login(self.user)
+
+    def get_content_selects(self, queries) -> list[str]:
+        return [query['sql'] for query in queries
+                if query['sql'].startswith('SELECT') and
+                '"core_section"."content"' in query['sql']]
+
+    def test_article_detail_does_not_select_content(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('private:article-detail',
+                                               kwargs={'id': self.article.id}))
+        self.assertEqual([section.number for section in response.context['sections']],
+                         list(range(1, 13)))
+        self.assertContains(response, 'Section number 12')
+        self.assertEqual(self.get_content_selects(queries), [])
+
+    def test_post_section_does_not_select_content(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('private:post-section', kwargs={'id': self.article.id}),
+                                        data={'title': 'Section number 12', 'number': 13,
+                                              'content': 'Content'})
+        self.assertEqual(response.context['form'].errors,
+                         {'title': ['Article already has section with this title.']})
+        self.assertEqual(self.get_content_selects(queries), [])
+
+    def test_update_section_selects_content_of_updated_section_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('private:update-section-section-detail',
+                                                kwargs={'id': self.article.id,
+                                                        'slug': 'section-number-1'}),
+                                        data={'title': 'Section number one', 'number': 12,
+                                              'content': 'Content'})
+        self.assertEqual(response.context['form'].errors,
+                         {'number': ['Article already has section with number 12.']})
+        self.assertEqual(len(self.get_content_selects(queries)), 1)
+
+    def test_numbers_with_several_digits_are_checked(self):
+        # Only the first digit of the number used to be checked, so 12
+        # clashed with section number 1.
+        response = self.client.post(reverse('private:post-section', kwargs={'id': self.article.id}),
+                                    data={'title': 'Section number 13', 'number': 13,
+                                          'content': 'Content'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(self.article.sections.filter(number=13).exists())
+
+
+class TemplateFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=cls.category,
+                                             author=cls.user)
+        Section.objects.create(article=cls.article, number=1, title='Ionic bonds',
+                               content='Content')
+
+    def setUp(self) -> None:
+        caches['template_fragments'].clear()
+        self.client.force_login(self.user)
+        self.detail_url = reverse('private:article-detail', kwargs={'id': self.article.id})
+
+    def get_card(self) -> str:
+        article = Article.objects.select_related('category').get(pk=self.article.pk)
+        return caches['template_fragments'].get(make_template_fragment_key(
+            'private-article-card',
+            [article.id, article.updated, article.sections_count, article.category.title]))
+
+    def test_cached_card_has_no_csrf_token(self):
+        response = self.client.get(reverse('private:article-list'))
+        card = self.get_card()
+        self.assertIn('Ionic compounds', card)
+        self.assertNotIn('csrfmiddlewaretoken', card)
+        # The token is rendered once, in the form the cards submit.
+        self.assertContains(response, 'csrfmiddlewaretoken', count=1)
+
+    def test_new_section_changes_cached_card(self):
+        self.client.get(reverse('private:article-list'))
+        Section.objects.create(article=self.article, number=2, title='Covalent bonds',
+                               content='Content')
+        self.assertIsNone(self.get_card())
+        response = self.client.get(reverse('private:article-list'))
+        self.assertContains(response, '<strong>Number of sections:</strong> 2', html=True)
+
+    def test_cached_section_list_saves_query_for_sections(self):
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(self.detail_url)
+        with self.assertNumQueries(len(first) - 1):
+            response = self.client.get(self.detail_url)
+        self.assertContains(response, 'Ionic bonds')
+        # Status, article deletion and the form of the section buttons.
+        self.assertContains(response, 'csrfmiddlewaretoken', count=3)
+
+    def test_updated_section_changes_cached_section_list(self):
+        self.client.get(self.detail_url)
+        section = Section.objects.get(article=self.article)
+        section.title = 'Ionic lattices'
+        section.save()
+        response = self.client.get(self.detail_url)
+        self.assertContains(response, 'Ionic lattices')
+        self.assertNotContains(response, 'Ionic bonds')
+
+
+class AsyncViewsTest(TestCase):
+    # The read views are async, these requests go through the async
+    # handler, as under ASGI.
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.other_user = CustomUser.objects.create_user(
+            username='other_user',
+            email='other_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds', category=category,
+                                             author=cls.user)
+        cls.section = Section.objects.create(article=cls.article, title='Salts', number=1,
+                                             content='Content')
+        cls.other_article = Article.objects.create(title='Covalent bonds', category=category,
+                                                   author=cls.other_user)
+
+    def setUp(self) -> None:
+        self.async_client.force_login(self.user)
+
+    async def test_article_list(self):
+        response = await self.async_client.get(reverse('private:article-list'))
+        self.assertContains(response, 'Ionic compounds')
+        self.assertNotContains(response, 'Covalent bonds')
+        self.assertEqual(response.context['total_count'], 1)
+        self.assertLessEqual(response.query_count,
+                             settings.QUERY_BUDGETS['private:article-list'])
+
+    async def test_article_and_section_detail(self):
+        response = await self.async_client.get(reverse('private:article-detail',
+                                                       kwargs={'id': self.article.id}))
+        self.assertContains(response, 'Salts')
+        response = await self.async_client.get(reverse('private:section-detail',
+                                                       kwargs={'id': self.article.id,
+                                                               'slug': self.section.slug}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['section'], self.section)
+        response = await self.async_client.get(reverse('private:article-detail',
+                                                       kwargs={'id': self.other_article.id}))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_search(self):
+        response = await self.async_client.get(reverse('private:search-articles'),
+                                               data={'query': 'ionic'})
+        self.assertEqual(response.context['articles'], [self.article])
+        response = await self.async_client.post(reverse('private:search-articles'))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_anonymous_user_is_redirected_to_login(self):
+        for url in (reverse('private:article-list'),
+                    reverse('private:search-articles') + '?query=ionic'):
+            response = await AsyncClient().get(url)
+            self.assertRedirects(response, f'{settings.LOGIN_URL}?next={quote(url)}',
+                                 fetch_redirect_response=False)
+
+
+@override_settings(ARTICLE_INDEX_CACHE_ALIAS='article_index')
+class ArticleIndexTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.category = Category.objects.create(title='Chemistry')
+        cls.articles = Article.objects.bulk_create([
+            Article(title=f'Article number {i} about topic{i % 3}', category=cls.category,
+                    author=cls.user, is_ready=i % 2 == 0)
+            for i in range(25)
+        ])
+        for article in cls.articles:
+            SearchToken.objects.bulk_create([
+                SearchToken(author=cls.user, article=article, token=f'topic{i}', weight=8)
+                for i in range(3) if article.title.endswith(f'topic{i}')
+            ])
+        cls.article = Article.objects.create(title='Ionic compounds', category=cls.category,
+                                             author=cls.user)
+        Section.objects.create(article=cls.article, title='Salts', number=1, content='Content')
+        cls.article.tags.set(Tag.objects.resolve(['salts']))
+
+    def setUp(self) -> None:
+        caches['article_index'].clear()
+        self.client.force_login(self.user)
+        self.url = reverse('private:article-list')
+
+    def get_listed(self) -> dict:
+        response = self.client.get(self.url, data={'ordering': '-published'})
+        return {article.id: article for article in response.context['articles']}
+
+    def collect_pages(self, data: dict) -> list[list]:
+        pages = []
+        while True:
+            response = self.client.get(self.url, data=data)
+            self.assertEqual(response.status_code, 200)
+            pages.append([article.id for article in response.context['articles']])
+            page = response.context['page_obj']
+            if not page.has_next:
+                return pages
+            data = {**data, 'after': page.next_cursor}
+
+    def test_list_is_served_from_index(self):
+        self.client.get(self.url)
+        # The session and the user.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, data={'ordering': '-published'})
+        self.assertEqual(response.context['total_count'], 26)
+        self.assertContains(response, 'Ionic compounds')
+        self.assertContains(response, 'salts')
+
+    def test_pages_match_pages_read_from_database(self):
+        for ordering in ArticleListView.allowed_orderings:
+            for status in ('', 'ready', 'not-ready'):
+                data = {'ordering': ordering, 'status': status}
+                with override_settings(ARTICLE_INDEX_CACHE_ALIAS=None):
+                    expected = self.collect_pages(data)
+                self.assertEqual(self.collect_pages(data), expected)
+
+    def test_search_takes_found_articles_from_index(self):
+        self.client.get(self.url)
+        # The session, the user and the ranks.
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('private:search-articles'),
+                                       data={'query': 'topic1'})
+        self.assertEqual(len(response.context['articles']), 8)
+
+    def test_search_does_not_load_index(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('private:search-articles'),
+                                       data={'query': 'topic1'})
+        self.assertEqual(len(response.context['articles']), 8)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('private:search-articles'), data={'query': 'topic1'})
+
+    def test_committed_writes_are_listed(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('private:update-article-through-list',
+                                     kwargs={'id': self.article.id}),
+                             data={'title': 'Ionic lattices', 'category': self.category.id,
+                                   'tags_string': 'salts, crystals'})
+        listed = self.get_listed()[self.article.id]
+        self.assertEqual(listed.title, 'Ionic lattices')
+        self.assertEqual(sorted(listed.tag_names), ['crystals', 'salts'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('private:post-section', kwargs={'id': self.article.id}),
+                             data={'title': 'Lattices', 'number': 2, 'content': 'Content'})
+        self.assertEqual(self.get_listed()[self.article.id].sections_count, 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('private:set-article-status-through-list',
+                                     kwargs={'id': self.article.id}))
+        self.assertTrue(self.get_listed()[self.article.id].is_ready)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('private:delete-article', kwargs={'id': self.articles[0].id}))
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['total_count'], 25)
+
+    def test_rolled_back_writes_keep_index(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Article.objects.create(title='Rolled back article', category=self.category,
+                                       author=self.user)
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        # The session and the user.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['total_count'], 26)
+
+    def test_imported_articles_are_listed(self):
+        self.client.get(self.url)
+        file = SimpleUploadedFile('articles.jsonl', json.dumps(
+            {'title': 'Imported article', 'category': 'Chemistry', 'tags': [],
+             'sections': []}).encode())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('private:import-articles'), data={'file': file})
+        response = self.client.get(self.url, data={'ordering': '-published'})
+        self.assertEqual(response.context['total_count'], 27)
+        self.assertContains(response, 'Imported article')
+
+    @override_settings(ARTICLE_INDEX_MAX_ARTICLES=10)
+    def test_authors_with_many_articles_are_read_from_database(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertGreater(len(queries), 2)
+        self.assertEqual(response.context['total_count'], 26)
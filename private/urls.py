@@ -36,5 +36,11 @@ urlpatterns = [
          name='set-article-status-through-detail'),
     path('you/articles/<uuid:id>/set_status/list/', views.SetArticleStatusThroughArticleListView.as_view(),
          name='set-article-status-through-list'),
-    path('you/articles/search/', views.search_for_articles, name='search-articles')
+    path('you/articles/search/', views.search_for_articles, name='search-articles'),
+    path('you/articles/<uuid:id>/readiness/', views.ArticleReadinessView.as_view(),
+         name='article-readiness'),
+    path('you/articles/<uuid:id>/reorder-sections/', views.ReorderSectionsView.as_view(),
+         name='reorder-sections'),
+    path('you/import/', views.ImportArticlesView.as_view(), name='import-articles'),
+    path('you/export/', views.ExportArticlesView.as_view(), name='export-articles')
 ]
@@ -1,29 +1,36 @@
-from typing import Any, Dict, Optional, Type
+from typing import Any, Dict, Iterable, Optional, Type
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import models
-from django.db.models.query_utils import Q
-from django.db.models import Count
+from django.db import transaction
+from django.db.models import F
 from django.db.models.query import QuerySet
 from django.forms.models import BaseModelForm
 from django.urls import converters
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, Http404, HttpResponseBadRequest
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, HttpResponseBadRequest, \
+    HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.utils.decorators import method_decorator
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_http_methods
 from django.shortcuts import render
+from django.template.response import TemplateResponse
 from django.urls import reverse_lazy, reverse
+from django.utils import timezone
 from django.views import View
 from django.views.generic import DetailView, ListView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
-from django.shortcuts import get_object_or_404, redirect
-from django.core.exceptions import PermissionDenied
-from django.forms import Form
-from django.http import HttpRequest
+from django.shortcuts import redirect
 
-from private.forms import CreateUpdateArticleForm, CreateUpdateSectionForm
-from core.models import Article, Section, Tag
+from private.cache import IndexedArticle, aget_article_index, invalidate_article_indexes
+from private.forms import CreateUpdateArticleForm, CreateUpdateSectionForm, ImportArticlesForm
+from private.exporting import FORMATS as EXPORT_FORMATS, export_articles
+from private.importing import get_format, import_articles
+from private.mixins import OwnedArticleMixin, TagsStringMixin, UniqueSectionMixin
+from private.pagination import InvalidCursor, KeysetPaginator
+from core.auth import AsyncLoginRequiredMixin, async_login_required
+from core.models import Article, Section
+from core.routers import ReplicaReadsMixin, replica_reads
+from core.search import asearch_articles
 
 
 class UUIDConverter(converters.StringConverter):
@@ -41,39 +48,11 @@ class PrivatePageView(View):
         return super().dispatch(request, *args, **kwargs)
 
 
-class PostArticleView(LoginRequiredMixin, CreateView):
+class PostArticleView(LoginRequiredMixin, TagsStringMixin, CreateView):
     template_name = 'private/publish_article.html'
     form_class = CreateUpdateArticleForm
     model = Article
 
-    def parse_tags(self, tags_str: str) -> list[str]:
-        result = []
-        splitted_tags_str = tags_str.split(',')
-        for tag in splitted_tags_str:
-            if not tag:
-                continue
-            elif tag.isspace():
-                continue
-            else:
-                result.append(tag.strip())
-
-        return result
-
-    def get_tags_objects(self, tags_str: str) -> list[Tag]:
-        tag_objects = []
-        tags_str_list = self.parse_tags(tags_str=tags_str)
-        for tag in tags_str_list:
-            tag = '-'.join(tag.split(' ')).lower()
-            tag_object = Tag.objects.filter(name=tag).first()
-            if tag_object:
-                tag_objects.append(tag_object)
-            else:
-                tag_object = Tag(name=tag)
-                tag_object.save()
-                tag_objects.append(tag_object)
-
-        return tag_objects
-
     def form_valid(self, form) -> HttpResponse:
         form.instance.author = self.request.user
         self.object: Article = form.save()
@@ -86,29 +65,22 @@ class PostArticleView(LoginRequiredMixin, CreateView):
                                             kwargs={'id': self.object.id}))
 
 
-class ArticleDetailView(LoginRequiredMixin, DetailView):
+class ArticleDetailView(ReplicaReadsMixin, AsyncLoginRequiredMixin, OwnedArticleMixin, DetailView):
     template_name = 'private/article_detail.html'
     context_object_name = 'article'
 
-    def get_object(self):
-        # Getting object like this is necessary because default implementation
-        # does not understand uuid as id
-        article = Article.objects.\
-            select_related('author', 'category').\
-            filter(
-                id=self.kwargs['id']).first()
-        if not article:
-            raise Http404
-        return article
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        self.object = await self.aget_article()
+        return self.render_to_response(self.get_context_data(object=self.object))
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
-        object: Article = self.get_object()
-        if object.author != request.user:
-            raise PermissionDenied
-        return super().get(request, *args, **kwargs)
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        # Left lazy, the template skips it when the section list is cached.
+        context['sections'] = Section.objects.outline().filter(article=self.object)
+        return context
 
 
-class UpdateArticleBase(LoginRequiredMixin, View):
+class UpdateArticleBase(LoginRequiredMixin, OwnedArticleMixin, TagsStringMixin, View):
     template_name = 'private/update_article.html'
     form_class = CreateUpdateArticleForm
     redirect_to = ''
@@ -123,42 +95,10 @@ class UpdateArticleBase(LoginRequiredMixin, View):
             return reverse('private:article-list')
 
     def get_object(self):
-        article = Article.objects.\
-            filter(id=self.kwargs['id']).\
-            select_related('author').first()
-        if article.author != self.request.user:
-            raise PermissionDenied
+        article = self.get_article()
         self.article = article
         return article
 
-    def parse_tags(self, tags_str: str) -> list[str]:
-        result = []
-        splitted_tags = tags_str.split(',')
-        for tag in splitted_tags:
-            if tag.isspace():
-                continue
-            elif not tag:
-                continue
-            else:
-                result.append(tag.strip())
-
-        return result
-
-    def get_tags_objects(self, tags_str: str) -> list[Tag]:
-        tag_objects = []
-        tags_str_list = self.parse_tags(tags_str=tags_str)
-        for tag in tags_str_list:
-            tag = tag.replace(' ', '-').lower()
-            tag_object = Tag.objects.filter(name=tag).first()
-            if tag_object:
-                tag_objects.append(tag_object)
-            else:
-                tag_object = Tag(name=tag)
-                tag_object.save()
-                tag_objects.append(tag_object)
-
-        return tag_objects
-
     def get(self, request, *args, **kwargs):
         article = self.get_object()
         if article.is_ready == True:
@@ -201,7 +141,7 @@ class UpdateArticleThroughArticleDetail(UpdateArticleBase):
     send_post_to = 'private:update-article-through-detail'
 
 
-class DeleteArticleView(LoginRequiredMixin, DeleteView):
+class DeleteArticleView(LoginRequiredMixin, OwnedArticleMixin, DeleteView):
     http_method_names = ['post']
     success_url = reverse_lazy('private:article-list')
 
@@ -210,67 +150,95 @@ class DeleteArticleView(LoginRequiredMixin, DeleteView):
         return super().post(request, *args, **kwargs)
 
     def get_object(self):
-        article = Article.objects.filter(id=self.kwargs['id']).first()
-        if not article:
-            raise Http404
-        if article.author != self.request.user:
-            raise PermissionDenied
-        return article
+        return self.get_article()
 
 
-class ArticleListView(LoginRequiredMixin, ListView):
+class ArticleListView(ReplicaReadsMixin, AsyncLoginRequiredMixin, ListView):
     template_name = 'private/article_list.html'
     context_object_name = 'articles'
+    paginate_by = 20
+    default_ordering = '-id'
     allowed_orderings = ['sections_number', '-sections_number',
                          'published', '-published']
+    ordering_fields = {'sections_number': 'sections_count'}
+    statuses = {'ready': True, 'not-ready': False}
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
         ordering = self.request.GET.get('ordering')
-        if ordering and ordering not in self.allowed_orderings:
+        status = self.request.GET.get('status')
+        if ordering and ordering not in self.allowed_orderings or \
+                status and status not in self.statuses:
             return HttpResponseBadRequest()
         self.ordering = ordering
-        return super().get(request, *args, **kwargs)
+        self.status = status
+        self.object_list = self.get_queryset()
+        paginator = KeysetPaginator(self.object_list,
+                                    ordering=self.get_ordering(),
+                                    per_page=self.paginate_by)
+        after = self.request.GET.get('after')
+        before = self.request.GET.get('before')
+        # Served without queries from the cached article index of the
+        # author, when the index is on.
+        index = await aget_article_index(self.request.user.pk)
+        try:
+            if index is not None:
+                page = paginator.get_list_page(self.filter_indexed(index.values()),
+                                               after=after, before=before)
+            else:
+                page = await paginator.aget_page(after=after, before=before)
+                page.object_list = [IndexedArticle.from_article(article)
+                                    for article in page.object_list]
+        except InvalidCursor:
+            return HttpResponseBadRequest()
+        self.pagination = (paginator, page, page.object_list,
+                           page.has_next or page.has_previous)
+        if index is not None:
+            total_count = len(index)
+        else:
+            # Counted separately, so that the page itself never has to load
+            # every article of the author.
+            total_count = await Article.objects.\
+                filter(author=self.request.user).acount()
+        return self.render_to_response(self.get_context_data(total_count=total_count))
 
     def get_queryset(self) -> QuerySet[Any]:
         queryset = Article.objects.\
             filter(author=self.request.user).\
             select_related('category').\
-            prefetch_related('tags').all().\
-            annotate(sections_number=Count('sections'))
-        ordering = self.ordering
-        if not ordering:
-            return queryset.order_by('-id')
-        else:
-            return queryset.order_by(ordering)
+            prefetch_related('tags').all()
+        if self.status:
+            queryset = queryset.filter(is_ready=self.statuses[self.status])
+        return queryset
+
+    def filter_indexed(self, articles: Iterable[IndexedArticle]) -> list[IndexedArticle]:
+        if not self.status:
+            return list(articles)
+        return [article for article in articles
+                if article.is_ready == self.statuses[self.status]]
+
+    def get_ordering(self) -> str:
+        ordering = self.ordering or self.default_ordering
+        field = ordering.lstrip('-')
+        return ordering.replace(field, self.ordering_fields.get(field, field))
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int):
+        # Fetched by get with the async ORM.
+        return self.pagination
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context['ordering'] = self.ordering or ''
+        context['status'] = self.status or ''
+        return context
 
 
-class PostSectionView(LoginRequiredMixin, View):
+class PostSectionView(LoginRequiredMixin, OwnedArticleMixin, UniqueSectionMixin, View):
     template_name = 'private/post_section.html'
     form_class = CreateUpdateSectionForm
     info_message = 'You cannot post new section for article while its status is "Ready".'
 
-    def add_error_if_section_number_is_not_unique(self, form_data, article, form: Form):
-        sections: list[Section] = article.sections.all()
-        numbers_of_sections = [
-            section.number for section in sections]
-        section_number = int(form_data['number'][0])
-        if section_number in numbers_of_sections:
-            form.add_error(
-                'number', f'Article already has section with number {section_number}.')
-
-    def add_error_if_not_unique_title_for_section(self, form_data, article, form: Form):
-        sections: list[Section] = article.sections.all()
-        titles_of_sections = [section.title for section in sections]
-        section_title = form_data['title']
-        if section_title in titles_of_sections:
-            form.add_error(
-                'title', f'Article already has section with this title.'
-            )
-
     def get(self, request, *args, **kwargs):
-        article = get_object_or_404(Article, id=self.kwargs['id'])
-        if article.author != self.request.user:
-            raise PermissionDenied
+        article = self.get_article()
         if article.is_ready == True:
             messages.info(request, self.info_message)
             return HttpResponseRedirect(reverse('private:article-detail',
@@ -281,20 +249,13 @@ class PostSectionView(LoginRequiredMixin, View):
         return render(request, self.template_name, context=context)
 
     def post(self, request: HttpRequest, *args, **kwargs):
-        article = get_object_or_404(Article, id=self.kwargs['id'])
-        if article.author != request.user:
-            raise PermissionDenied
+        article = self.get_article()
         if article.is_ready == True:
             messages.info(request, self.info_message)
             return HttpResponseRedirect(reverse('private:article-detail',
                                                 kwargs={'id': article.id}))
         form = self.form_class(request.POST)
-        self.add_error_if_section_number_is_not_unique(form_data=request.POST,
-                                                       article=article,
-                                                       form=form)
-        self.add_error_if_not_unique_title_for_section(form_data=request.POST,
-                                                       article=article,
-                                                       form=form)
+        self.add_errors_if_section_is_not_unique(form=form, article=article)
         if form.is_valid():
             form.instance.article = article
             form.save()
@@ -306,24 +267,14 @@ class PostSectionView(LoginRequiredMixin, View):
         return render(request, self.template_name, context=context)
 
 
-class SectionDetailView(LoginRequiredMixin, DetailView):
+class SectionDetailView(ReplicaReadsMixin, AsyncLoginRequiredMixin, OwnedArticleMixin, DetailView):
     template_name = 'private/section_detail.html'
     context_object_name = 'section'
 
-    def get_object(self):
-        article_id = self.kwargs['id']
-        section_slug = self.kwargs['slug']
-        article = Article.objects.filter(id=article_id).first()
-        if not article:
-            raise Http404
-        if article.author != self.request.user:
-            raise PermissionDenied
-        self.article = article
-        section = Section.objects.filter(
-            Q(slug=section_slug) &
-            Q(article=article)
-        ).first()
-        return section
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        self.object = await self.aget_section()
+        self.article = self.object.article
+        return self.render_to_response(self.get_context_data(object=self.object))
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
@@ -331,7 +282,7 @@ class SectionDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class UpdateSectionBase(LoginRequiredMixin, View):
+class UpdateSectionBase(LoginRequiredMixin, OwnedArticleMixin, UniqueSectionMixin, View):
     redirect_to = ''
     send_post_to = ''
     template_name = 'private/update_section.html'
@@ -339,43 +290,9 @@ class UpdateSectionBase(LoginRequiredMixin, View):
     success_message = 'You successfully updated a section!'
     info_message = """You cannot update a section while article's status is "Ready"."""
 
-    def get_section(self, article: Article, slug: str) -> Http404 | Section:
-        section = Section.objects.filter(
-            Q(article=article) &
-            Q(slug=slug)
-        ).first()
-        if not section:
-            raise Http404
-        else:
-            return section
-
-    def add_error_if_not_unique_number_for_section(self, form_data, article: Article, form: Form, section: Section):
-        sections: list[Section] = article.sections.all()
-        numbers_of_sections = [
-            section.number for section in sections]
-        numbers_of_sections.remove(section.number)
-        section_number = int(form_data['number'][0])
-        if (section_number in numbers_of_sections):
-            form.add_error(
-                'number', f'Article already has section with number {section_number}.')
-
-    def add_error_if_not_unique_title_for_section(self, form_data, article: Article, form: Form, section: Section):
-        sections: list[Section] = article.sections.all()
-        titles_of_sections = [
-            section.title for section in sections]
-        titles_of_sections.remove(section.title)
-        section_title = form_data['title']
-        if (section_title in titles_of_sections):
-            form.add_error(
-                'title', f'Article already has section with this title.'
-            )
-
     def get(self, request, *args, **kwargs):
-        article = get_object_or_404(Article, id=self.kwargs['id'])
-        current_user = self.request.user
-        if article.author != current_user:
-            raise PermissionDenied
-        section = self.get_section(article=article, slug=self.kwargs['slug'])
+        section = self.get_section()
+        article = section.article
         if article.is_ready == True:
             messages.info(self.request, self.info_message)
             return HttpResponseRedirect(reverse('private:article-detail',
@@ -388,24 +305,15 @@ class UpdateSectionBase(LoginRequiredMixin, View):
         return render(request, self.template_name, context=context)
 
     def post(self, request, *args, **kwargs):
-        article = get_object_or_404(Article, id=self.kwargs['id'])
-        current_user = self.request.user
-        if article.author != current_user:
-            raise PermissionDenied
-        section = self.get_section(article=article, slug=self.kwargs['slug'])
+        section = self.get_section()
+        article = section.article
         if article.is_ready == True:
             messages.info(self.request, self.info_message)
             return HttpResponseRedirect(reverse('private:article-detail',
                                                 kwargs={'id': article.id}))
         form = self.form_class(request.POST, instance=section)
-        self.add_error_if_not_unique_number_for_section(form_data=request.POST,
-                                                        article=article,
-                                                        form=form,
-                                                        section=section)
-        self.add_error_if_not_unique_title_for_section(form_data=request.POST,
-                                                       article=article,
-                                                       form=form,
-                                                       section=section)
+        self.add_errors_if_section_is_not_unique(form=form, article=article,
+                                                 section=section)
         if form.is_valid():
             form.save()
             messages.success(request, self.success_message)
@@ -433,7 +341,7 @@ class UpdateSectionThroughSectionDetailView(UpdateSectionBase):
     send_post_to = 'private:update-section-section-detail'
 
 
-class DeleteSectionView(LoginRequiredMixin, DeleteView):
+class DeleteSectionView(LoginRequiredMixin, OwnedArticleMixin, DeleteView):
     http_method_names = ['post']
 
     def get_success_url(self) -> str:
@@ -455,77 +363,27 @@ class DeleteSectionView(LoginRequiredMixin, DeleteView):
         return HttpResponseRedirect(success_url)
 
     def get_object(self):
-        article_id = self.kwargs['id']
-        section_slug = self.kwargs['slug']
-        article = Article.objects.filter(id=article_id).first()
-        if not article:
-            raise Http404
-        if article.author != self.request.user:
-            raise PermissionDenied
-        self.article = article
-        section = Section.objects.filter(
-            Q(slug=section_slug) &
-            Q(article=article)
-        ).first()
+        section = self.get_section()
+        self.article = section.article
         return section
 
 
-class SetArticleStatusBase(LoginRequiredMixin, View):
+class SetArticleStatusBase(LoginRequiredMixin, OwnedArticleMixin, View):
     http_method_names = ['post']
 
-    def sections_numbers_has_1(self, sections: list[Section]):
-        numbers_of_sections = [section.number for section in sections]
-
-        if 1 not in numbers_of_sections:
-            return False
-        return True
-
-    def sections_numbers_are_consecutive_integers(self, sections: list[Section]):
-        numbers_of_sections = [section.number for section in sections]
-        numbers_of_sections = sorted(numbers_of_sections)
-
-        first_number = numbers_of_sections[0]
-        last_number = numbers_of_sections[-1]
-
-        expected_numbers = []
-        expected_numbers.append(first_number)
-
-        while first_number != last_number:
-            first_number += 1
-            expected_numbers.append(first_number)
-
-        if expected_numbers != numbers_of_sections:
-            return False
-        return True
-
     def get_redirect_url(self) -> HttpResponseRedirect:
         pass
 
     def post(self, request: HttpRequest, *args, **kwargs):
-        current_user = request.user
-        article = get_object_or_404(Article, id=self.kwargs['id'])
-        if article.author != current_user:
-            raise PermissionDenied
+        article = self.get_article()
         self.article = article
         if article.is_ready == False:
             # If status 'Not Ready', then it means user wants to
             # change it to 'Ready' and some checks will we done
-            sections: list[Section] = article.sections.all()
-            if not sections:
-                messages.info(request,
-                              message='Create at least one section before setting status to "Ready".')
-                return self.get_redirect_url()
-            if not self.sections_numbers_has_1(sections=sections):
-                messages.info(
-                    request,
-                    message='Make sure that there is a section with number 1 among sections of this article.'
-                )
-                return self.get_redirect_url()
-            if not self.sections_numbers_are_consecutive_integers(sections=sections):
-                messages.info(
-                    request,
-                    message='Make sure numbers of your sections are consecutive integers.'
-                )
+            violations = article.get_publish_violations()
+            if violations:
+                for violation in violations:
+                    messages.info(request, message=violation)
                 return self.get_redirect_url()
             article.is_ready = True
             article.save()
@@ -553,19 +411,117 @@ class SetArticleStatusThroughArticleListView(SetArticleStatusBase):
         return HttpResponseRedirect(reverse('private:article-list'))
 
 
-@login_required
-@require_http_methods(request_method_list=['GET'])
-def search_for_articles(request: HttpRequest):
+class ReorderSectionsView(LoginRequiredMixin, OwnedArticleMixin, View):
+    http_method_names = ['post']
+    info_message = """You cannot reorder sections while article's status is "Ready"."""
+
+    def get_redirect_url(self) -> HttpResponseRedirect:
+        return HttpResponseRedirect(reverse('private:article-detail',
+                                            kwargs={'id': self.get_article().id}))
+
+    def reorder(self, article: Article, slugs: list[str]) -> bool:
+        # Numbers sections 1, 2, ..., n in the order of slugs with a
+        # constant number of statements. Numbers are negated first, so
+        # that no intermediate state collides with the (article, number)
+        # unique constraint.
+        with transaction.atomic():
+            sections = list(Section.objects.
+                            select_for_update().
+                            filter(article=article).
+                            only('id', 'slug', 'number'))
+            sections_by_slug = {section.slug: section for section in sections}
+            if len(slugs) != len(sections) or set(slugs) != set(sections_by_slug):
+                return False
+            Section.objects.filter(article=article).update(number=-F('number'))
+            now = timezone.now()
+            for number, slug in enumerate(slugs, start=1):
+                section = sections_by_slug[slug]
+                section.number = number
+                section.updated = now
+            Section.objects.bulk_update(sections, ['number', 'updated'])
+            # bulk_update sends no signals, see core.signals.
+            Article.objects.filter(pk=article.pk).update(updated=now)
+            invalidate_article_indexes([article.author_id])
+        return True
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        article = self.get_article()
+        if article.is_ready == True:
+            messages.info(request, self.info_message)
+            return self.get_redirect_url()
+        if not self.reorder(article, request.POST.getlist('order')):
+            messages.info(request,
+                          message='New order has to contain every section of the article exactly once.')
+            return self.get_redirect_url()
+        messages.success(request, 'You successfully reordered sections of your article.')
+        return self.get_redirect_url()
+
+
+class ImportArticlesView(LoginRequiredMixin, View):
+    template_name = 'private/import_articles.html'
+    form_class = ImportArticlesForm
+    # Number of invalid records shown to the user, the rest is only counted.
+    shown_errors = 10
+
+    def get(self, request, *args, **kwargs):
+        return render(request, self.template_name, context={'form': self.form_class()})
+
+    def post(self, request: HttpRequest, *args, **kwargs):
+        form = self.form_class(request.POST, request.FILES)
+        if not form.is_valid():
+            return render(request, self.template_name, context={'form': form})
+        file = form.cleaned_data['file']
+        report = import_articles(request.user, file, get_format(file.name))
+        for error in report.errors[:self.shown_errors]:
+            messages.info(request, message=str(error))
+        if report.invalid > self.shown_errors:
+            messages.info(
+                request, message=f'{report.invalid - self.shown_errors} more records were not imported.')
+        messages.success(
+            request, f'You imported {report.articles} articles with {report.sections} sections.')
+        return HttpResponseRedirect(reverse('private:article-list'))
+
+
+class ExportArticlesView(LoginRequiredMixin, View):
+    default_format = 'jsonl'
+
+    def get(self, request: HttpRequest, *args, **kwargs):
+        format = request.GET.get('format', self.default_format)
+        if format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest()
+        content_type, filename = EXPORT_FORMATS[format]
+        response = StreamingHttpResponse(export_articles(request.user, format),
+                                         content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ArticleReadinessView(LoginRequiredMixin, OwnedArticleMixin, View):
+    http_method_names = ['get']
+
+    def get(self, request: HttpRequest, *args, **kwargs):
+        article = self.get_article()
+        violations = article.get_publish_violations()
+        return JsonResponse({'id': str(article.id),
+                             'is_ready': article.is_ready,
+                             'can_be_ready': not violations,
+                             'violations': violations})
+
+
+@replica_reads
+@async_login_required
+async def search_for_articles(request: HttpRequest):
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
     query = request.GET.get('query')
     if not query:
         return redirect('private:article-list')
     current_user = request.user
-    tag_object = Tag.objects.filter(name__icontains=query).first()
-    articles = Article.objects.\
-        filter(Q(title__icontains=query) |
-               Q(category__title__icontains=query) |
-               Q(tags=tag_object)).filter(author=current_user).\
-        all().order_by('-published')
-    return render(request, 'private/search_results.html',
-                  context={'articles': articles,
-                           'query': query})
+    # Found articles are a few of the author's, not worth loading the
+    # index for when it is not cached.
+    articles_by_id = await aget_article_index(current_user.pk, load=False)
+    articles = await asearch_articles(author=current_user, query=query,
+                                      articles_by_id=articles_by_id)
+    return TemplateResponse(request, 'private/search_results.html',
+                            context={'articles': articles,
+                                     'query': query})
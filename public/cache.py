@@ -0,0 +1,110 @@
+import hashlib
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.models import Section
+
+
+CATEGORY_PAGE_TIMEOUT = 60 * 15
+
+
+def get_public_cache():
+    # The cache of category pages and article metas, see
+    # PUBLIC_PAGES_CACHE_ALIAS.
+    return caches[getattr(settings, 'PUBLIC_PAGES_CACHE_ALIAS', 'default')]
+
+
+def get_category_version_key(category_id) -> str:
+    return f'public:category:{category_id}:version'
+
+
+async def aget_category_version(category_id) -> int:
+    cache = get_public_cache()
+    key = get_category_version_key(category_id)
+    await cache.aadd(key, 1, timeout=None)
+    return await cache.aget(key, 1)
+
+
+def bump_category_version(category_id):
+    cache = get_public_cache()
+    key = get_category_version_key(category_id)
+    if not cache.add(key, 2, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 2, timeout=None)
+
+
+def invalidate_category(category_id):
+    # Cached pages embed the version in their key, bumping it makes every
+    # cached page of the category stale at once, they expire on their own.
+    # It is bumped once the current transaction commits, a page read before
+    # would be cached under the new version otherwise.
+    transaction.on_commit(lambda: bump_category_version(category_id))
+
+
+async def aget_category_page_key(category_id, page_number) -> str:
+    version = await aget_category_version(category_id)
+    return f'public:category:{category_id}:v{version}:page:{page_number}'
+
+
+ARTICLE_META_TIMEOUT = 60 * 60
+
+
+def get_article_meta_key(article_id) -> str:
+    return f'public:article:{article_id}:meta'
+
+
+def get_article_meta(article_id) -> dict | None:
+    # Table of contents, ETag and Last-Modified of a ready article. They are
+    # all built from one query on a cache miss and let conditional requests
+    # be answered without touching the database. None means that there is
+    # no ready article with this id.
+    cache = get_public_cache()
+    key = get_article_meta_key(article_id)
+    meta = cache.get(key)
+    if meta is not None:
+        return meta or None
+    sections = list(Section.objects.
+                    filter(article_id=article_id, article__is_ready=True).
+                    order_by('number').
+                    values('number', 'title', 'slug', 'reading_time', 'content_hash',
+                           'updated', 'article__updated', 'article__category__title',
+                           'article__author__username'))
+    if not sections:
+        cache.set(key, {}, ARTICLE_META_TIMEOUT)
+        return None
+    last_modified = max([sections[0]['article__updated']] +
+                        [section['updated'] for section in sections])
+    # content_hash changes when sections are re-rendered by a newer
+    # renderer, which does not touch updated. Renaming the category or the
+    # author changes neither, their names are part of the page too.
+    etag = hashlib.md5(repr([(section['slug'], section['updated'], section['content_hash'])
+                             for section in sections]).encode() +
+                       sections[0]['article__updated'].isoformat().encode() +
+                       repr((sections[0]['article__category__title'],
+                             sections[0]['article__author__username'])).encode()).hexdigest()
+    meta = {
+        'toc': [{'number': section['number'],
+                 'title': section['title'],
+                 'slug': section['slug'],
+                 'reading_time': section['reading_time']} for section in sections],
+        'etag': etag,
+        'last_modified': last_modified,
+        'reading_time': sum(section['reading_time'] for section in sections),
+    }
+    cache.set(key, meta, ARTICLE_META_TIMEOUT)
+    return meta
+
+
+def invalidate_article(article_id):
+    invalidate_articles([article_id])
+
+
+def invalidate_articles(article_ids: Iterable):
+    # Dropped once the current transaction commits, like category versions.
+    keys = [get_article_meta_key(article_id) for article_id in article_ids]
+    transaction.on_commit(lambda: get_public_cache().delete_many(keys))
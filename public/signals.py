@@ -0,0 +1,92 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import Article, Category, Section
+from core.signals import sections_rendered
+from public.cache import invalidate_article, invalidate_articles, invalidate_category
+from users.models import CustomUser
+
+
+@receiver(pre_save, sender=Article)
+def remember_previous_category(sender, instance: Article, raw=False, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._previous_category_id = Article.objects.\
+        filter(pk=instance.pk).values_list('category_id', flat=True).first()
+
+
+@receiver(post_save, sender=Article)
+def invalidate_category_of_saved_article(sender, instance: Article, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_category(instance.category_id)
+    invalidate_article(instance.pk)
+    previous_category_id = getattr(instance, '_previous_category_id', None)
+    if previous_category_id and previous_category_id != instance.category_id:
+        invalidate_category(previous_category_id)
+
+
+@receiver(post_delete, sender=Article)
+def invalidate_category_of_deleted_article(sender, instance: Article, **kwargs):
+    invalidate_category(instance.category_id)
+    invalidate_article(instance.pk)
+
+
+@receiver(m2m_changed, sender=Article.tags.through)
+def invalidate_category_of_article_with_changed_tags(sender, instance, action, reverse, **kwargs):
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    invalidate_category(instance.category_id)
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_article_of_section(sender, instance: Section, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_article(instance.article_id)
+
+
+@receiver(sections_rendered)
+def invalidate_articles_of_rendered_sections(sender, article_ids, **kwargs):
+    for article_id in article_ids:
+        invalidate_article(article_id)
+
+
+def invalidate_pages_of_articles(articles: QuerySet[Article]):
+    # Category pages list their articles, article pages show the category
+    # and the author.
+    rows = list(articles.filter(is_ready=True).values_list('id', 'category_id'))
+    for category_id in {category_id for _, category_id in rows}:
+        invalidate_category(category_id)
+    invalidate_articles(article_id for article_id, _ in rows)
+
+
+@receiver(post_save, sender=Category)
+def invalidate_pages_of_saved_category(sender, instance: Category, created=False,
+                                       raw=False, **kwargs):
+    if raw or created:
+        return
+    invalidate_category(instance.pk)
+    invalidate_pages_of_articles(instance.articles.all())
+
+
+@receiver(pre_save, sender=CustomUser)
+def remember_previous_username(sender, instance: CustomUser, raw=False,
+                               update_fields=None, **kwargs):
+    # Users are saved on every login (last_login), only saves that may
+    # rename them are looked at.
+    if raw or instance._state.adding or \
+            update_fields is not None and 'username' not in update_fields:
+        return
+    instance._previous_username = CustomUser.objects.\
+        filter(pk=instance.pk).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_pages_of_renamed_author(sender, instance: CustomUser, raw=False, **kwargs):
+    previous_username = instance.__dict__.pop('_previous_username', None)
+    if raw or previous_username is None or previous_username == instance.username:
+        return
+    invalidate_pages_of_articles(Article.objects.filter(author=instance))
@@ -1,3 +1,224 @@
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import Article, Category, Section, Tag
+from users.models import CustomUser
+
+
+class ArticlesByCategoryViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        cls.category = Category.objects.create(title='Chemistry')
+        cls.other_category = Category.objects.create(title='Biology')
+        cls.url = reverse('public:articles-by-category', kwargs={'id': cls.category.id})
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def create_articles(self, count, is_ready=True, category=None):
+        articles = Article.objects.bulk_create([
+            Article(title=f'Article number {i}', author=self.user,
+                    category=category or self.category, is_ready=is_ready)
+            for i in range(count)
+        ])
+        tag = Tag.objects.create(name=f'tag-{Tag.objects.count()}')
+        for article in articles:
+            article.tags.add(tag)
+        return articles
+
+    def test_only_ready_articles_of_category_are_listed(self):
+        ready_articles = self.create_articles(3)
+        self.create_articles(2, is_ready=False)
+        self.create_articles(2, category=self.other_category)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'public/articles_by_category.html')
+        self.assertEqual(set(response.context['articles']), set(ready_articles))
+        self.assertEqual(response.context['category'], self.category)
+
+    def test_unknown_category(self):
+        response = self.client.get(reverse('public:articles-by-category',
+                                           kwargs={'id': 'aaaa-bbbb'}))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('public:articles-by-category',
+                                           kwargs={'id': self.other_category.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['category'], self.other_category)
+
+    def test_number_of_queries_does_not_depend_on_number_of_articles(self):
+        self.create_articles(2)
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        cache.clear()
+        self.create_articles(20)
+        with self.assertNumQueries(3):
+            self.client.get(self.url, data={'page': 2})
+
+    def test_pages_are_cached_until_article_changes(self):
+        article = self.create_articles(1)[0]
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertTemplateNotUsed(response, 'public/articles_by_category.html')
+        self.assertContains(response, article.title)
+        article.is_ready = False
+        with self.captureOnCommitCallbacks(execute=True):
+            article.save()
+        response = self.client.get(self.url)
+        self.assertNotContains(response, article.title)
+
+    def test_pages_are_cached_until_category_or_author_is_renamed(self):
+        self.create_articles(1)
+        self.client.get(self.url)
+        self.category.title = 'Organic chemistry'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Organic chemistry')
+        self.user.username = 'renamed_user'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Author: renamed_user')
+
+    async def test_page_under_async_handler(self):
+        articles = await sync_to_async(self.create_articles)(3)
+        response = await self.async_client.get(self.url)
+        self.assertEqual(set(response.context['articles']), set(articles))
+        self.assertEqual(response.context['paginator'].count, 3)
+        response = await self.async_client.get(self.url)
+        self.assertTemplateNotUsed(response, 'public/articles_by_category.html')
+        self.assertContains(response, articles[0].title)
+
+    def test_pages_are_invalidated_once_committed(self):
+        # A page read before the commit is not cached under the new version.
+        article = self.create_articles(1)[0]
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            article.is_ready = False
+            article.save()
+            response = self.client.get(self.url)
+            self.assertContains(response, article.title)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, article.title)
+
+    def test_pages_are_not_cached_for_users_with_session(self):
+        self.create_articles(1)
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+        self.assertTemplateUsed(response, 'public/articles_by_category.html')
+
+
+class ArticleReaderViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+        category = Category.objects.create(title='Chemistry')
+        cls.article = Article.objects.create(title='Ionic compounds',
+                                             category=category,
+                                             author=cls.user,
+                                             is_ready=True)
+        cls.sections = [
+            Section.objects.create(article=cls.article, number=number,
+                                   title=f'Section number {number}',
+                                   content=f'Content of section {number}')
+            for number in (2, 1, 3)
+        ]
+        cls.url = reverse('public:article-reader', kwargs={'id': cls.article.id})
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_first_section_and_ordered_table_of_contents(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'public/article_reader.html')
+        self.assertEqual(response.context['section'].number, 1)
+        self.assertEqual([entry['number'] for entry in response.context['toc']],
+                         [1, 2, 3])
+        self.assertEqual(response.context['next_section']['number'], 2)
+        self.assertIsNone(response.context['previous_section'])
+        self.assertTrue(response.has_header('ETag'))
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_section_is_served_with_one_query_once_meta_is_cached(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('public:section-reader',
+                                               kwargs={'id': self.article.id,
+                                                       'slug': 'section-number-3'}))
+        self.assertContains(response, 'Content of section 3')
+        self.assertIsNone(response.context['next_section'])
+
+    def test_repeat_readers_get_not_modified_without_queries(self):
+        response = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_when_section_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        section = self.sections[1]
+        section.content = 'Updated content'
+        with self.captureOnCommitCallbacks(execute=True):
+            section.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Updated content')
+
+    def test_etag_changes_when_category_or_author_is_renamed(self):
+        etag = self.client.get(self.url)['ETag']
+        self.article.category.title = 'Organic chemistry'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.category.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Organic chemistry')
+        etag = response['ETag']
+        self.user.username = 'renamed_user'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Author: renamed_user')
+
+    def test_logins_do_not_invalidate_pages(self):
+        self.client.get(self.url)
+        self.client.login(username='new_user', password='34somepassword34')
+        self.client.logout()
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_etag_changes_when_sections_are_rendered_again(self):
+        etag = self.client.get(self.url)['ETag']
+        with mock.patch('core.rendering.RENDERER_VERSION', 'upgraded'), \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command('render_sections', processes=1, stdout=StringIO())
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<p>Content of section 1</p>', html=True)
+
+    def test_not_ready_article_is_not_served(self):
+        Article.objects.filter(pk=self.article.pk).update(is_ready=False)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('public:section-reader',
+                                           kwargs={'id': self.article.id,
+                                                   'slug': 'unknown'}))
+        self.assertEqual(response.status_code, 404)
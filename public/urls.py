@@ -0,0 +1,18 @@
+from django.urls import path, register_converter
+
+from public import views
+from public.views import UUIDConverter
+
+register_converter(UUIDConverter, 'uuid')
+
+app_name = 'public'
+
+
+urlpatterns = [
+    path('categories/<uuid:id>/', views.ArticlesByCategoryView.as_view(),
+         name='articles-by-category'),
+    path('articles/<uuid:id>/', views.ArticleReaderView.as_view(),
+         name='article-reader'),
+    path('articles/<uuid:id>/<str:slug>/', views.ArticleReaderView.as_view(),
+         name='section-reader'),
+]
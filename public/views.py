@@ -1,22 +1,145 @@
-from typing import Any
+import uuid
+from typing import Any, Dict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.views import View
+from django.views.decorators.http import condition
 from django.views.generic import ListView
-from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
-from django.shortcuts import get_object_or_404, redirect
+from django.utils.decorators import method_decorator
+from django.http import HttpRequest, HttpResponse, HttpResponseRedirect, Http404
+from django.shortcuts import redirect, render
 from django.db.models import Count
+from django.db.models.query import QuerySet
 from django.urls import converters
 
-from core.models import Category
+from core.models import Article, Category, Section
+from core.routers import ReplicaReadsMixin
+from public.cache import CATEGORY_PAGE_TIMEOUT, aget_category_page_key, get_article_meta, \
+    get_public_cache
 
 
 class UUIDConverter(converters.StringConverter):
     regex = '[0-9a-f-]+'
 
 
-class ArticlesByCategoryView(ListView):
+class ArticlesByCategoryView(ReplicaReadsMixin, ListView):
     template_name = 'public/articles_by_category.html'
     context_object_name = 'articles'
+    paginate_by = 20
 
-    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
-        category = get_object_or_404(Category, id=self.kwargs['id'])
-        self.category = category
-        return super().get(request, *args, **kwargs)
+    def is_cacheable(self, request: HttpRequest) -> bool:
+        # Only anonymous visitors without a session get the cached page,
+        # anyone else may see their username or flash messages in it.
+        return request.method == 'GET' and \
+            settings.SESSION_COOKIE_NAME not in request.COOKIES and \
+            'messages' not in request.COOKIES
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            self.category_id = uuid.UUID(self.kwargs['id'])
+        except ValueError:
+            raise Http404
+        page_number = request.GET.get('page', '1')
+        if not (self.is_cacheable(request) and page_number.isdigit()):
+            return await self.get_page_response()
+        cache = get_public_cache()
+        cache_key = await aget_category_page_key(self.category_id, page_number)
+        content = await cache.aget(cache_key)
+        if content is not None:
+            return HttpResponse(content)
+        response = await self.get_page_response()
+        await sync_to_async(response.render)()
+        if response.status_code == 200:
+            await cache.aset(cache_key, response.content, CATEGORY_PAGE_TIMEOUT)
+        return response
+
+    async def get_page_response(self) -> HttpResponse:
+        self.object_list = self.get_queryset()
+        # Counted here, so that paginating does not query.
+        self.count = await self.object_list.acount()
+        paginator, page, articles, is_paginated = super().paginate_queryset(
+            self.object_list, self.paginate_by)
+        page.object_list = [article async for article in articles]
+        self.pagination = (paginator, page, page.object_list, is_paginated)
+        # The category comes with the articles, it is only fetched on its
+        # own when the category has no ready articles.
+        if page.object_list:
+            self.category = page.object_list[0].category
+        else:
+            self.category = await Category.objects.filter(id=self.category_id).afirst()
+            if self.category is None:
+                raise Http404
+        return self.render_to_response(self.get_context_data())
+
+    def get_paginator(self, queryset: QuerySet, per_page: int, *args, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, *args, **kwargs)
+        paginator.count = self.count
+        return paginator
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int):
+        # Fetched by get_page_response with the async ORM.
+        return self.pagination
+
+    def get_queryset(self) -> QuerySet[Any]:
+        return Article.objects.\
+            filter(category=self.category_id, is_ready=True).\
+            select_related('author', 'category').\
+            prefetch_related('tags').\
+            order_by('-published', '-id')
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        context['category'] = self.category
+        return context
+
+
+def get_reader_meta(id: str) -> dict | None:
+    try:
+        return get_article_meta(uuid.UUID(id))
+    except ValueError:
+        return None
+
+
+def get_reader_etag(request: HttpRequest, id: str, slug: str = None) -> str | None:
+    meta = get_reader_meta(id)
+    if meta is None:
+        return None
+    return f'{meta["etag"]}-{slug}' if slug else meta['etag']
+
+
+def get_reader_last_modified(request: HttpRequest, id: str, slug: str = None):
+    meta = get_reader_meta(id)
+    return meta['last_modified'] if meta else None
+
+
+class ArticleReaderView(View):
+    template_name = 'public/article_reader.html'
+
+    @method_decorator(condition(etag_func=get_reader_etag,
+                                last_modified_func=get_reader_last_modified))
+    def get(self, request: HttpRequest, id: str, slug: str = None) -> HttpResponse:
+        meta = get_reader_meta(id)
+        if meta is None:
+            raise Http404
+        toc = meta['toc']
+        if slug is None:
+            slug = toc[0]['slug']
+        section = Section.objects.\
+            filter(article_id=id, article__is_ready=True, slug=slug).\
+            select_related('article__category', 'article__author').\
+            defer('content').\
+            first()
+        if section is None:
+            raise Http404
+        position = next((index for index, entry in enumerate(toc)
+                         if entry['slug'] == section.slug), None)
+        context = {
+            'article': section.article,
+            'section': section,
+            'toc': toc,
+            'reading_time': meta['reading_time'],
+            'previous_section': toc[position - 1] if position else None,
+            'next_section': toc[position + 1] if position is not None and
+            position + 1 < len(toc) else None,
+        }
+        return render(request, self.template_name, context=context)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'studilee.settings')
+# Read by the settings, see DB_CONN_MAX_AGE.
+os.environ['DJANGO_SERVED_BY_ASGI'] = 'true'
 
 application = get_asgi_application()
@@ -21,8 +21,8 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('__debug__/', include('debug_toolbar.urls')),
     path('', include('users.urls')),
     path('', include('core.urls')),
-    path('', include('private.urls'))
+    path('', include('private.urls')),
+    path('', include('public.urls'))
 ]
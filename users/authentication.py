@@ -1,22 +1,81 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db.models.functions import Lower
 
 
-class EmailAuthBackend(ModelBackend):
+def get_user_cache():
+    # The cache of users resolved from sessions, None unless
+    # USER_CACHE_ALIAS names one of CACHES.
+    alias = getattr(settings, 'USER_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
 
-    def authenticate(self, request, username=None, password=None, *args, **kwargs):
+
+def get_user_cache_key(user_id) -> str:
+    return f'users:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    user_cache = get_user_cache()
+    if user_cache is not None:
+        user_cache.delete(get_user_cache_key(user_id))
+
+
+class CachedUserMixin:
+    # AuthenticationMiddleware calls get_user on every request with a
+    # session, serving it from the cache saves the query for the user.
+    # Cached users are dropped when they are saved or deleted and when they
+    # log out (see users.signals).
+
+    def load_user(self, user_id):
+        return super().get_user(user_id)
+
+    def get_user(self, user_id):
+        user_cache = get_user_cache()
+        if user_cache is None:
+            return self.load_user(user_id)
+        key = get_user_cache_key(user_id)
+        user = user_cache.get(key)
+        if user is None:
+            user = self.load_user(user_id)
+            if user is not None:
+                user_cache.set(key, user, getattr(settings, 'USER_CACHE_TIMEOUT', 300))
+        return user
+
+
+class UsernameAuthBackend(CachedUserMixin, ModelBackend):
+    pass
+
+
+class EmailAuthBackend(CachedUserMixin, ModelBackend):
+    # Only called with email credentials (see LoginWithEmailForm), Django
+    # skips backends whose authenticate() doesn't take the credentials
+    # passed. UsernameAuthBackend returns before hashing without a username,
+    # so the password is hashed once per login either way.
+
+    def authenticate(self, request, email=None, password=None):
         UserModel = get_user_model()
 
-        try:
-            user = UserModel.objects.get(email=username)
-        except UserModel.DoesNotExist:
+        if email is None or password is None:
             return None
-        else:
-            if user.check_password(password):
-                return user
+        # Case-insensitive, served by the index on the lower-cased email.
+        # Emails that differ only in case were allowed before, an exact
+        # match wins then.
+        users = UserModel.objects.\
+            alias(email_lower=Lower('email')).\
+            filter(email_lower=email.lower())[:2]
+        users = sorted(users, key=lambda user: user.email != email)
+        if not users:
+            # Hashes like for an existing user, as ModelBackend does.
+            UserModel().set_password(password)
+            return None
+        user = users[0]
+        if user.check_password(password):
+            return user
         return None
 
-    def get_user(self, user_id):
+    def load_user(self, user_id):
         UserModel = get_user_model()
         try:
             return UserModel.objects.get(id=user_id)
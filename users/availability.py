@@ -0,0 +1,81 @@
+import hashlib
+from typing import Optional
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Q
+
+from users.models import CustomUser
+
+
+# Fields whose uniqueness is checked together, with the message shown when
+# a value is taken.
+UNIQUE_FIELDS = {
+    'username': 'A user with that username already exists.',
+    'email': 'A user with this email already exists.',
+}
+AVAILABILITY_TIMEOUT = 30
+
+
+def get_taken_fields(values: dict[str, str], exclude_pk: Optional[int] = None) -> set[str]:
+    # Checks all the given fields with one query. Matching is left to the
+    # database, so it follows the collation the unique indexes use.
+    values = {field: value for field, value in values.items() if value}
+    if not values:
+        return set()
+    conditions = Q()
+    for field, value in values.items():
+        conditions |= Q(**{field: value})
+    users = CustomUser.objects.filter(conditions)
+    if exclude_pk is not None:
+        users = users.exclude(pk=exclude_pk)
+    counts = users.aggregate(**{
+        field: Count('pk', filter=Q(**{field: value}))
+        for field, value in values.items()
+    })
+    return {field for field, count in counts.items() if count}
+
+
+def get_availability_key(field: str, value: str) -> str:
+    return f'users:available:{field}:{hashlib.md5(value.encode()).hexdigest()}'
+
+
+def get_availability(values: dict[str, str]) -> dict[str, bool]:
+    # Served from the cache for AVAILABILITY_TIMEOUT seconds, values missing
+    # from it are checked with one query. Forms do not use this, they always
+    # ask the database.
+    values = {field: value for field, value in values.items() if value}
+    keys = {field: get_availability_key(field, value) for field, value in values.items()}
+    cached = cache.get_many(keys.values())
+    availability = {field: cached[key] for field, key in keys.items() if key in cached}
+    missing = {field: value for field, value in values.items() if field not in availability}
+    if missing:
+        taken = get_taken_fields(missing)
+        checked = {field: field not in taken for field in missing}
+        cache.set_many({keys[field]: available for field, available in checked.items()},
+                       AVAILABILITY_TIMEOUT)
+        availability.update(checked)
+    return availability
+
+
+def invalidate_availability(user: CustomUser):
+    cache.delete_many([get_availability_key(field, getattr(user, field))
+                       for field in UNIQUE_FIELDS if getattr(user, field)])
+
+
+class UniqueUserFieldsMixin:
+    # For model forms of CustomUser: the uniqueness of username and email
+    # is checked with one query instead of one per field.
+
+    def validate_unique(self):
+        fields = [field for field in UNIQUE_FIELDS if field in self.fields]
+        exclude = self._get_validation_exclusions()
+        exclude.update(fields)
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+        values = {field: self.cleaned_data.get(field) for field in fields
+                  if field in self.cleaned_data}
+        for field in get_taken_fields(values, exclude_pk=self.instance.pk):
+            self.add_error(field, UNIQUE_FIELDS[field])
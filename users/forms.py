@@ -1,13 +1,15 @@
 from typing import Any
 from django import forms
 from django.core.exceptions import ValidationError
+from django.contrib.auth import authenticate
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm, \
     UserChangeForm as BaseUserChangeForm
 
+from users.availability import UniqueUserFieldsMixin
 from users.models import CustomUser
 
 
-class RegistrationStep1Form(forms.ModelForm):
+class RegistrationStep1Form(UniqueUserFieldsMixin, forms.ModelForm):
 
     class Meta:
         model = CustomUser
@@ -19,16 +21,11 @@ class RegistrationStep1Form(forms.ModelForm):
     def clean(self):
         cleaned_data = super().clean()
         username = cleaned_data.get('username')
-        email = cleaned_data.get('email')
 
         if username and len(username) < 5:
             msg = 'Username cannot be shorter than 5 characters.'
             self.add_error('username', msg)
 
-        if CustomUser.objects.filter(email=email).first():
-            msg = 'A user with this email already exists.'
-            self.add_error('email', msg)
-
         return self.cleaned_data
 
 
@@ -102,17 +99,21 @@ class LoginWithEmailForm(AuthenticationForm):
         )
 
     def clean(self):
-        cleaned_data = super().clean()
-        email = cleaned_data.get('username')
-        password = cleaned_data.get('password')
-
-        if email and password:
+        email = self.cleaned_data.get('username')
+        password = self.cleaned_data.get('password')
+
+        if email is not None and password:
+            # Passed as email, only EmailAuthBackend authenticates it.
+            self.user_cache = authenticate(self.request, email=email, password=password)
+            if self.user_cache is None:
+                raise self.get_invalid_login_error()
+            self.confirm_login_allowed(self.user_cache)
             self.cleaned_data['email'] = email.lower()
 
         return self.cleaned_data
 
 
-class UserChangeForm(BaseUserChangeForm):
+class UserChangeForm(UniqueUserFieldsMixin, BaseUserChangeForm):
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
@@ -133,15 +134,9 @@ class UserChangeForm(BaseUserChangeForm):
     def clean(self):
         cleaned_data = super().clean()
         username = cleaned_data.get('username')
-        email = cleaned_data.get('email')
 
         if username and len(username) < 5:
             msg = 'Username cannot be shorter than 5 characters.'
             self.add_error('username', msg)
 
-        user_with_email = CustomUser.objects.filter(email=email).first()
-        if user_with_email and (user_with_email != self.user):
-            msg = 'A user with this email already exists.'
-            self.add_error('email', msg)
-
         return self.cleaned_data
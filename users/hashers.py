@@ -0,0 +1,102 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_cost(name: str, default: int) -> int:
+    return getattr(settings, 'PASSWORD_HASHING_COST', {}).get(name, default)
+
+
+# The hashers below read their cost from PASSWORD_HASHING_COST, so it can be
+# tuned per deployment. Hashes made with another cost are rehashed after the
+# next login of their user (see schedule_rehash).
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+
+    @property
+    def time_cost(self) -> int:
+        return get_cost('argon2_time_cost', hashers.Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self) -> int:
+        return get_cost('argon2_memory_cost', hashers.Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self) -> int:
+        return get_cost('argon2_parallelism', hashers.Argon2PasswordHasher.parallelism)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+
+    @property
+    def work_factor(self) -> int:
+        return get_cost('scrypt_work_factor', hashers.ScryptPasswordHasher.work_factor)
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self) -> int:
+        return get_cost('pbkdf2_iterations', hashers.PBKDF2PasswordHasher.iterations)
+
+
+# A single worker, so a burst of logins after a cost change upgrades
+# passwords one by one instead of competing with requests for every core.
+executor = None
+executor_lock = threading.Lock()
+pending_user_ids = set()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='password-rehash')
+        return executor
+
+
+def rehash_password(user_id, encoded: str, raw_password: str) -> bool:
+    # Only replaces the hash it was scheduled for, a password changed in
+    # the meantime is kept. The update leaves session_auth_salt alone, so
+    # sessions of the user stay valid.
+    from django.contrib.auth import get_user_model
+    from users.authentication import invalidate_cached_user
+
+    updated = get_user_model().objects.\
+        filter(pk=user_id, password=encoded).\
+        update(password=hashers.make_password(raw_password))
+    if updated:
+        invalidate_cached_user(user_id)
+    return bool(updated)
+
+
+def run_rehash(user_id, encoded: str, raw_password: str):
+    try:
+        rehash_password(user_id, encoded, raw_password)
+    except Exception:
+        logger.exception('Rehashing the password of user %s failed', user_id)
+    finally:
+        with executor_lock:
+            pending_user_ids.discard(user_id)
+        # The worker thread has its own connections.
+        connections.close_all()
+
+
+def schedule_rehash(user_id, encoded: str, raw_password: str):
+    # Called by CustomUser.check_password instead of rehashing on the
+    # request thread, so a login pays the hash cost once.
+    if not getattr(settings, 'PASSWORD_REHASH_ASYNC', True):
+        rehash_password(user_id, encoded, raw_password)
+        return
+    with executor_lock:
+        if user_id in pending_user_ids:
+            return
+        pending_user_ids.add(user_id)
+    get_executor().submit(run_rehash, user_id, encoded, raw_password)
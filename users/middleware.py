@@ -0,0 +1,30 @@
+from django.contrib import auth
+from django.contrib.auth import middleware
+from django.http import HttpRequest
+from django.utils.functional import SimpleLazyObject
+
+
+# Backends sessions may still be stored with, and the backend that took
+# their place. django.contrib.auth.get_user drops sessions whose backend is
+# not in AUTHENTICATION_BACKENDS anymore.
+RENAMED_BACKENDS = {
+    'django.contrib.auth.backends.ModelBackend': 'users.authentication.UsernameAuthBackend',
+}
+
+
+def get_user(request: HttpRequest):
+    if not hasattr(request, '_cached_user'):
+        backend_path = request.session.get(auth.BACKEND_SESSION_KEY)
+        if backend_path in RENAMED_BACKENDS:
+            request.session[auth.BACKEND_SESSION_KEY] = RENAMED_BACKENDS[backend_path]
+        request._cached_user = auth.get_user(request)
+    return request._cached_user
+
+
+class AuthenticationMiddleware(middleware.AuthenticationMiddleware):
+    # Django's middleware with sessions of renamed backends moved over to
+    # the new backend the first time their user is loaded.
+
+    def process_request(self, request: HttpRequest):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
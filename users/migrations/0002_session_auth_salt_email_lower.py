@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:21
+
+from django.db import migrations, models
+import django.db.models.functions.text
+import users.models
+
+
+def set_session_auth_salts(apps, schema_editor):
+    # AddField gives every existing user the same default.
+    CustomUser = apps.get_model('users', 'CustomUser')
+    existing_users = list(CustomUser.objects.only('id'))
+    for user in existing_users:
+        user.session_auth_salt = users.models.get_session_auth_salt()
+    CustomUser.objects.bulk_update(existing_users, ['session_auth_salt'], batch_size=500)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='session_auth_salt',
+            field=models.CharField(default=users.models.get_session_auth_salt, editable=False, max_length=32),
+        ),
+        migrations.RunPython(set_session_auth_salts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='users_customuser_email_lower'),
+        ),
+    ]
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.db import models
+from django.db.models.functions import Lower
 from django.core.exceptions import ValidationError
 from django.core.validators import MinLengthValidator
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser
+from django.utils.crypto import get_random_string, salted_hmac
+
+from users.hashers import schedule_rehash
 
 
 def validate_image(image):
@@ -13,9 +19,51 @@ def validate_image(image):
             f"Maximum size of profile image is {limit_mb} MB")
 
 
+def get_session_auth_salt():
+    return get_random_string(32)
+
+
 class CustomUser(AbstractUser):
     email = models.EmailField(
         unique=True, help_text='Required. Enter valid email address.')
     position = models.CharField(null=True, max_length=255,
                                 validators=[MinLengthValidator(3)], blank=True,
                                 help_text='Optional. For example: Computer Science Student, Arts Teacher, Rocket Engineer.')
+    # Changes with the password but not when the password is rehashed.
+    session_auth_salt = models.CharField(max_length=32, default=get_session_auth_salt,
+                                         editable=False)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(Lower('email'), name='users_customuser_email_lower'),
+        ]
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self.session_auth_salt = get_session_auth_salt()
+
+    def check_password(self, raw_password):
+        # Passwords hashed by another hasher or with another cost are
+        # rehashed in the background, the login only verifies them.
+        def setter(raw_password):
+            if self.pk is not None:
+                schedule_rehash(self.pk, self.password, raw_password)
+
+        return check_password(raw_password, self.password, setter)
+
+    def get_salted_session_auth_hash(self, secret=None) -> str:
+        key_salt = 'users.models.CustomUser.get_session_auth_hash'
+        return salted_hmac(key_salt, self.session_auth_salt, secret=secret,
+                           algorithm='sha256').hexdigest()
+
+    def get_session_auth_hash(self):
+        # Keyed on session_auth_salt instead of the password hash, so that a
+        # rehash does not log the user out of every session.
+        return self.get_salted_session_auth_hash()
+
+    def get_session_auth_fallback_hash(self):
+        for fallback_secret in settings.SECRET_KEY_FALLBACKS:
+            yield self.get_salted_session_auth_hash(secret=fallback_secret)
+        # Sessions started before session_auth_salt, keyed on the password.
+        yield super().get_session_auth_hash()
+        yield from super().get_session_auth_fallback_hash()
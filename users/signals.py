@@ -0,0 +1,30 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import invalidate_cached_user
+from users.availability import invalidate_availability
+from users.models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_saved_user(sender, instance: CustomUser, raw=False, **kwargs):
+    # Covers password changes too, set_password is followed by save.
+    if raw:
+        return
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_availability_of_saved_user(sender, instance: CustomUser, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_availability(instance)
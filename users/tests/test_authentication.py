@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.contrib import auth
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.cache import cache
+from django.urls import reverse
+from django.test import TestCase, override_settings
+
+from users.authentication import get_user_cache_key
+from users.hashers import rehash_password
+from users.models import CustomUser
+
+
+@override_settings(USER_CACHE_ALIAS='default')
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.client.login(username='new_user', password='34somepassword34')
+        self.url = reverse('private:private-page')
+
+    def test_user_is_served_from_cache_with_one_query_less(self):
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+        self.assertIsNotNone(cache.get(get_user_cache_key(self.user.pk)))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_logged_in_with_email_is_cached(self):
+        self.client.logout()
+        self.client.post(reverse('users:login-email'),
+                         data={'username': 'new_user@gmail.com', 'password': '34somepassword34'})
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_saved_user_is_invalidated(self):
+        self.client.get(self.url)
+        self.user.username = 'renamed_user'
+        self.user.save()
+        self.assertIsNone(cache.get(get_user_cache_key(self.user.pk)))
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user'].username, 'renamed_user')
+
+    def test_password_change_logs_out_other_sessions(self):
+        self.client.get(self.url)
+        self.user.set_password('new34somepassword34')
+        self.user.save()
+        # Flushing the stale session would exceed the budget of the page.
+        response = self.client.get(reverse('private:guide'))
+        self.assertFalse(response.context['user'].is_authenticated)
+        self.assertFalse(auth.get_user(self.client).is_authenticated)
+
+    def test_logout_invalidates_user(self):
+        self.client.get(self.url)
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(get_user_cache_key(self.user.pk)))
+
+    def test_sessions_of_model_backend_stay_logged_in(self):
+        # Sessions started before ModelBackend was replaced by
+        # UsernameAuthBackend, with their hash from before session_auth_salt.
+        self.client.logout()
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        session = self.client.session
+        session[auth.HASH_SESSION_KEY] = super(CustomUser, self.user).get_session_auth_hash()
+        session.save()
+        # Moving the session over writes it once, over the query budget.
+        with override_settings(QUERY_BUDGETS={}):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertEqual(self.client.session[auth.BACKEND_SESSION_KEY],
+                         'users.authentication.UsernameAuthBackend')
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['user'], self.user)
+
+    @override_settings(USER_CACHE_ALIAS=None)
+    def test_cache_is_not_used_unless_configured(self):
+        self.client.get(self.url)
+        self.assertIsNone(cache.get(get_user_cache_key(self.user.pk)))
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+
+@override_settings(PASSWORD_REHASH_ASYNC=False)
+class PasswordHashingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+
+    def set_cheaper_password(self):
+        # A hash made before the cost was raised.
+        self.user.password = make_password('34somepassword34', hasher='pbkdf2_sha256')
+        self.user.save()
+
+    def test_cost_is_read_from_settings(self):
+        with override_settings(PASSWORD_HASHING_COST={'scrypt_work_factor': 2**10}):
+            encoded = make_password('34somepassword34')
+        self.assertTrue(encoded.startswith('scrypt$1024$'))
+
+    def test_login_hashes_the_password_once(self):
+        with mock.patch('users.hashers.hashers.ScryptPasswordHasher.verify',
+                        autospec=True, return_value=True) as verify:
+            self.client.post(reverse('users:login-username'),
+                             data={'username': 'new_user', 'password': '34somepassword34'})
+        self.assertEqual(verify.call_count, 1)
+
+    def test_email_login_hashes_the_password_once(self):
+        with mock.patch('users.hashers.hashers.ScryptPasswordHasher.verify',
+                        autospec=True, return_value=True) as verify, \
+                mock.patch('users.hashers.hashers.ScryptPasswordHasher.encode',
+                           autospec=True) as encode:
+            self.client.post(reverse('users:login-email'),
+                             data={'username': 'new_user@gmail.com', 'password': '34somepassword34'})
+        self.assertEqual(verify.call_count, 1)
+        encode.assert_not_called()
+        self.assertEqual(auth.get_user(self.client), self.user)
+
+    def test_outdated_hash_is_upgraded_after_login(self):
+        self.set_cheaper_password()
+        self.client.post(reverse('users:login-email'),
+                         data={'username': 'new_user@gmail.com', 'password': '34somepassword34'})
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('scrypt$'))
+        self.assertTrue(check_password('34somepassword34', self.user.password))
+        # The session of the login survives the rehash.
+        self.assertTrue(auth.get_user(self.client).is_authenticated)
+
+    def test_rehash_keeps_a_changed_password(self):
+        self.set_cheaper_password()
+        outdated = self.user.password
+        self.user.set_password('new34somepassword34')
+        self.user.save()
+        self.assertFalse(rehash_password(self.user.pk, outdated, '34somepassword34'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new34somepassword34'))
+
+    def test_email_login_is_case_insensitive(self):
+        self.client.post(reverse('users:login-email'),
+                         data={'username': 'New_User@Gmail.com', 'password': '34somepassword34'})
+        self.assertEqual(auth.get_user(self.client), self.user)
+
+    def test_sessions_from_before_session_auth_salt_stay_valid(self):
+        self.client.force_login(self.user)
+        session = self.client.session
+        session[auth.HASH_SESSION_KEY] = super(CustomUser, self.user).get_session_auth_hash()
+        session.save()
+        self.assertEqual(auth.get_user(self.client), self.user)
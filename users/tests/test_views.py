@@ -2,8 +2,11 @@ from django.contrib import auth
 from django.contrib.messages import get_messages
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from users.models import CustomUser
 from users.forms import LoginWithEmailForm, UserChangeForm
@@ -481,3 +484,58 @@ class ChangeUserViewTest(TestCase):
                          'You successfully updated your profile')
         user = auth.get_user(self.client)
         self.assertEqual(user.username, new_username)
+
+
+class AvailabilityTest(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        cls.user = CustomUser.objects.create_user(
+            username='new_user',
+            email='new_user@gmail.com',
+            password='34somepassword34')
+
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_availability_is_checked_with_one_query_and_cached(self):
+        url = reverse('users:availability')
+        data = {'username': 'new_user', 'email': 'free@gmail.com'}
+        with self.assertNumQueries(1):
+            response = self.client.get(url, data=data)
+        self.assertEqual(response.json(), {'username': False, 'email': True})
+        with self.assertNumQueries(0):
+            response = self.client.get(url, data=data)
+        self.assertEqual(response.json(), {'username': False, 'email': True})
+        self.assertEqual(self.client.get(url).json(), {})
+
+    def test_saved_user_invalidates_availability(self):
+        url = reverse('users:availability')
+        self.assertEqual(self.client.get(url, data={'email': 'free@gmail.com'}).json(),
+                         {'email': True})
+        self.user.email = 'free@gmail.com'
+        self.user.save()
+        self.assertEqual(self.client.get(url, data={'email': 'free@gmail.com'}).json(),
+                         {'email': False})
+
+    def test_first_step_checks_username_and_email_with_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('users:register'),
+                                        data={'registration_wizard-current_step': 'First Step',
+                                              'First Step-username': 'new_user',
+                                              'First Step-email': 'new_user@gmail.com'})
+        self.assertEqual(len([query for query in queries if 'users_customuser' in query['sql']]), 1)
+        self.assertContains(response, 'A user with that username already exists.')
+        self.assertContains(response, 'A user with this email already exists.')
+
+    def test_profile_update_checks_uniqueness_with_one_query(self):
+        CustomUser.objects.create_user(username='other_user', email='other_user@gmail.com',
+                                       password='34somepassword34')
+        self.client.login(username='new_user', password='34somepassword34')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('users:change-user'),
+                                        data={'username': 'new_user',
+                                              'email': 'other_user@gmail.com'})
+        # One query for the logged in user and one for uniqueness.
+        self.assertEqual(len([query for query in queries if 'users_customuser' in query['sql']]), 2)
+        self.assertContains(response, 'A user with this email already exists.')
+        self.assertNotContains(response, 'A user with that username already exists.')
@@ -0,0 +1,71 @@
+import json
+
+from django.contrib import auth
+from django.core import signing
+from django.db import connection
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from users.models import CustomUser
+
+
+STEPS = [
+    {'registration_wizard-current_step': 'First Step',
+     'First Step-username': 'new_user',
+     'First Step-email': 'new_user@gmail.com'},
+    {'registration_wizard-current_step': 'Second Step',
+     'Second Step-first_name': 'John',
+     'Second Step-last_name': 'Doe'},
+    {'registration_wizard-current_step': 'Third Step',
+     'Third Step-position': 'Computer Science Student'},
+    {'registration_wizard-current_step': 'Fourth Step',
+     'Fourth Step-password1': '34somepassword34',
+     'Fourth Step-password2': '34somepassword34'},
+]
+COOKIE_NAME = 'wizard_registration_wizard'
+
+
+class RegistrationWizardStorageTest(TestCase):
+
+    def get_cookie_data(self) -> dict:
+        cookie = self.client.cookies[COOKIE_NAME].value
+        return json.loads(signing.get_cookie_signer(salt=COOKIE_NAME).unsign(cookie))
+
+    def test_cookie_storage_does_not_touch_sessions_before_last_step(self):
+        with CaptureQueriesContext(connection) as queries:
+            for data in STEPS[:3]:
+                self.client.post(reverse('users:register'), data=data)
+        self.assertFalse([query for query in queries if 'django_session' in query['sql']])
+        self.assertEqual(self.get_cookie_data()['step_data'],
+                         {'First Step': {'username': 'new_user', 'email': 'new_user@gmail.com'},
+                          'Second Step': {'first_name': 'John', 'last_name': 'Doe'},
+                          'Third Step': {'position': 'Computer Science Student'}})
+        response = self.client.post(reverse('users:register'), data=STEPS[3])
+        self.assertRedirects(response, reverse('core:index'))
+        self.assertEqual(auth.get_user(self.client).username, 'new_user')
+        self.assertEqual(CustomUser.objects.get().position, 'Computer Science Student')
+
+    def test_cookie_storage_never_stores_passwords(self):
+        for data in STEPS[:3]:
+            self.client.post(reverse('users:register'), data=data)
+        # The first step fails when it is validated again after the last one.
+        CustomUser.objects.create_user(username='new_user', email='other@gmail.com',
+                                       password='34somepassword34')
+        response = self.client.post(reverse('users:register'), data=STEPS[3])
+        self.assertEqual(response.context['wizard']['management_form']['current_step'].value(),
+                         'First Step')
+        self.assertNotIn('password', json.dumps(self.get_cookie_data()))
+
+    @override_settings(REGISTRATION_WIZARD_STORAGE='users.wizard.CompactSessionStorage',
+                       SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_session_storage(self):
+        for data in STEPS[:2]:
+            self.client.post(reverse('users:register'), data=data)
+        self.assertEqual(self.client.session['wizard_registration_wizard']['step_data'],
+                         {'First Step': {'username': 'new_user', 'email': 'new_user@gmail.com'},
+                          'Second Step': {'first_name': 'John', 'last_name': 'Doe'}})
+        for data in STEPS[2:]:
+            response = self.client.post(reverse('users:register'), data=data)
+        self.assertRedirects(response, reverse('core:index'))
+        self.assertEqual(auth.get_user(self.client).username, 'new_user')
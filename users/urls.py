@@ -16,5 +16,6 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('authenticate/',
          TemplateView.as_view(template_name='users/become_user.html'), name='become-user'),
-    path('profile/update', views.ChangeUserView.as_view(), name='change-user')
+    path('profile/update', views.ChangeUserView.as_view(), name='change-user'),
+    path('availability/', views.availability_view, name='availability')
 ]
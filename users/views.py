@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import login, authenticate, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.utils.decorators import method_decorator
@@ -9,8 +10,11 @@ from django.shortcuts import render, redirect
 from django.utils import timezone
 from django.views import View
 from formtools.wizard.views import SessionWizardView
+from django.http import JsonResponse
 from django.http.request import HttpRequest
+from django.views.decorators.http import require_GET
 
+from users.availability import UNIQUE_FIELDS, get_availability
 from users.models import CustomUser
 from users.forms import RegistrationStep1Form, RegistrationStep2Form, RegistrationStep3Form, \
     RegistrationStep4Form, LoginWithEmailForm, UserChangeForm
@@ -53,10 +57,14 @@ class RegistrationWizard(SessionWizardView):
     form_list = [RegistrationStep1Form, RegistrationStep2Form,
                  RegistrationStep3Form, RegistrationStep4Form]
 
+    @property
+    def storage_name(self) -> str:
+        return settings.REGISTRATION_WIZARD_STORAGE
+
     def done(self, form_list, **kwargs):
         new_user = process_form_data(form_list)
         login(self.request, new_user,
-              backend='django.contrib.auth.backends.ModelBackend')
+              backend='users.authentication.UsernameAuthBackend')
         messages.success(self.request, 'You successfully registered.')
         return redirect('core:index')
 
@@ -79,14 +87,12 @@ class LoginWithUsernameView(View):
 
     def post(self, request, *args, **kwargs):
         form = self.form_class(request, request.POST)
+        # The form authenticates the user already, authenticating again
+        # would hash the password twice.
         if form.is_valid():
-            username = form.cleaned_data['username']
-            password = form.cleaned_data['password']
-            user = authenticate(username=username, password=password)
-            if user:
-                login(request, user)
-                messages.success(request, 'Welcome Back')
-                return redirect('core:index')
+            login(request, form.get_user())
+            messages.success(request, 'Welcome Back')
+            return redirect('core:index')
         return render(request, self.template_name, {'form': form,
                                                     'username': True})
 
@@ -102,14 +108,12 @@ class LoginWithEmailView(View):
 
     def post(self, request, *args, **kwargs):
         form = self.form_class(request, request.POST)
+        # The form authenticates the user already, authenticating again
+        # would hash the password twice.
         if form.is_valid():
-            email = form.cleaned_data['email']
-            password = form.cleaned_data['password']
-            user = authenticate(username=email, password=password)
-            if user:
-                login(request, user)
-                messages.success(request, 'Welcome Back')
-                return redirect('core:index')
+            login(request, form.get_user())
+            messages.success(request, 'Welcome Back')
+            return redirect('core:index')
         return render(request, self.template_name, {'form': form,
                                                     'email': True})
 
@@ -142,3 +146,11 @@ class ChangeUserView(View):
     @method_decorator(login_required)
     def dispatch(self, request, *args, **kwargs):
         return super().dispatch(request, *args, **kwargs)
+
+
+@require_GET
+def availability_view(request: HttpRequest):
+    # Lets the registration wizard check a username or email while it is
+    # typed, e.g. ?username=new_user&email=new_user@gmail.com.
+    values = {field: request.GET.get(field, '').strip() for field in UNIQUE_FIELDS}
+    return JsonResponse(get_availability(values))
@@ -0,0 +1,47 @@
+from django.utils.datastructures import MultiValueDict
+from formtools.wizard.storage.cookie import CookieStorage
+from formtools.wizard.storage.session import SessionStorage
+
+
+class CompactStepDataMixin:
+    # Keeps only the fields of the step's own form: the CSRF token and the
+    # wizard's management field are dropped, field names lose the step
+    # prefix and single values are stored without their list.
+
+    def set_step_data(self, step, cleaned_data):
+        if isinstance(cleaned_data, MultiValueDict):
+            cleaned_data = dict(cleaned_data.lists())
+        prefix = f'{step}-'
+        compact_data = {}
+        for key, values in cleaned_data.items():
+            if not key.startswith(prefix):
+                continue
+            compact_data[key[len(prefix):]] = values[0] if len(values) == 1 else values
+        super().set_step_data(step, compact_data)
+
+    def get_step_data(self, step):
+        compact_data = self.data[self.step_data_key].get(step, None)
+        if compact_data is None:
+            return None
+        return MultiValueDict({
+            f'{step}-{key}': value if isinstance(value, list) else [value]
+            for key, value in compact_data.items()
+        })
+
+
+class CompactSessionStorage(CompactStepDataMixin, SessionStorage):
+    pass
+
+
+class CompactCookieStorage(CompactStepDataMixin, CookieStorage):
+    # Step data lives in a signed, not encrypted, cookie, so password
+    # fields are left out of it. They are only needed in the request of the
+    # last step, where they are posted.
+    sensitive_field = 'password'
+
+    def update_response(self, response):
+        if self.data:
+            for step_data in self.data[self.step_data_key].values():
+                for key in [key for key in step_data if self.sensitive_field in key]:
+                    del step_data[key]
+        super().update_response(response)